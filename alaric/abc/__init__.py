@@ -3,5 +3,18 @@ from .logical import LogicalT
 from .buildable import Buildable
 from .filterable import Filterable
 from .saveable import Saveable
+from .serializer import Serializer
+from .cache_backend import CacheBackend, CachePipeline
+from .hasher import Hasher
 
-__all__ = ("ComparisonT", "LogicalT", "Buildable", "Filterable", "Saveable")
+__all__ = (
+    "ComparisonT",
+    "LogicalT",
+    "Buildable",
+    "Filterable",
+    "Saveable",
+    "Serializer",
+    "CacheBackend",
+    "CachePipeline",
+    "Hasher",
+)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import (
+    runtime_checkable,
+    Protocol,
+    TYPE_CHECKING,
+    Any,
+    List,
+    Optional,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from alaric.backends import CacheScript
+
+
+@runtime_checkable
+class CachePipeline(Protocol):
+    """Protocol for queueing multiple cache operations into a single round trip."""
+
+    def set(
+        self, key: str, value: Union[bytes, str], ttl: Optional[timedelta] = None
+    ) -> None:
+        """Queue setting a key, optionally expiring after ``ttl``."""
+        ...
+
+    def delete(self, *keys: str) -> None:
+        """Queue deleting the provided keys."""
+        ...
+
+    def script(self, script: CacheScript, keys: List[str], args: List[Any]) -> None:
+        """Queue running a :py:class:`~alaric.backends.CacheScript`."""
+        ...
+
+    async def execute(self) -> List[Any]:
+        """Run all queued operations, returning their results in order."""
+        ...
+
+
+@runtime_checkable
+class CacheBackend(Protocol):
+    """Protocol for the storage used by :py:class:`alaric.CachedDocument`."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return the value of a key, or None if it does not exist."""
+        ...
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Return the value of each key, or None if it does not exist."""
+        ...
+
+    async def set(
+        self, key: str, value: Union[bytes, str], ttl: Optional[timedelta] = None
+    ) -> None:
+        """Set a key, optionally expiring after ``ttl``."""
+        ...
+
+    async def delete(self, *keys: str) -> int:
+        """Delete the provided keys, returning how many existed."""
+        ...
+
+    async def incr(self, key: str) -> int:
+        """Increment the integer stored at key, returning the new value."""
+        ...
+
+    async def script(
+        self, script: CacheScript, keys: List[str], args: List[Any]
+    ) -> Any:
+        """Atomically run a :py:class:`~alaric.backends.CacheScript`."""
+        ...
+
+    def pipeline(self) -> CachePipeline:
+        """Return a new pipeline for this backend."""
+        ...
@@ -0,0 +1,26 @@
+from typing import runtime_checkable, Protocol, Any, List, Union
+
+
+@runtime_checkable
+class Hasher(Protocol):
+    """Protocol for hashing field values so they can be queried."""
+
+    def hash(self, field: str, value: Any) -> Union[str, bytes]:
+        """Returns the hash of the provided value.
+
+        Raises
+        ------
+        ValueError
+            Unsupported type to hash
+        """
+        ...
+
+    def hash_many(self, field: str, values: List[Any]) -> List[Union[str, bytes]]:
+        """Returns the hash of every provided value, in order.
+
+        Raises
+        ------
+        ValueError
+            Unsupported type to hash
+        """
+        ...
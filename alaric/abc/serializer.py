@@ -0,0 +1,14 @@
+from typing import runtime_checkable, Protocol, Dict
+
+
+@runtime_checkable
+class Serializer(Protocol):
+    """Protocol for converting cached documents to and from bytes."""
+
+    def dumps(self, data: Dict) -> bytes:
+        """Returns the provided document as bytes."""
+        ...
+
+    def loads(self, data: bytes) -> Dict:
+        """Returns the document represented by the provided bytes."""
+        ...
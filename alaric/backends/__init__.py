@@ -0,0 +1,5 @@
+from .cache_script import CacheScript
+from .redis_backend import RedisBackend
+from .memory_backend import MemoryBackend
+
+__all__ = ("CacheScript", "RedisBackend", "MemoryBackend")
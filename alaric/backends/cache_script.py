@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, List
+
+if TYPE_CHECKING:
+    from alaric.backends import MemoryBackend
+
+
+class CacheScript:
+    """An operation which must run atomically against a cache backend.
+
+    As backends are not guaranteed to support Lua, each script also
+    provides an equivalent Python implementation. This receives a
+    :py:class:`~alaric.backends.MemoryBackend` whose ``call`` method
+    mirrors ``redis.call`` for the commands it supports.
+
+    Parameters
+    ----------
+    lua: str
+        The Lua source used by :py:class:`~alaric.backends.RedisBackend`
+    python: Callable[[MemoryBackend, List[str], List[Any]], Any]
+        The equivalent implementation, called with the backend,
+        ``KEYS`` and ``ARGV`` respectively.
+
+        Unlike Lua, these lists are zero indexed.
+
+
+    .. code-block:: python
+        :linenos:
+
+        from alaric.backends import CacheScript
+
+        get_and_delete = CacheScript(
+            lua=\"\"\"
+            local value = redis.call('GET', KEYS[1])
+            redis.call('DEL', KEYS[1])
+            return value
+            \"\"\",
+            python=lambda redis, keys, args: (
+                redis.call("GET", keys[0]),
+                redis.call("DEL", keys[0]),
+            )[0],
+        )
+    """
+
+    def __init__(
+        self,
+        *,
+        lua: str,
+        python: Callable[[MemoryBackend, List[str], List[Any]], Any],
+    ):
+        self.lua: str = lua
+        self.python: Callable[[MemoryBackend, List[str], List[Any]], Any] = python
+
+    def __repr__(self):
+        return f"CacheScript(python={self.python.__name__})"
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import itertools
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, List, Optional, Set, Tuple, Union
+
+from alaric.backends.cache_script import CacheScript
+
+# Used as a rough per entry overhead when tracking memory usage
+_ENTRY_OVERHEAD = 64
+# How many of the least recently used entries are checked
+# for expiry each time the backend is over max_size
+_EXPIRY_SWEEP_SIZE = 32
+
+
+class MemoryBackend:
+    """A cache backend storing entries within the current process.
+
+    Useful for single process applications and tests where
+    a round trip to Redis is pure overhead.
+
+    Parameters
+    ----------
+    max_size: int
+        The approximate maximum amount of memory in bytes to use.
+
+        Once exceeded, the least recently used entries are evicted.
+
+        Defaults to 64 MiB
+
+
+    .. code-block:: python
+        :linenos:
+
+        from alaric import CachedDocument
+        from alaric.backends import MemoryBackend
+
+        cached_document = CachedDocument(
+            document=document, backend=MemoryBackend(max_size=16 * 1024 * 1024)
+        )
+
+    Notes
+    -----
+    As asyncio runs on a single thread, every operation
+    against this backend is inherently atomic.
+    """
+
+    def __init__(self, *, max_size: int = 64 * 1024 * 1024):
+        if max_size < 1:
+            raise ValueError("max_size must be a positive number")
+
+        self.max_size: int = max_size
+        self._size: int = 0
+        # key -> (value, expires at)
+        self._data: OrderedDict[
+            str, Tuple[Union[bytes, Set[bytes]], Optional[float]]
+        ] = OrderedDict()
+
+    def __repr__(self):
+        return f"MemoryBackend(max_size={self.max_size})"
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size(self) -> int:
+        """The approximate amount of memory in bytes currently used."""
+        return self._size
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.call("GET", key)
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.call("MGET", *keys)
+
+    async def set(
+        self, key: str, value: Union[bytes, str], ttl: Optional[timedelta] = None
+    ) -> None:
+        if ttl is None:
+            self.call("SET", key, value)
+        else:
+            self.call("SET", key, value, "PX", int(ttl.total_seconds() * 1000))
+
+    async def delete(self, *keys: str) -> int:
+        return self.call("DEL", *keys)
+
+    async def incr(self, key: str) -> int:
+        return self.call("INCR", key)
+
+    async def script(
+        self, script: CacheScript, keys: List[str], args: List[Any]
+    ) -> Any:
+        return script.python(self, keys, args)
+
+    def pipeline(self) -> MemoryPipeline:
+        return MemoryPipeline(self)
+
+    def call(self, command: str, *args: Any) -> Any:
+        """Run a command in the same manner as ``redis.call`` within Lua.
+
+        Supports ``GET``, ``MGET``, ``SET`` with optional ``PX``,
+        ``DEL``, ``INCR``, ``EXISTS``, ``PEXPIRE``, ``SADD``, ``SMEMBERS``
+        and ``SISMEMBER``.
+        """
+        command = command.upper()
+        if command == "GET":
+            return self._get_value(args[0], bytes)
+
+        if command == "MGET":
+            return [self._get_value(key, bytes) for key in args]
+
+        if command == "SET":
+            key, value = args[0], self._to_bytes(args[1])
+            expires_at = None
+            if len(args) == 4 and str(args[2]).upper() == "PX":
+                expires_at = time.monotonic() + int(args[3]) / 1000
+
+            self._store(key, value, expires_at)
+            return True
+
+        if command == "DEL":
+            return sum(self._remove(key) for key in args)
+
+        if command == "EXISTS":
+            return sum(self._get_entry(key) is not None for key in args)
+
+        if command == "INCR":
+            entry = self._get_entry(args[0])
+            value = int(entry[0]) + 1 if entry is not None else 1
+            self._store(args[0], self._to_bytes(value), entry[1] if entry else None)
+            return value
+
+        if command == "PEXPIRE":
+            entry = self._get_entry(args[0])
+            if entry is None:
+                return 0
+
+            key = self._to_key(args[0])
+            self._data[key] = entry[0], time.monotonic() + int(args[1]) / 1000
+            return 1
+
+        if command == "SADD":
+            entry = self._get_entry(args[0])
+            members: Set[bytes] = set(entry[0]) if entry is not None else set()
+            before = len(members)
+            members.update(self._to_bytes(member) for member in args[1:])
+            self._store(args[0], members, entry[1] if entry else None)
+            return len(members) - before
+
+        if command == "SMEMBERS":
+            return list(self._get_value(args[0], set) or [])
+
+        if command == "SISMEMBER":
+            members = self._get_value(args[0], set) or set()
+            return int(self._to_bytes(args[1]) in members)
+
+        raise ValueError(f"Unsupported command {command}")
+
+    def _get_entry(
+        self, key: Union[str, bytes]
+    ) -> Optional[Tuple[Union[bytes, Set[bytes]], Optional[float]]]:
+        key = self._to_key(key)
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self._data.move_to_end(key)
+        return entry
+
+    def _get_value(self, key: str, expected_type: type) -> Any:
+        entry = self._get_entry(key)
+        if entry is None:
+            return None
+
+        if not isinstance(entry[0], expected_type):
+            raise TypeError(f"{key} does not hold a {expected_type.__name__} value")
+
+        return entry[0]
+
+    def _store(
+        self,
+        key: Union[str, bytes],
+        value: Union[bytes, Set[bytes]],
+        expires_at: Optional[float],
+    ) -> None:
+        key = self._to_key(key)
+        self._remove(key)
+        self._data[key] = value, expires_at
+        self._size += self._entry_size(key, value)
+        self._evict()
+
+    def _remove(self, key: Union[str, bytes]) -> bool:
+        key = self._to_key(key)
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+
+        self._size -= self._entry_size(key, entry[0])
+        return True
+
+    def _evict(self) -> None:
+        if self._size <= self.max_size:
+            return
+
+        # Prefer dropping expired entries before live ones, only checking
+        # a bounded amount as this runs on every write once full.
+        # Other expired entries are removed when accessed or evicted
+        now = time.monotonic()
+        expired = [
+            key
+            for key, (_, expires_at) in itertools.islice(
+                self._data.items(), _EXPIRY_SWEEP_SIZE
+            )
+            if expires_at is not None and expires_at <= now
+        ]
+        for key in expired:
+            self._remove(key)
+
+        while self._size > self.max_size and self._data:
+            self._remove(next(iter(self._data)))
+
+    @staticmethod
+    def _entry_size(key: str, value: Union[bytes, Set[bytes]]) -> int:
+        if isinstance(value, set):
+            return _ENTRY_OVERHEAD + len(key) + sum(len(member) for member in value)
+
+        return _ENTRY_OVERHEAD + len(key) + len(value)
+
+    @staticmethod
+    def _to_key(key: Union[str, bytes]) -> str:
+        # Redis returns keys stored as values as bytes
+        if isinstance(key, bytes):
+            return key.decode("utf-8")
+
+        return key
+
+    @staticmethod
+    def _to_bytes(value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return value
+
+        return str(value).encode("utf-8")
+
+
+class MemoryPipeline:
+    """Queues operations to run against a :py:class:`MemoryBackend` at once."""
+
+    def __init__(self, backend: MemoryBackend):
+        self._backend: MemoryBackend = backend
+        self._operations: List[Tuple[str, Tuple[Any, ...]]] = []
+
+    def set(
+        self, key: str, value: Union[bytes, str], ttl: Optional[timedelta] = None
+    ) -> None:
+        self._operations.append(("set", (key, value, ttl)))
+
+    def delete(self, *keys: str) -> None:
+        self._operations.append(("delete", keys))
+
+    def script(self, script: CacheScript, keys: List[str], args: List[Any]) -> None:
+        self._operations.append(("script", (script, keys, args)))
+
+    async def execute(self) -> List[Any]:
+        # Nothing here awaits, so the pipeline runs without interruption
+        results = []
+        for operation, arguments in self._operations:
+            if operation == "set":
+                key, value, ttl = arguments
+                if ttl is None:
+                    results.append(self._backend.call("SET", key, value))
+                else:
+                    results.append(
+                        self._backend.call(
+                            "SET", key, value, "PX", int(ttl.total_seconds() * 1000)
+                        )
+                    )
+
+            elif operation == "delete":
+                results.append(self._backend.call("DEL", *arguments))
+
+            else:
+                script, keys, args = arguments
+                results.append(script.python(self._backend, keys, args))
+
+        self._operations = []
+        return results
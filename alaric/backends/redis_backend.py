@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from alaric.backends.cache_script import CacheScript
+
+if TYPE_CHECKING:
+    from redis.asyncio.client import Redis
+    from redis.commands.core import AsyncScript
+
+
+class RedisBackend:
+    """A cache backend storing entries in Redis.
+
+    Parameters
+    ----------
+    redis_client: redis.asyncio.client.Redis
+        The Redis instance to use
+
+
+    .. code-block:: python
+        :linenos:
+
+        from redis.asyncio import Redis
+        from alaric.backends import RedisBackend
+
+        backend = RedisBackend(Redis.from_url("redis://localhost"))
+    """
+
+    def __init__(self, redis_client: Redis):
+        self.redis_client: Redis = redis_client
+        self._scripts: Dict[CacheScript, AsyncScript] = {}
+
+    def __repr__(self):
+        return f"RedisBackend(redis_client={self.redis_client})"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis_client.get(key)
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+
+        return await self.redis_client.mget(keys)
+
+    async def set(
+        self, key: str, value: Union[bytes, str], ttl: Optional[timedelta] = None
+    ) -> None:
+        await self.redis_client.set(key, value, px=ttl)
+
+    async def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+
+        return await self.redis_client.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return await self.redis_client.incr(key)
+
+    async def script(
+        self, script: CacheScript, keys: List[str], args: List[Any]
+    ) -> Any:
+        return await self._get_script(script)(keys=keys, args=args)
+
+    def pipeline(self) -> RedisPipeline:
+        return RedisPipeline(self)
+
+    def _get_script(self, script: CacheScript) -> AsyncScript:
+        if script not in self._scripts:
+            self._scripts[script] = self.redis_client.register_script(script.lua)
+
+        return self._scripts[script]
+
+
+class RedisPipeline:
+    """Queues operations to send to Redis in a single round trip."""
+
+    def __init__(self, backend: RedisBackend):
+        self._backend: RedisBackend = backend
+        self._operations: List[Tuple[str, Tuple[Any, ...]]] = []
+
+    def set(
+        self, key: str, value: Union[bytes, str], ttl: Optional[timedelta] = None
+    ) -> None:
+        self._operations.append(("set", (key, value, ttl)))
+
+    def delete(self, *keys: str) -> None:
+        self._operations.append(("delete", keys))
+
+    def script(self, script: CacheScript, keys: List[str], args: List[Any]) -> None:
+        self._operations.append(("script", (script, keys, args)))
+
+    async def execute(self) -> List[Any]:
+        if not self._operations:
+            return []
+
+        async with self._backend.redis_client.pipeline(transaction=False) as pipe:
+            for operation, arguments in self._operations:
+                if operation == "set":
+                    key, value, ttl = arguments
+                    pipe.set(key, value, px=ttl)
+
+                elif operation == "delete":
+                    pipe.delete(*arguments)
+
+                else:
+                    script, keys, args = arguments
+                    await self._backend._get_script(script)(
+                        keys=keys, args=args, client=pipe
+                    )
+
+            self._operations = []
+            return await pipe.execute()
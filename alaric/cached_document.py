@@ -1,7 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import copy
+import datetime
+import hashlib
+import inspect
 import io
 import logging
+import random
+import time
+from collections import OrderedDict
 from datetime import timedelta
 from typing import (
     TYPE_CHECKING,
@@ -11,22 +20,153 @@ from typing import (
     Any,
     Optional,
     TypeVar,
-    cast,
     Generic,
+    Callable,
+    Tuple,
+    Awaitable,
 )
 
 import orjson
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.results import DeleteResult
 
-from alaric.abc import Buildable, Filterable, Saveable
+from alaric.abc import Buildable, Filterable, Saveable, Serializer, CacheBackend
+from alaric.backends import CacheScript, RedisBackend
+from alaric.cursor import Cursor
+from alaric.document import Document
+from alaric.meta import All
+from alaric.projections import Projection
+from alaric.serializers import OrjsonSerializer
 
 if TYPE_CHECKING:
-    from redis.asyncio.client import Redis
-    from alaric import Document
+    from redis.asyncio.client import Redis, PubSub
 
 
 log = logging.getLogger(__name__)
 C = TypeVar("C")
 """A typevar representing the type of a given converter class"""
+T = TypeVar("T")
+
+# Returned by CachedDocument._call_backend when the backend could not be used
+_UNAVAILABLE: Any = object()
+# Past this many missed invalidations the whole generation is bumped instead
+_MAX_MISSED_INVALIDATIONS = 1024
+
+
+def _update_cache(redis, keys: List[str], args: List[Any]) -> None:
+    for key in redis.call("SMEMBERS", keys[1]):
+        redis.call("DEL", key)
+
+    redis.call("DEL", keys[1])
+    redis.call("SET", keys[0], args[1], "PX", args[0])
+    for key in keys[2:]:
+        redis.call("SET", key, keys[0], "PX", args[0])
+        redis.call("SADD", keys[1], key)
+
+    if len(keys) > 2:
+        redis.call("PEXPIRE", keys[1], args[0])
+
+
+def _invalidate_cache(redis, keys: List[str], args: List[Any]) -> int:
+    for key in redis.call("SMEMBERS", keys[1]):
+        redis.call("DEL", key)
+
+    return redis.call("DEL", keys[0], keys[1])
+
+
+# KEYS[1] = _id key, KEYS[2] = reverse index key, KEYS[3:] = lookup keys
+# ARGV[1] = ttl in milliseconds, ARGV[2] = serialized document
+_UPDATE_SCRIPT = CacheScript(
+    lua="""
+local stale = redis.call('SMEMBERS', KEYS[2])
+for _, key in ipairs(stale) do
+    redis.call('DEL', key)
+end
+redis.call('DEL', KEYS[2])
+redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[1])
+for i = 3, #KEYS do
+    redis.call('SET', KEYS[i], KEYS[1], 'PX', ARGV[1])
+    redis.call('SADD', KEYS[2], KEYS[i])
+end
+if #KEYS > 2 then
+    redis.call('PEXPIRE', KEYS[2], ARGV[1])
+end
+""",
+    python=_update_cache,
+)
+
+
+def _compare_and_update_cache(redis, keys: List[str], args: List[Any]) -> int:
+    if redis.call("GET", keys[0]) != args[2]:
+        _invalidate_cache(redis, keys, args)
+        return 0
+
+    _update_cache(redis, keys, args)
+    return 1
+
+
+# KEYS and ARGV[1:2] as _UPDATE_SCRIPT
+# ARGV[3] = serialized document the cached entry must currently equal,
+# otherwise the entry is invalidated instead
+_COMPARE_AND_UPDATE_SCRIPT = CacheScript(
+    lua="""
+local stale = redis.call('SMEMBERS', KEYS[2])
+if redis.call('GET', KEYS[1]) ~= ARGV[3] then
+    for _, key in ipairs(stale) do
+        redis.call('DEL', key)
+    end
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 0
+end
+for _, key in ipairs(stale) do
+    redis.call('DEL', key)
+end
+redis.call('DEL', KEYS[2])
+redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[1])
+for i = 3, #KEYS do
+    redis.call('SET', KEYS[i], KEYS[1], 'PX', ARGV[1])
+    redis.call('SADD', KEYS[2], KEYS[i])
+end
+if #KEYS > 2 then
+    redis.call('PEXPIRE', KEYS[2], ARGV[1])
+end
+return 1
+""",
+    python=_compare_and_update_cache,
+)
+
+
+def _get_if_indexed(redis, keys: List[str], args: List[Any]) -> List[Any]:
+    if not redis.call("SISMEMBER", keys[1], args[0]):
+        return [0]
+
+    return [1, redis.call("GET", keys[0])]
+
+
+# KEYS[1] = _id key, KEYS[2] = reverse index key
+# ARGV[1] = lookup key which resolved to KEYS[1]
+_GET_IF_INDEXED_SCRIPT = CacheScript(
+    lua="""
+if redis.call('SISMEMBER', KEYS[2], ARGV[1]) == 0 then
+    return {0}
+end
+return {1, redis.call('GET', KEYS[1])}
+""",
+    python=_get_if_indexed,
+)
+
+# KEYS[1] = _id key, KEYS[2] = reverse index key
+_INVALIDATE_SCRIPT = CacheScript(
+    lua="""
+local stale = redis.call('SMEMBERS', KEYS[2])
+for _, key in ipairs(stale) do
+    redis.call('DEL', key)
+end
+return redis.call('DEL', KEYS[1], KEYS[2])
+""",
+    python=_invalidate_cache,
+)
 
 
 class CachedDocument(Generic[C]):
@@ -53,18 +193,59 @@ class CachedDocument(Generic[C]):
     This document works off the assumption that a documents ``_id`` remains
     consistent through the lifetime of the entry.
 
-    This document will also leave hanging redis entries when lookups
-    outside the _id are modified during the lifetime of the object.
-    This is mitigated by enforcing a TTL of all redis entries.
+    Every ``_id`` entry keeps a set of the ``extra_lookups`` keys which
+    point at it. Whenever an entry is written or invalidated, the keys
+    within this set are removed so lookups never resolve to stale data.
+
+    All keys are prefixed with a namespace and generation number, I.e.
+    ``config:0:_id:1|``. Bumping the generation via :py:meth:`invalidate_all`
+    invalidates every entry within the namespace without scanning Redis.
     """
 
+    _STAT_NAMES: Tuple[str, ...] = (
+        "hits",
+        "misses",
+        "not_found",
+        "uncacheable",
+        "lookup_dereferences",
+        "stale_lookups",
+        "query_hits",
+        "query_misses",
+        "db_fallbacks",
+        "db_fallback_seconds",
+        "bytes_read",
+        "bytes_written",
+        "backend_errors",
+        "circuit_opens",
+    )
+
     def __init__(
         self,
         *,
         document: Document,
-        redis_client: Redis,
+        redis_client: Optional[Redis] = None,
+        backend: Optional[CacheBackend] = None,
         extra_lookups: List[List[str]] = None,
         cache_ttl: timedelta = timedelta(hours=1),
+        ttl_jitter: timedelta = timedelta(),
+        ttl_policy: Optional[Callable[[Dict[str, Any]], Optional[timedelta]]] = None,
+        serializer: Optional[Serializer] = None,
+        namespace: Optional[str] = None,
+        generation_refresh_interval: timedelta = timedelta(seconds=1),
+        local_cache: Optional[CacheBackend] = None,
+        local_cache_ttl: timedelta = timedelta(minutes=1),
+        invalidation_bus: bool = False,
+        write_behind: bool = False,
+        write_behind_interval: timedelta = timedelta(seconds=1),
+        write_behind_max_pending: int = 1000,
+        on_write_behind_error: Optional[
+            Callable[[Exception, List[Dict[str, Any]]], Any]
+        ] = None,
+        on_metric: Optional[Callable[[str, float], Any]] = None,
+        backend_timeout: Optional[timedelta] = None,
+        circuit_breaker_threshold: Optional[int] = None,
+        circuit_breaker_cooldown: timedelta = timedelta(seconds=30),
+        converted_cache_size: int = 0,
     ):
         """
 
@@ -72,8 +253,16 @@ class CachedDocument(Generic[C]):
         ----------
         document: alaric.Document
             The underlying DB document
-        redis_client: redis.asyncio.client.Redis
-            The Redis instance to use
+        redis_client: Optional[redis.asyncio.client.Redis]
+            The Redis instance to use.
+
+            Shorthand for ``backend=RedisBackend(redis_client)``
+        backend: Optional[CacheBackend]
+            Where cached entries should be stored, such as
+            :py:class:`~alaric.backends.MemoryBackend`
+            for single process applications.
+
+            Exactly one of ``redis_client`` or ``backend`` is required.
         extra_lookups: List[List[str]]
             Extra lookups to build. For example:
 
@@ -94,12 +283,212 @@ class CachedDocument(Generic[C]):
         cache_ttl: timedelta
             How long keys should exist in Redis.
 
-            This is a requirement as this class will
-            leave hanging keys in Redis when certain values change.
+            This bounds how long changes made to the
+            database outside of this class remain unseen.
+        ttl_jitter: timedelta
+            Up to this much time is randomly added to every TTL
+            so entries written together do not all expire together.
+
+            Defaults to no jitter.
+        ttl_policy: Optional[Callable[[Dict[str, Any]], Optional[timedelta]]]
+            Called with each document being cached to decide its TTL,
+            returning ``None`` uses ``cache_ttl``.
+
+            This allows rarely changing documents to be cached for
+            longer than volatile ones. The TTL applies to the ``_id``
+            entry and all ``extra_lookups`` entries alike.
+
+            .. code-block:: python
+
+                def ttl_policy(document: dict) -> Optional[timedelta]:
+                    if document.get("archived"):
+                        return timedelta(days=1)
+
+                    return None
+        serializer: Optional[Serializer]
+            How documents should be converted to bytes for storage in Redis.
+
+            Defaults to :py:class:`~alaric.serializers.OrjsonSerializer`
+        namespace: Optional[str]
+            The prefix applied to every key this instance creates,
+            allowing multiple documents to share a Redis instance.
+
+            Defaults to the collection name of ``document``
+        generation_refresh_interval: timedelta
+            How long the current cache generation is remembered
+            locally before being re-fetched from Redis.
+
+            This bounds how long other processes may serve entries
+            after :py:meth:`invalidate_all` has been called.
+        local_cache: Optional[CacheBackend]
+            A process local cache, such as :py:class:`~alaric.backends.MemoryBackend`,
+            to check before ``backend``.
+
+            Entries written by other processes are not seen until they
+            expire from the local cache unless ``invalidation_bus`` is enabled.
+        local_cache_ttl: timedelta
+            How long entries should exist in ``local_cache``.
+        invalidation_bus: bool
+            Publish modified ``_id``'s over Redis pub/sub and evict
+            entries modified by other processes from ``local_cache``.
+
+            Requires both ``local_cache`` and a Redis backend.
+            Call :py:meth:`close` to stop listening for changes.
+            ``local_cache`` is bypassed until subscribed, with
+            failed subscriptions retried in the background.
+        write_behind: bool
+            Make :py:meth:`set` only wait for the cache to be updated,
+            queueing the database write to happen in the background.
+
+            Repeated writes to the same ``_id`` are coalesced and
+            queued writes are sent as a single unordered bulk upsert.
+            Documents which override ``upsert``, such as
+            :py:class:`EncryptedDocument`, have each queued
+            write sent through their own ``upsert`` instead.
+            Queued writes are lost if the process dies before
+            they are flushed, so this is only suitable for
+            data which can tolerate loss. I.e. presence.
+
+            Call :py:meth:`close` during shutdown to flush queued writes.
+        write_behind_interval: timedelta
+            How often queued writes are flushed to the database.
+        write_behind_max_pending: int
+            Queued writes are flushed immediately once
+            this many documents are waiting.
+        on_write_behind_error: Optional[Callable[[Exception, List[Dict[str, Any]]], Any]]
+            Called with the error and the documents which
+            were being written when a flush fails.
+
+            Failed writes are otherwise only logged.
+        on_metric: Optional[Callable[[str, float], Any]]
+            Called with the name and value of every metric
+            as it is recorded, see :py:meth:`stats` for names.
+
+            Useful for forwarding metrics to Prometheus or StatsD.
+        backend_timeout: Optional[timedelta]
+            How long to wait on each call to the backend
+            before treating it as failed.
+
+            Defaults to waiting forever.
+        circuit_breaker_threshold: Optional[int]
+            Serve requests from the DB rather than raising
+            when the backend fails, and stop using the backend
+            entirely after this many failures in a row.
+
+            Writes made while the backend is unavailable still go
+            to the DB, with the affected entries invalidated once
+            the backend recovers.
+
+            Defaults to raising backend errors.
+        circuit_breaker_cooldown: timedelta
+            How long to stop using the backend for once
+            ``circuit_breaker_threshold`` is reached, after
+            which the next call probes whether it has recovered.
+        converted_cache_size: int
+            Keep up to this many converted objects in memory,
+            so repeated cache hits for an unchanged document return
+            the same instance without parsing or conversion.
+
+            Only enable this when the documents ``converter`` is
+            immutable, I.e. a frozen dataclass, as every caller
+            shares the instance.
+
+            Defaults to ``0`` which disables this.
+
+        Raises
+        ------
+        ValueError
+            Exactly one of redis_client or backend must be provided.
+        ValueError
+            invalidation_bus requires local_cache and a Redis backend.
+        ValueError
+            write_behind_max_pending must be a positive number.
+        ValueError
+            circuit_breaker_threshold must be a positive number.
+        ValueError
+            converted_cache_size cannot be negative.
         """
+        if (redis_client is None) == (backend is None):
+            raise ValueError("Exactly one of redis_client or backend must be provided.")
+
+        if redis_client is None and isinstance(backend, RedisBackend):
+            redis_client = backend.redis_client
+
+        if invalidation_bus and (local_cache is None or redis_client is None):
+            raise ValueError(
+                "invalidation_bus requires local_cache and a Redis backend."
+            )
+
+        if write_behind_max_pending < 1:
+            raise ValueError("write_behind_max_pending must be a positive number.")
+
+        if circuit_breaker_threshold is not None and circuit_breaker_threshold < 1:
+            raise ValueError("circuit_breaker_threshold must be a positive number.")
+
+        if converted_cache_size < 0:
+            raise ValueError("converted_cache_size cannot be negative.")
+
         self.document: Document = document
-        self._redis_client: Redis = redis_client
+        self._redis_client: Optional[Redis] = redis_client
+        self._backend: CacheBackend = (
+            backend if backend is not None else RedisBackend(redis_client)
+        )
         self._cache_ttl: timedelta = cache_ttl
+        self._ttl_jitter: timedelta = ttl_jitter
+        self._ttl_policy: Optional[Callable[[Dict[str, Any]], Optional[timedelta]]] = (
+            ttl_policy
+        )
+        self._serializer: Serializer = (
+            serializer if serializer is not None else OrjsonSerializer()
+        )
+        self._namespace: str = (
+            namespace if namespace is not None else document.collection_name
+        )
+        self._generation_refresh_interval: float = (
+            generation_refresh_interval.total_seconds()
+        )
+        self._generation: int = 0
+        self._generation_fetched_at: Optional[float] = None
+        self._local_cache: Optional[CacheBackend] = local_cache
+        self._local_cache_ttl: timedelta = local_cache_ttl
+        # Incremented on every local eviction so reads racing
+        # an eviction know not to populate the local cache
+        self._local_evictions: int = 0
+        self._invalidation_bus: bool = invalidation_bus
+        self._pubsub: Optional[PubSub] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._write_behind: bool = write_behind
+        self._write_behind_interval: float = write_behind_interval.total_seconds()
+        self._write_behind_max_pending: int = write_behind_max_pending
+        self._on_write_behind_error: Optional[
+            Callable[[Exception, List[Dict[str, Any]]], Any]
+        ] = on_write_behind_error
+        # Queued writes keyed by their _id key so
+        # repeated writes to a document are coalesced
+        self._pending_writes: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self._flush_lock: asyncio.Lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._on_metric: Optional[Callable[[str, float], Any]] = on_metric
+        self._stats: Dict[str, float] = dict.fromkeys(self._STAT_NAMES, 0)
+        self._backend_timeout: Optional[float] = (
+            backend_timeout.total_seconds() if backend_timeout is not None else None
+        )
+        self._circuit_breaker_threshold: Optional[int] = circuit_breaker_threshold
+        self._circuit_breaker_cooldown: float = circuit_breaker_cooldown.total_seconds()
+        self._backend_failures: int = 0
+        self._circuit_open_until: Optional[float] = None
+        # Changes made while the backend was unavailable which
+        # must be applied to it once it is reachable again
+        self._missed_invalidations: Dict[str, Any] = {}
+        self._missed_generation_bump: bool = False
+        self._missed_query_version_bump: bool = False
+        self._replaying_invalidations: bool = False
+        self._converted_cache_size: int = converted_cache_size
+        # Keyed by a digest of the cached bytes, so an entry
+        # can never outlive the version it was converted from
+        self._converted_cache: OrderedDict[bytes, Tuple[Dict[str, Any], Any]] = (
+            OrderedDict()
+        )
         self._extra_lookups: List[List[str]] = []
         if extra_lookups is not None:
             # keys are sorted so that we can consistently
@@ -111,6 +500,7 @@ class CachedDocument(Generic[C]):
     async def get(
         self,
         filter_dict: Union[Dict[str, Any], Buildable, Filterable],
+        projections: Optional[Union[Dict[str, Any], Projection]] = None,
         *,
         try_convert: bool = True,
     ) -> Optional[Union[Dict[str, Any], C]]:
@@ -121,6 +511,11 @@ class CachedDocument(Generic[C]):
         Parameters
         ----------
         filter_dict: Union[Dict[str, Any], Buildable, Filterable]
+        projections: Optional[Union[Dict[str, Any], Projection]]
+            Specify the data you want returned.
+
+            These are applied to the full cached document so
+            do not require a separate cache entry.
         try_convert: bool
             See :py:class:`alaric.Document`
 
@@ -131,45 +526,207 @@ class CachedDocument(Generic[C]):
 
         Notes
         -----
-        Due to how items are stored internally,
-        filter_dict must eval to a literal str: str
-        pairing otherwise this will fall back to the DB
-
-        """
-        filter_dict: Dict[str, str] = self.document._ensure_built(filter_dict)
-        lookup_key = original_key = self._build_redis_lookup_key(filter_dict)
-
-        # If not a straight _id lookup, resolve the chain
-        # back to the raw data itself. We also assume that
-        # any lookup key which does not start with _id
-        # requires resolving back the source
-        if not lookup_key.startswith("_id:"):
-            new_lookup_key = await self._redis_client.get(lookup_key)
-            if new_lookup_key is not None:
-                # If It's None, just do the check as is and
-                # call it a day
-                lookup_key = new_lookup_key
-
-        result = await self._redis_client.get(lookup_key)
-        if result is None:
-            result = await self.document.find(filter_dict, try_convert=False)
-            if result is not None:
-                result = cast(Dict[str, Any], result)
-                await self._update_redis_cache(result)
+        Only filters which check equality against either ``_id`` or
+        one of ``extra_lookups`` can be served from Redis. I.e.
+        ``{"_id": 1}``, ``AQ(EQ("_id", 1))`` or an ``AND`` of ``EQ``'s.
 
-            log.debug("Cache miss for %s", original_key)
-        else:
-            result = orjson.loads(result)
-            log.debug("Cache hit for %s", original_key)
+        Supported values are ``str``, ``int``, ``float``, ``bool``,
+        ``ObjectId`` and ``datetime``. All other filters
+        go straight to the DB and are not cached.
+        """
+        result = await self.get_many(
+            [filter_dict], projections, try_convert=try_convert
+        )
+        return result[0]
 
-        if try_convert:
-            return await self.document._attempt_convert(result)
-        return result
+    async def get_many(
+        self,
+        filters: List[Union[Dict[str, Any], Buildable, Filterable]],
+        projections: Optional[Union[Dict[str, Any], Projection]] = None,
+        *,
+        try_convert: bool = True,
+    ) -> List[Optional[Union[Dict[str, Any], C]]]:
+        """Fetch a document for each of the provided filters.
+
+        Cached documents are fetched from Redis in a single
+        round trip with the remainder falling back to the DB.
+
+        Parameters
+        ----------
+        filters: List[Union[Dict[str, Any], Buildable, Filterable]]
+            The filters to fetch documents for.
+
+            See :py:meth:`get` for the filters Redis can serve.
+        projections: Optional[Union[Dict[str, Any], Projection]]
+            Specify the data you want returned.
+
+            These are applied to the full cached document so
+            do not require a separate cache entry.
+        try_convert: bool
+            See :py:class:`alaric.Document`
+
+        Returns
+        -------
+        List[Optional[Union[Dict[str, Any], C]]]
+            The document for each filter, in the same order as ``filters``
+        """
+        filters: List[Dict[str, Any]] = [
+            self.document._ensure_built(filter_dict) for filter_dict in filters
+        ]
+        projections = self.document._ensure_built(projections or {})
+        # Projection operators such as $slice are left to Mongo
+        local_projections = all(
+            isinstance(value, (bool, int)) for value in projections.values()
+        )
+
+        prefix = await self._get_key_prefix()
+        lookup_keys: List[Optional[str]] = []
+        cacheable: List[bool] = []
+        pointer_indexes: List[int] = []
+        pointer_lookups: Dict[int, Tuple[str, List[str]]] = {}
+        for index, filter_dict in enumerate(filters):
+            cache_key = (
+                self._build_cache_key(filter_dict) if local_projections else None
+            )
+            if cache_key is None:
+                log.debug("Filter %s cannot be served from cache", filter_dict)
+                self._record("uncacheable")
+                lookup_keys.append(None)
+                cacheable.append(False)
+                continue
+
+            key, fields = cache_key
+            lookup_keys.append(prefix + key)
+            cacheable.append(True)
+            if fields != ["_id"]:
+                pointer_indexes.append(index)
+                pointer_lookups[index] = key, fields
+
+        if pointer_indexes:
+            # Resolve lookups back to the _id key
+            # which contains the document itself
+            pointers = await self._mget(
+                [lookup_keys[index] for index in pointer_indexes]
+            )
+            for index, pointer in zip(pointer_indexes, pointers):
+                lookup_keys[index] = pointer.decode("utf-8") if pointer else None
+                if pointer:
+                    self._record("lookup_dereferences")
+
+        # Projected documents are not cached as they differ per call
+        cache_converted = (
+            try_convert
+            and not projections
+            and self._converted_cache_size > 0
+            and self.document.converter is not None
+        )
+        digests: Dict[int, bytes] = {}
+        converted: Dict[int, Any] = {}
+        results: List[Optional[Dict[str, Any]]] = [None] * len(filters)
+        cached_indexes = [
+            i
+            for i, key in enumerate(lookup_keys)
+            if key is not None and i not in pointer_lookups
+        ]
+        values = []
+        if cached_indexes:
+            values = await self._mget([lookup_keys[index] for index in cached_indexes])
+
+        # Backends may evict the set of lookups for an _id independently,
+        # so only trust lookups which the _id still lists as its own
+        indexed_lookups = [
+            index for index in pointer_indexes if lookup_keys[index] is not None
+        ]
+        values.extend(
+            await self._get_if_indexed(
+                prefix,
+                [
+                    (lookup_keys[index], prefix + pointer_lookups[index][0])
+                    for index in indexed_lookups
+                ],
+            )
+        )
+        cached_indexes.extend(indexed_lookups)
+        if cached_indexes:
+            for index, value in zip(cached_indexes, values):
+                if value is None:
+                    continue
+
+                self._record("bytes_read", len(value))
+                entry = None
+                if cache_converted:
+                    digests[index] = hashlib.blake2b(value, digest_size=16).digest()
+                    entry = self._converted_cache.get(digests[index])
+
+                if entry is None:
+                    result = self._serializer.loads(value)
+                else:
+                    self._converted_cache.move_to_end(digests[index])
+                    result, converted[index] = entry
+
+                results[index] = result
+                self._record("hits")
+                log.debug("Cache hit for %s", filters[index])
+
+        missed_indexes = [i for i, result in enumerate(results) if result is None]
+        started_at = time.perf_counter()
+        fetched = await asyncio.gather(
+            *(
+                # Cacheable documents are fetched in full so they can be cached
+                self.document.find(
+                    filters[index],
+                    None if cacheable[index] else projections,
+                    try_convert=False,
+                )
+                for index in missed_indexes
+            )
+        )
+        if missed_indexes:
+            self._record("db_fallbacks", len(missed_indexes))
+            self._record("db_fallback_seconds", time.perf_counter() - started_at)
+
+        to_cache: List[Dict[str, Any]] = []
+        for index, result in zip(missed_indexes, fetched):
+            results[index] = result
+            if not cacheable[index]:
+                continue
+
+            self._record("misses")
+            if result is None:
+                self._record("not_found")
+            else:
+                to_cache.append(result)
+                log.debug("Cache miss for %s", filters[index])
+
+        if to_cache:
+            await self._update_redis_cache_many(prefix, to_cache)
+
+        for index, result in enumerate(results):
+            if cacheable[index] and result is not None:
+                results[index] = self._apply_projections(result, projections)
+
+        if not try_convert:
+            return results
+
+        for index, result in enumerate(results):
+            if index in converted:
+                results[index] = converted[index]
+                continue
+
+            results[index] = await self.document._attempt_convert(result)
+            if index in digests:
+                self._converted_cache[digests[index]] = result, results[index]
+                if len(self._converted_cache) > self._converted_cache_size:
+                    self._converted_cache.popitem(last=False)
+
+        return results
 
     async def set(
         self,
         filter_dict: Union[Dict[str, Any], Buildable, Filterable],
         update_data: Union[Dict[str, Any], Saveable],
+        *,
+        ttl: Optional[timedelta] = None,
     ) -> None:
         """Write to Redis and the DB.
 
@@ -181,43 +738,1225 @@ class CachedDocument(Generic[C]):
         This also requires ``_id`` to be set on update_data
         in order to cache this to Redis
 
+        When ``write_behind`` is enabled the database write
+        is queued rather than awaited, see :py:meth:`flush`.
+
         Parameters
         ----------
         filter_dict: Union[Dict[str, Any], Buildable, Filterable]
         update_data: Union[Dict[str, Any], Saveable]
+        ttl: Optional[timedelta]
+            How long this document should be cached for,
+            overriding ``ttl_policy`` and ``cache_ttl``.
         """
         filter_dict = self.document._ensure_built(filter_dict)
         update_data = self.document._ensure_insertable(update_data)
         if "_id" not in update_data:
             log.warning("Failed to cache data as _id was missing: %s", update_data)
         else:
-            await self._update_redis_cache(update_data)
+            await self._update_redis_cache(update_data, ttl=ttl)
+
+        pending_key = (
+            self._build_redis_id_key("", update_data["_id"])
+            if self._write_behind and "_id" in update_data
+            else None
+        )
+        if pending_key is None:
+            await self.document.upsert(filter_dict, update_data)
+            await self._bump_query_version()
+        else:
+            await self._queue_write(pending_key, filter_dict, update_data)
+
+        if "_id" in update_data:
+            await self._publish_invalidations(ids=[update_data["_id"]])
+
+    async def flush(self) -> int:
+        """Write all queued ``write_behind`` writes to the database.
+
+        Returns
+        -------
+        int
+            How many documents were written.
+        """
+        async with self._flush_lock:
+            if not self._pending_writes:
+                return 0
+
+            pending = list(self._pending_writes.values())
+            self._pending_writes = {}
+            try:
+                await self._write_pending(pending)
+            except Exception as e:
+                log.error("Failed to flush %s queued writes: %s", len(pending), e)
+                # The cache holds values which never reached the database
+                ids = [update_data["_id"] for _, update_data in pending]
+                prefix = await self._get_key_prefix()
+                for _id in ids:
+                    await self._invalidate(prefix, _id)
+
+                await self._publish_invalidations(ids=ids)
+                if self._on_write_behind_error is not None:
+                    result = self._on_write_behind_error(
+                        e, [update_data for _, update_data in pending]
+                    )
+                    if inspect.isawaitable(result):
+                        await result
+
+                return 0
+            finally:
+                await self._bump_query_version()
+
+            log.debug("Flushed %s queued writes for %s", len(pending), self._namespace)
+            return len(pending)
+
+    async def _write_pending(
+        self, pending: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> None:
+        if type(self.document).upsert is not Document.upsert:
+            # Subclasses such as EncryptedDocument transform
+            # the data on the way in, so use their write path
+            results = await asyncio.gather(
+                *(
+                    self.document.upsert(filter_dict, update_data)
+                    for filter_dict, update_data in pending
+                ),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+
+            return
+
+        await self.document.raw_collection.bulk_write(
+            [
+                UpdateOne(filter_dict, {"$set": update_data}, upsert=True)
+                for filter_dict, update_data in pending
+            ],
+            ordered=False,
+        )
+
+    async def _queue_write(
+        self, pending_key: str, filter_dict: Dict[str, Any], update_data: Dict[str, Any]
+    ) -> None:
+        existing = self._pending_writes.get(pending_key)
+        if existing is not None:
+            # $set semantics mean later fields simply win
+            update_data = {**existing[1], **update_data}
+
+        self._pending_writes[pending_key] = (filter_dict, update_data)
+        if len(self._pending_writes) >= self._write_behind_max_pending:
+            await self.flush()
+
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        while self._pending_writes:
+            await asyncio.sleep(self._write_behind_interval)
+            try:
+                # Shielded so close() can't cancel a flush midway
+                await asyncio.shield(self.flush())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("Failed to flush queued writes: %s", e)
+
+    async def increment(
+        self,
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable],
+        field: str,
+        amount: Union[int, float],
+    ) -> Optional[Union[int, float]]:
+        """Atomically increment the provided field.
+
+        Parameters
+        ----------
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable]
+            The 'thing' we want to increment
+        field: str
+            The key for the field to increment
+        amount: Union[int, float]
+            How much to increment (or decrement) by
+
+        Returns
+        -------
+        Optional[Union[int, float]]
+            The value of the field after incrementing, or ``None`` if
+            no document matched or the field contains positional operators.
+
+
+        .. code-block:: python
+            :linenos:
+
+            # Assuming a data structure of
+            # {"_id": 1, "counter": 4}
+            await cached_document.increment({"_id": 1}, "counter", 1)
+
+            # Now looks like
+            # {"_id": 1, "counter": 5}
+
+        Notes
+        -----
+        The increment happens atomically within the database.
+        The updated document is only written back to the cache
+        while the cached copy still matches the document this increment
+        was applied to, otherwise the entry is invalidated. This stops
+        increments which finish out of order from caching an old count.
+        """
+        # Queued writes must land first or the
+        # cached copy would lose them
+        await self.flush()
+        filter_dict = self.document._ensure_built(filter_dict)
+        data: Optional[Dict[str, Any]] = (
+            await self.document.raw_collection.find_one_and_update(
+                filter_dict,
+                {"$inc": {field: amount}},
+                return_document=ReturnDocument.AFTER,
+            )
+        )
+        if data is None:
+            return None
+
+        value, previous = self._undo_increment(data, field, amount)
+        prefix = await self._get_key_prefix()
+        script_args = (
+            self._build_update_script_args(prefix, data)
+            if previous is not None
+            else None
+        )
+        if script_args is None:
+            await self._invalidate(prefix, data["_id"])
+        else:
+            keys, args = script_args
+            args.append(self._serializer.dumps(previous))
+            result = await self._call_backend(
+                lambda: self._backend.script(
+                    _COMPARE_AND_UPDATE_SCRIPT, keys=keys, args=args
+                )
+            )
+            if result is _UNAVAILABLE:
+                self._record_missed_invalidation(keys[0][len(prefix) :], data["_id"])
+
+            await self._evict_local([keys[0]])
+
+        await self._bump_query_version()
+        await self._publish_invalidations(ids=[data["_id"]])
+        return value
+
+    @staticmethod
+    def _undo_increment(
+        data: Dict[str, Any], field: str, amount: Union[int, float]
+    ) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """Returns the incremented value alongside data as it was before
+        incrementing, only copying the containers along the field path.
+
+        Both are None if the path can't be followed,
+        I.e. it contains positional operators such as ``$``.
+        """
+        *parents, name = field.split(".")
+        previous: Dict[str, Any] = dict(data)
+        container: Any = previous
+        try:
+            for part in parents:
+                key = int(part) if isinstance(container, list) else part
+                container[key] = copy.copy(container[key])
+                container = container[key]
+
+            key = int(name) if isinstance(container, list) else name
+            value = container[key]
+            container[key] = value - amount
+        except (LookupError, TypeError, ValueError):
+            return None, None
+
+        return value, previous
+
+    async def delete(
+        self,
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable],
+    ) -> Optional[DeleteResult]:
+        """Delete matching documents from the DB and Redis.
+
+        Parameters
+        ----------
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable]
+            A dictionary to use as a filter or
+            :py:class:`AQ` object.
+
+        Returns
+        -------
+        Optional[DeleteResult]
+            The result of deletion if it occurred.
+        """
+        # Otherwise queued writes could recreate deleted documents
+        await self.flush()
+        filter_dict = self.document._ensure_built(filter_dict)
+        entries: List[Dict[str, Any]] = await self.document.find_many(
+            filter_dict, projections={"_id": 1}, try_convert=False
+        )
+        result = await self.document.delete(filter_dict)
+        prefix = await self._get_key_prefix()
+        for entry in entries:
+            await self._invalidate(prefix, entry["_id"])
+
+        await self._bump_query_version()
+        await self._publish_invalidations(ids=[entry["_id"] for entry in entries])
+        return result
+
+    async def invalidate(self, _id: Any) -> None:
+        """Remove a document and all of its lookups from Redis.
+
+        The database is left untouched.
+
+        Parameters
+        ----------
+        _id: Any
+            The ``_id`` of the document to remove
+
+        Notes
+        -----
+        This also invalidates all results cached by :py:meth:`find_many`
+        """
+        # Queued writes must land first or the
+        # next read would cache stale data
+        await self.flush()
+        await self._invalidate(await self._get_key_prefix(), _id)
+        await self._bump_query_version()
+        await self._publish_invalidations(ids=[_id])
+
+    async def _invalidate(self, prefix: str, _id: Any) -> None:
+        data_id_key = self._build_redis_id_key(prefix, _id)
+        if data_id_key is None:
+            # This could never have been cached
+            return
+
+        result = await self._call_backend(
+            lambda: self._backend.script(
+                _INVALIDATE_SCRIPT,
+                keys=[data_id_key, self._build_redis_index_key(prefix, _id)],
+                args=[],
+            )
+        )
+        if result is _UNAVAILABLE:
+            self._record_missed_invalidation(data_id_key[len(prefix) :], _id)
+
+        await self._evict_local([data_id_key])
+
+    async def invalidate_all(self) -> None:
+        """Remove every document in this namespace from Redis.
+
+        The database is left untouched.
+
+        Notes
+        -----
+        This does not delete anything, instead the namespace
+        moves to a new generation of keys and entries from
+        the previous generation are left to expire.
+        """
+        await self.flush()
+        await self._bump_generation()
+
+    async def _bump_generation(self) -> None:
+        # Never flushes, as this is replayed while flush holds its lock
+        generation = await self._call_backend(
+            lambda: self._backend.incr(self._build_generation_key())
+        )
+        if generation is _UNAVAILABLE:
+            self._missed_generation_bump = True
+            return
+
+        self._generation = generation
+        self._generation_fetched_at = time.monotonic()
+        await self._publish_invalidations(generation=self._generation)
+
+    def stats(self, *, reset: bool = False) -> Dict[str, float]:
+        """Returns a snapshot of the metrics recorded by this instance.
+
+        Parameters
+        ----------
+        reset: bool
+            Set all metrics back to zero after taking the snapshot.
+
+        Returns
+        -------
+        Dict[str, float]
+            - ``hits``: Documents served from the cache
+            - ``misses``: Cacheable documents which had to be fetched from the DB
+            - ``not_found``: Misses which did not exist within the DB either
+            - ``uncacheable``: Filters which could not be served from the cache
+            - ``lookup_dereferences``: ``extra_lookups`` resolved to an ``_id``
+            - ``stale_lookups``: ``extra_lookups`` which pointed at a changed document
+            - ``query_hits``: :py:meth:`find_many` results served from the cache
+            - ``query_misses``: :py:meth:`find_many` results fetched from the DB
+            - ``db_fallbacks``: Documents and queries fetched from the DB
+            - ``db_fallback_seconds``: Total time spent waiting on DB fallbacks
+            - ``bytes_read``: Serialized bytes read from the cache
+            - ``bytes_written``: Serialized bytes written to the cache
+            - ``backend_errors``: Errors raised by the cache backend
+            - ``circuit_opens``: Times the backend was skipped due to failures
+            - ``hit_ratio``: ``hits`` divided by ``hits`` and ``misses``
+
+
+        .. code-block:: python
+            :linenos:
+
+            stats = cached_document.stats()
+            print(f"Hit ratio: {stats['hit_ratio']:.2%}")
+        """
+        snapshot = dict(self._stats)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_ratio"] = snapshot["hits"] / lookups if lookups else 0.0
+        if reset:
+            self._stats = dict.fromkeys(self._STAT_NAMES, 0)
+
+        return snapshot
+
+    def _record(self, name: str, value: float = 1) -> None:
+        self._stats[name] += value
+        if self._on_metric is not None:
+            try:
+                self._on_metric(name, value)
+            except Exception as e:
+                log.error("on_metric failed for %s: %s", name, e)
+
+    @property
+    def degraded(self) -> bool:
+        """Whether the backend is currently being
+        skipped due to ``circuit_breaker_threshold``."""
+        return (
+            self._circuit_open_until is not None
+            and time.monotonic() < self._circuit_open_until
+        )
+
+    async def _call_backend(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Call the backend, returning _UNAVAILABLE
+        if it fails while the circuit breaker is enabled"""
+        if self.degraded:
+            return _UNAVAILABLE
+
+        # Stale entries must be removed before they can be read
+        await self._replay_missed_invalidations()
+        if self.degraded:
+            return _UNAVAILABLE
+
+        try:
+            result = await asyncio.wait_for(call(), self._backend_timeout)
+        except Exception as e:
+            self._record("backend_errors")
+            if self._circuit_breaker_threshold is None:
+                raise
+
+            self._backend_failures += 1
+            if (
+                self._circuit_open_until is not None
+                or self._backend_failures >= self._circuit_breaker_threshold
+            ):
+                # Either the probe failed or we hit the threshold
+                self._circuit_open_until = (
+                    time.monotonic() + self._circuit_breaker_cooldown
+                )
+                self._record("circuit_opens")
+                log.warning(
+                    "Cache backend for %s is unavailable, serving from the "
+                    "DB for %s seconds: %s",
+                    self._namespace,
+                    self._circuit_breaker_cooldown,
+                    e,
+                )
+            else:
+                log.warning("Cache backend call failed: %s", e)
+
+            return _UNAVAILABLE
+
+        self._backend_failures = 0
+        if self._circuit_open_until is not None:
+            self._circuit_open_until = None
+            log.info("Cache backend for %s has recovered", self._namespace)
+
+        return result
+
+    def _record_missed_invalidation(self, key: str, _id: Any) -> None:
+        """Remember an entry to invalidate once the backend is reachable"""
+        if self._missed_generation_bump:
+            # Every entry is discarded by the bump anyway
+            return
+
+        self._missed_invalidations[key] = _id
+        if len(self._missed_invalidations) > _MAX_MISSED_INVALIDATIONS:
+            self._missed_invalidations = {}
+            self._missed_generation_bump = True
+
+    async def _replay_missed_invalidations(self) -> None:
+        """Apply changes which were made while the backend was unavailable"""
+        if self._replaying_invalidations or not (
+            self._missed_invalidations
+            or self._missed_generation_bump
+            or self._missed_query_version_bump
+        ):
+            return
+
+        self._replaying_invalidations = True
+        try:
+            if self._missed_generation_bump:
+                self._missed_generation_bump = False
+                self._missed_invalidations = {}
+                await self._bump_generation()
+
+            missed, self._missed_invalidations = self._missed_invalidations, {}
+            if missed:
+                prefix = await self._get_key_prefix()
+                for _id in missed.values():
+                    await self._invalidate(prefix, _id)
+
+                log.info("Invalidated %s entries missed by the cache", len(missed))
+
+            if self._missed_query_version_bump:
+                self._missed_query_version_bump = False
+                await self._bump_query_version()
+        finally:
+            self._replaying_invalidations = False
+
+    async def close(self) -> None:
+        """Stop listening for changes made by other processes
+        and flush any writes queued by ``write_behind``.
+
+        Only required when ``invalidation_bus``
+        or ``write_behind`` is enabled.
+        """
+        if self._flusher is not None:
+            self._flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flusher
+
+            self._flusher = None
+
+        await self.flush()
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe()
+            await self._pubsub.aclose()
+
+        self._listener = None
+        self._pubsub = None
+
+    async def _mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Fetch keys from the local cache, falling back to the backend"""
+        if self._local_cache is not None:
+            await self._ensure_listening()
+
+        # Local entries can't be evicted by other processes until subscribed
+        if self._local_cache is None or (
+            self._invalidation_bus and self._pubsub is None
+        ):
+            values = await self._call_backend(lambda: self._backend.mget(keys))
+            return [None] * len(keys) if values is _UNAVAILABLE else values
+
+        values = await self._local_cache.mget(keys)
+        missing = [index for index, value in enumerate(values) if value is None]
+        if not missing:
+            return values
+
+        evictions = self._local_evictions
+        fetched = await self._call_backend(
+            lambda: self._backend.mget([keys[index] for index in missing])
+        )
+        if fetched is _UNAVAILABLE:
+            return values
+
+        pipe = self._local_cache.pipeline()
+        for index, value in zip(missing, fetched):
+            values[index] = value
+            if value is not None:
+                pipe.set(keys[index], value, self._local_cache_ttl)
+
+        if evictions == self._local_evictions:
+            await pipe.execute()
+
+        return values
+
+    async def _get_if_indexed(
+        self, prefix: str, entries: List[Tuple[str, str]]
+    ) -> List[Optional[bytes]]:
+        """Fetch each _id key if the lookup key which resolved
+        to it is still within that _id's set of lookups"""
+        if not entries:
+            return []
+
+        pipe = self._backend.pipeline()
+        for id_key, lookup_key in entries:
+            # Pointers are written alongside the lookup key so share its prefix
+            index_key = f"{prefix}$lookups:{id_key[len(prefix):]}"
+            pipe.script(
+                _GET_IF_INDEXED_SCRIPT, keys=[id_key, index_key], args=[lookup_key]
+            )
+
+        results = await self._call_backend(pipe.execute)
+        if results is _UNAVAILABLE:
+            return [None] * len(entries)
+
+        values: List[Optional[bytes]] = []
+        for result in results:
+            if not result[0]:
+                self._record("stale_lookups")
+                values.append(None)
+            else:
+                values.append(result[1])
+
+        return values
+
+    async def _evict_local(self, keys: List[str]) -> None:
+        if self._local_cache is None or not keys:
+            return
+
+        self._local_evictions += 1
+        await self._local_cache.delete(*keys)
+
+    def _build_invalidation_channel(self) -> str:
+        return f"{self._namespace}:$invalidations"
+
+    async def _publish_invalidations(
+        self, *, ids: Optional[List[Any]] = None, generation: Optional[int] = None
+    ) -> None:
+        """Tell other processes to evict entries from their local cache"""
+        if not self._invalidation_bus:
+            return
+
+        payload: Dict[str, Any] = {}
+        if ids:
+            # Keys are sent without a prefix as the
+            # generation may differ between processes
+            keys = [self._build_redis_id_key("", _id) for _id in ids]
+            payload["keys"] = [key for key in keys if key is not None]
+
+        if generation is not None:
+            payload["generation"] = generation
+
+        if payload.get("keys") or "generation" in payload:
+            # Other processes fall back to local_cache_ttl if this fails
+            await self._call_backend(
+                lambda: self._redis_client.publish(
+                    self._build_invalidation_channel(), orjson.dumps(payload)
+                )
+            )
+
+    async def _ensure_listening(self) -> None:
+        if not self._invalidation_bus or self._listener is not None:
+            return
+
+        if await self._subscribe():
+            self._listener = asyncio.create_task(self._listen_for_invalidations())
+        else:
+            self._listener = asyncio.create_task(self._subscribe_and_listen())
+
+    async def _subscribe(self) -> bool:
+        """Subscribe to the invalidation channel,
+        returning False if the backend is unavailable"""
+        pubsub = self._redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            result = await self._call_backend(
+                lambda: pubsub.subscribe(self._build_invalidation_channel())
+            )
+        except Exception:
+            await pubsub.aclose()
+            raise
+
+        if result is _UNAVAILABLE:
+            await pubsub.aclose()
+            return False
+
+        self._pubsub = pubsub
+        return True
+
+    async def _subscribe_and_listen(self) -> None:
+        # The local cache is bypassed until this succeeds
+        while True:
+            await asyncio.sleep(self._circuit_breaker_cooldown)
+            try:
+                if await self._subscribe():
+                    break
+            except Exception as e:
+                log.error("Failed to subscribe to cache invalidations: %s", e)
+
+        log.info("Subscribed to cache invalidations for %s", self._namespace)
+        await self._listen_for_invalidations()
+
+    async def _listen_for_invalidations(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+
+                # Drain everything already received so
+                # bursts of changes are evicted at once
+                messages = [message]
+                while True:
+                    message = await self._pubsub.get_message(timeout=0)
+                    if message is None:
+                        break
+
+                    messages.append(message)
+
+                await self._handle_invalidations(messages)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries still expire after local_cache_ttl
+                log.error("Failed to process cache invalidations: %s", e)
+                await asyncio.sleep(1)
+
+    async def _handle_invalidations(self, messages: List[Dict[str, Any]]) -> None:
+        keys = set()
+        generation: Optional[int] = None
+        for message in messages:
+            payload = orjson.loads(message["data"])
+            keys.update(payload.get("keys", []))
+            if "generation" in payload:
+                generation = max(generation or 0, payload["generation"])
+
+        if generation is not None and generation > self._generation:
+            self._generation = generation
+            self._generation_fetched_at = time.monotonic()
+
+        if keys:
+            prefix = await self._get_key_prefix()
+            await self._evict_local([prefix + key for key in keys])
+            log.debug("Evicted %s locally cached entries", len(keys))
+
+    async def _get_key_prefix(self) -> str:
+        """Returns the prefix for all keys in the current generation"""
+        now = time.monotonic()
+        if (
+            self._generation_fetched_at is None
+            or now - self._generation_fetched_at >= self._generation_refresh_interval
+        ):
+            generation = await self._call_backend(
+                lambda: self._backend.get(self._build_generation_key())
+            )
+            if generation is not _UNAVAILABLE:
+                self._generation = int(generation) if generation is not None else 0
+                self._generation_fetched_at = now
+
+        return f"{self._namespace}:{self._generation}:"
+
+    def _build_generation_key(self) -> str:
+        return f"{self._namespace}:$generation"
+
+    async def _bump_query_version(self) -> None:
+        """Invalidates all results cached by find_many"""
+        prefix = await self._get_key_prefix()
+        # A unique version rather than a counter means the key can
+        # safely expire without old query results becoming reachable.
+        # It outlives every result cached under it so versions
+        # are never reused while those results still exist
+        result = await self._call_backend(
+            lambda: self._backend.set(
+                self._build_query_version_key(prefix),
+                str(time.time_ns()),
+                (self._cache_ttl + self._ttl_jitter) * 2,
+            )
+        )
+        if result is _UNAVAILABLE:
+            self._missed_query_version_bump = True
+
+    @staticmethod
+    def _build_query_version_key(prefix: str) -> str:
+        return f"{prefix}$query_version"
+
+    @classmethod
+    def _canonicalise(cls, value: Any) -> Any:
+        """Returns a representation of value which is independent
+        of dictionary ordering while retaining value types"""
+        if isinstance(value, dict):
+            return tuple(
+                sorted((key, cls._canonicalise(item)) for key, item in value.items())
+            )
+
+        if isinstance(value, (list, tuple)):
+            return [cls._canonicalise(item) for item in value]
+
+        return value
 
-        await self.document.upsert(filter_dict, update_data)
+    async def find_many(
+        self,
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable],
+        projections: Optional[Union[Dict[str, Any], Projection]] = None,
+        *,
+        sort: Optional[Union[List[Tuple[str, Any]], Tuple[str, Any]]] = None,
+        limit: int = 0,
+        try_convert: bool = True,
+    ) -> List[Union[Dict[str, Any], C]]:
+        """Find and return all items matching the given filter.
+
+        The result of the query is cached as a whole, and
+        is invalidated whenever a document is modified via
+        :py:meth:`set`, :py:meth:`delete` or :py:meth:`invalidate`.
+
+        Parameters
+        ----------
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable]
+            A dictionary to use as a filter or
+            :py:class:`AQ` object.
+        projections: Optional[Union[Dict[str, Any], Projection]]
+            Specify the data you want
+            returned from matching queries.
+        sort: Optional[Union[List[Tuple[str, Any]], Tuple[str, Any]]]
+            The order to sort by, see :py:meth:`alaric.Cursor.set_sort`
+        limit: int
+            How many documents should be returned.
+
+            Defaults to no limit.
+        try_convert: bool
+            See :py:class:`alaric.Document`
+
+        Returns
+        -------
+        List[Union[Dict[str, Any], C]]
+            The data fetched from either Redis or your DB
+
+        Notes
+        -----
+        Changes made to the database without going through this
+        class are not seen until the cached result expires.
+
+
+        .. code-block:: python
+            :linenos:
+
+            # The top 10 users by score
+            leaderboard = await cached_document.find_many(
+                All(), sort=("score", alaric.Descending), limit=10
+            )
+        """
+        cursor = (
+            Cursor(self.document.raw_collection)
+            .set_filter(filter_dict)
+            .set_projections(projections)
+            .set_sort(sort)
+            .set_limit(limit)
+        )
+        query = (cursor._filter, cursor._projections, cursor._sort, cursor._limit)
+        digest = hashlib.sha1(
+            repr(self._canonicalise(query)).encode("utf-8")
+        ).hexdigest()
 
-    async def _update_redis_cache(self, data: Dict[str, Any]):
+        prefix = await self._get_key_prefix()
+        query_key: Optional[str] = None
+        result = None
+        version = await self._call_backend(
+            lambda: self._backend.get(self._build_query_version_key(prefix))
+        )
+        if version is not _UNAVAILABLE:
+            query_key = f"{prefix}$query:{int(version or 0)}:{digest}"
+            result = await self._call_backend(lambda: self._backend.get(query_key))
+
+        if result is None or result is _UNAVAILABLE:
+            started_at = time.perf_counter()
+            result = await cursor.execute()
+            self._record("db_fallbacks")
+            self._record("db_fallback_seconds", time.perf_counter() - started_at)
+            data = self._serializer.dumps({"results": result})
+            self._record("bytes_written", len(data))
+            if query_key is not None:
+                await self._call_backend(
+                    lambda: self._backend.set(query_key, data, self._get_ttl())
+                )
+
+            self._record("query_misses")
+            log.debug("Cache miss for query %s", digest)
+        else:
+            self._record("bytes_read", len(result))
+            result = self._serializer.loads(result)["results"]
+            self._record("query_hits")
+            log.debug("Cache hit for query %s", digest)
+
+        if try_convert:
+            return await self.document._attempt_convert(result)
+        return result
+
+    async def warm(
+        self,
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable] = All(),
+        *,
+        batch_size: int = 500,
+        concurrency: int = 4,
+        rate_limit: Optional[float] = None,
+        on_progress: Optional[Callable[[int], Any]] = None,
+    ) -> int:
+        """Populate Redis with documents from the database.
+
+        Useful for avoiding a flood of cache misses against
+        a cold Redis instance, I.e. after a deployment.
+
+        Parameters
+        ----------
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable]
+            Which documents to load into Redis.
+
+            Defaults to all documents.
+        batch_size: int
+            How many documents to write to Redis per round trip.
+        concurrency: int
+            The maximum amount of batches being written at once.
+        rate_limit: Optional[float]
+            The maximum amount of documents to warm per second
+            in order to leave capacity for live traffic.
+
+            Defaults to no limit.
+        on_progress: Optional[Callable[[int], Any]]
+            Called with the total amount of documents
+            warmed so far after every batch is written.
+
+        Returns
+        -------
+        int
+            How many documents were written to Redis.
+
+
+        .. code-block:: python
+            :linenos:
+
+            # Warm the 10,000 documents per second
+            await cached_document.warm(rate_limit=10_000)
+        """
+        if batch_size < 1 or concurrency < 1:
+            raise ValueError("batch_size and concurrency must be positive numbers")
+
+        filter_dict = self.document._ensure_built(filter_dict)
+        prefix = await self._get_key_prefix()
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks: List[asyncio.Task] = []
+        warmed = 0
+        started_at = time.monotonic()
+
+        async def write_batch(batch: List[Dict[str, Any]]) -> None:
+            nonlocal warmed
+            try:
+                if not await self._update_redis_cache_many(prefix, batch):
+                    return
+
+                warmed += len(batch)
+                log.debug("Warmed %s documents for %s", warmed, self._namespace)
+                if on_progress is not None:
+                    on_progress(warmed)
+            finally:
+                semaphore.release()
+
+        async def dispatch(batch: List[Dict[str, Any]], queued: int) -> None:
+            if rate_limit is not None:
+                # Pace batches so we never get ahead of the rate limit
+                ahead_by = queued / rate_limit - (time.monotonic() - started_at)
+                if ahead_by > 0:
+                    await asyncio.sleep(ahead_by)
+
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(write_batch(batch)))
+
+        queued = 0
+        batch: List[Dict[str, Any]] = []
+        try:
+            async for entry in self.document.raw_collection.find(
+                filter_dict, batch_size=batch_size
+            ):
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    queued += len(batch)
+                    await dispatch(batch, queued)
+                    batch = []
+
+            if batch:
+                queued += len(batch)
+                await dispatch(batch, queued)
+        finally:
+            await asyncio.gather(*tasks)
+
+        return warmed
+
+    async def _update_redis_cache(
+        self, data: Dict[str, Any], *, ttl: Optional[timedelta] = None
+    ):
         """Updates the redis cache data entries"""
+        prefix = await self._get_key_prefix()
+        script_args = self._build_update_script_args(prefix, data, ttl=ttl)
+        if script_args is None:
+            log.debug("Failed to cache data as _id is not cacheable: %s", data)
+            return
+
+        keys, args = script_args
+        result = await self._call_backend(
+            lambda: self._backend.script(_UPDATE_SCRIPT, keys=keys, args=args)
+        )
+        if result is _UNAVAILABLE:
+            # The old entry may still be cached
+            self._record_missed_invalidation(keys[0][len(prefix) :], data["_id"])
+
+        # Evicted afterwards so concurrent reads can't repopulate old data
+        await self._evict_local([keys[0]])
+
+    async def _update_redis_cache_many(
+        self, prefix: str, entries: List[Dict[str, Any]]
+    ) -> bool:
+        """Updates the redis cache data entries in a single round trip"""
+        pipe = self._backend.pipeline()
+        id_keys: List[str] = []
+        for entry in entries:
+            script_args = self._build_update_script_args(prefix, entry)
+            if script_args is None:
+                continue
+
+            keys, args = script_args
+            id_keys.append(keys[0])
+            pipe.script(_UPDATE_SCRIPT, keys=keys, args=args)
+
+        if await self._call_backend(pipe.execute) is _UNAVAILABLE:
+            return False
+
+        await self._evict_local(id_keys)
+        return True
+
+    def _build_update_script_args(
+        self, prefix: str, data: Dict[str, Any], *, ttl: Optional[timedelta] = None
+    ) -> Optional[Tuple[List[str], List[Any]]]:
+        """Build the keys and args required to cache the provided data"""
         assert "_id" in data
-        data_id = data["_id"]
-        data_id_key = f"_id:{data_id}|"
-        data_str = orjson.dumps(data)
-        await self._redis_client.setex(data_id_key, self._cache_ttl, data_str)
+        data_id_key = self._build_redis_id_key(prefix, data["_id"])
+        if data_id_key is None:
+            return None
 
+        data_str = self._serializer.dumps(data)
+        self._record("bytes_written", len(data_str))
+        lookup_keys: List[str] = []
         for lookup_entry in self._extra_lookups:
-            key = io.StringIO()
-            for item in lookup_entry:
-                key.write(f"{item}:{data[item]}|")
+            if any(item not in data for item in lookup_entry):
+                continue
 
-            await self._redis_client.setex(key.getvalue(), self._cache_ttl, data_id_key)
+            key = self._build_redis_lookup_key(
+                {item: data[item] for item in lookup_entry}
+            )
+            if key is not None:
+                lookup_keys.append(prefix + key)
 
-    @staticmethod
-    def _build_redis_lookup_key(filter_dict: Dict[str, str]) -> str:
-        """Given a dict, build the redis lookup key"""
+        keys = [
+            data_id_key,
+            self._build_redis_index_key(prefix, data["_id"]),
+            *lookup_keys,
+        ]
+        ttl = self._get_ttl(data, ttl)
+        return keys, [int(ttl.total_seconds() * 1000), data_str]
+
+    def _get_ttl(
+        self, data: Optional[Dict[str, Any]] = None, ttl: Optional[timedelta] = None
+    ) -> timedelta:
+        """Returns the TTL for an entry, including jitter"""
+        if ttl is None and data is not None and self._ttl_policy is not None:
+            ttl = self._ttl_policy(data)
+
+        if ttl is None:
+            ttl = self._cache_ttl
+
+        if self._ttl_jitter:
+            ttl += self._ttl_jitter * random.random()
+
+        return ttl
+
+    def _build_cache_key(
+        self, filter_dict: Dict[str, Any]
+    ) -> Optional[Tuple[str, List[str]]]:
+        """Given a filter, build the key which can serve it
+
+        Returns the key and the sorted fields it is built from,
+        or None if this filter cannot be served from the cache.
+        """
+        fields = self._normalise_filter(filter_dict)
+        if fields is None:
+            return None
+
+        field_names = sorted(fields)
+        if field_names != ["_id"] and field_names not in self._extra_lookups:
+            return None
+
+        key = self._build_redis_lookup_key(fields)
+        if key is None:
+            return None
+
+        return key, field_names
+
+    @classmethod
+    def _apply_projections(
+        cls, data: Dict[str, Any], projections: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Apply a Mongo projection to a document"""
+        if not projections:
+            return data
+
+        fields = {k: bool(v) for k, v in projections.items() if k != "_id"}
+        if fields:
+            inclusive = any(fields.values())
+            if inclusive and not all(fields.values()):
+                raise ValueError("Cannot mix inclusion and exclusion in projections")
+        else:
+            inclusive = bool(projections["_id"])
+
+        if inclusive:
+            result = {}
+            if "_id" in data:
+                result["_id"] = data["_id"]
+
+            for field in fields:
+                cls._copy_path(data, result, field.split("."))
+        else:
+            result = dict(data)
+            for field in fields:
+                cls._remove_path(result, field.split("."))
+
+        if not projections.get("_id", True):
+            result.pop("_id", None)
+
+        return result
+
+    @classmethod
+    def _copy_path(cls, source: Dict, target: Dict, path: List[str]) -> None:
+        head, rest = path[0], path[1:]
+        if head not in source:
+            return
+
+        value = source[head]
+        if not rest:
+            target[head] = value
+
+        elif isinstance(value, dict):
+            cls._copy_path(value, target.setdefault(head, {}), rest)
+
+        elif isinstance(value, list):
+            # Mongo projects into each embedded document of an array
+            sources = [item for item in value if isinstance(item, dict)]
+            targets = target.setdefault(head, [{} for _ in sources])
+            for item, item_target in zip(sources, targets):
+                cls._copy_path(item, item_target, rest)
+
+    @classmethod
+    def _remove_path(cls, data: Dict, path: List[str]) -> None:
+        head, rest = path[0], path[1:]
+        if head not in data:
+            return
+
+        if not rest:
+            del data[head]
+            return
+
+        # Copy containers before modifying them so the
+        # original document is never changed
+        value = data[head]
+        if isinstance(value, dict):
+            data[head] = dict(value)
+            cls._remove_path(data[head], rest)
+
+        elif isinstance(value, list):
+            data[head] = [dict(i) if isinstance(i, dict) else i for i in value]
+            for item in data[head]:
+                if isinstance(item, dict):
+                    cls._remove_path(item, rest)
+
+    @classmethod
+    def _build_redis_id_key(cls, prefix: str, _id: Any) -> Optional[str]:
+        """Given a documents _id, build the redis key it is stored under"""
+        key = cls._build_redis_lookup_key({"_id": _id})
+        return prefix + key if key is not None else None
+
+    @classmethod
+    def _build_redis_index_key(cls, prefix: str, _id: Any) -> str:
+        """Given a documents _id, build the key of the set
+        containing all lookup keys which point to it"""
+        # Mongo reserves field names starting with $ so
+        # this can never collide with a lookup key
+        return f"{prefix}$lookups:{cls._build_redis_lookup_key({'_id': _id})}"
+
+    @classmethod
+    def _build_redis_lookup_key(cls, fields: Dict[str, Any]) -> Optional[str]:
+        """Given a dict, build the redis lookup key
+
+        Returns None if any of the values cannot be used within a key
+        """
         # Redis key format
-        # field_name:field_value|
+        # field_name:type:field_value|
         # The key should contain a trailing pipe
         result = io.StringIO()
-        for key in sorted(filter_dict.keys()):
-            result.write(f"{key}:{filter_dict[key]}|")
+        for key in sorted(fields.keys()):
+            value = cls._encode_key_value(fields[key])
+            if value is None:
+                return None
+
+            result.write(f"{key}:{value}|")
 
         return result.getvalue()
+
+    @staticmethod
+    def _encode_key_value(value: Any) -> Optional[str]:
+        """Encode a value alongside its type for usage within a key"""
+        # bool must come before int as it is a subclass of int
+        if isinstance(value, bool):
+            return f"b:{int(value)}"
+
+        if isinstance(value, (int, float)):
+            # Mongo considers 1 and 1.0 to be equal
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+
+            return f"n:{value}"
+
+        if isinstance(value, str):
+            # Escape pipes so values can't be mistaken for the next field
+            return "s:" + value.replace("\\", "\\\\").replace("|", "\\|")
+
+        if isinstance(value, ObjectId):
+            return f"o:{value}"
+
+        if isinstance(value, datetime.datetime):
+            return f"d:{value.isoformat()}"
+
+        return None
+
+    @classmethod
+    def _normalise_filter(cls, filter_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Reduce a filter made up purely of equality checks to
+        a dict of field to value, returning None for any other filter"""
+        fields: Dict[str, Any] = {}
+        for key, value in filter_dict.items():
+            if key == "$and":
+                if not isinstance(value, list) or not value:
+                    return None
+
+                entries = [
+                    cls._normalise_filter(entry) if isinstance(entry, dict) else None
+                    for entry in value
+                ]
+
+            elif key.startswith("$"):
+                return None
+
+            else:
+                if isinstance(value, dict):
+                    if list(value) != ["$eq"]:
+                        return None
+
+                    value = value["$eq"]
+
+                entries = [{key: value}]
+
+            for entry in entries:
+                if entry is None:
+                    return None
+
+                for field, item in entry.items():
+                    if field in fields and cls._encode_key_value(
+                        fields[field]
+                    ) != cls._encode_key_value(item):
+                        return None
+
+                    fields[field] = item
+
+        return fields
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import datetime
+from concurrent.futures import Executor
 from typing import (
     TYPE_CHECKING,
     Optional,
@@ -17,7 +17,16 @@ from typing import (
 from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorCursor
 
 from alaric.abc import Buildable, Filterable
-from alaric.encryption import EncryptedFields, AutomaticHashedFields
+from alaric.encryption import (
+    EncryptedFields,
+    AutomaticHashedFields,
+    DeterministicEncryptedFields,
+    PrefixIndexedFields,
+)
+from alaric.encryption.ciphertext import aes_decrypt, siv_decrypt
+from alaric.encryption.executor import _map_in_executor
+from alaric.encryption.keys import key_id
+from alaric.encryption.versions import SIV_VERSION
 from alaric.meta import All
 from alaric.projections import Projection
 
@@ -30,6 +39,17 @@ C = TypeVar("C")
 
 # noinspection DuplicatedCode
 class Cursor:
+    # The attributes required to decrypt
+    # data when running within an executor
+    _CRYPTO_ATTRIBUTES = (
+        "_encryption_key",
+        "_previous_encryption_keys",
+        "_encrypted_fields",
+        "_deterministic_encrypted_fields",
+        "_automatic_hashed_fields",
+        "_prefix_indexed_fields",
+    )
+
     def __init__(
         self,
         collection: AsyncIOMotorCollection,
@@ -38,6 +58,11 @@ class Cursor:
         encryption_key: Optional[bytes] = None,
         encrypted_fields: Optional[EncryptedFields] = None,
         automatic_hashed_fields: Optional[AutomaticHashedFields] = None,
+        executor: Optional[Executor] = None,
+        parallel_threshold: int = 1000,
+        deterministic_encrypted_fields: Optional[DeterministicEncryptedFields] = None,
+        previous_encryption_keys: Optional[List[bytes]] = None,
+        prefix_indexed_fields: Optional[PrefixIndexedFields] = None,
     ):
         """
 
@@ -57,6 +82,20 @@ class Cursor:
             A list of fields to create an additional column in
             the db for with a hashed variant without exposing
             the hashed data to the end user.
+        executor: Optional[concurrent.futures.Executor]
+            Decrypt large results within this executor
+            rather than blocking the event loop.
+
+            Process pools must be created using
+            :py:meth:`alaric.EncryptedDocument.create_process_pool`.
+        parallel_threshold: int
+            Results smaller than this many documents are decrypted inline.
+        deterministic_encrypted_fields: Optional[DeterministicEncryptedFields]
+            A list of fields to AES-SIV decrypt when encountered
+        previous_encryption_keys: Optional[List[bytes]]
+            Keys which were previously used as the ``encryption_key``
+        prefix_indexed_fields: Optional[PrefixIndexedFields]
+            A list of fields whose prefix index should be removed
 
         Notes
         -----
@@ -70,7 +109,7 @@ class Cursor:
         self._cursor: Optional[AsyncIOMotorCursor] = None
         self._converter: Optional[Type[C]] = converter
 
-        if encrypted_fields and not encryption_key:
+        if (encrypted_fields or deterministic_encrypted_fields) and not encryption_key:
             raise ValueError(
                 "You must set both encryption options to use encryption features."
             )
@@ -78,12 +117,27 @@ class Cursor:
         self._encrypted_fields: EncryptedFields = (
             encrypted_fields if encrypted_fields is not None else EncryptedFields()
         )
+        self._deterministic_encrypted_fields: DeterministicEncryptedFields = (
+            deterministic_encrypted_fields
+            if deterministic_encrypted_fields is not None
+            else DeterministicEncryptedFields()
+        )
         self._automatic_hashed_fields: AutomaticHashedFields = (
             automatic_hashed_fields
             if automatic_hashed_fields is not None
             else AutomaticHashedFields()
         )
+        self._prefix_indexed_fields: PrefixIndexedFields = (
+            prefix_indexed_fields
+            if prefix_indexed_fields is not None
+            else PrefixIndexedFields()
+        )
         self._encryption_key = encryption_key
+        self._previous_encryption_keys: Dict[bytes, bytes] = {
+            key_id(key): key for key in previous_encryption_keys or []
+        }
+        self._executor: Optional[Executor] = executor
+        self._parallel_threshold: int = parallel_threshold
 
     @classmethod
     def from_document(cls, document: Document) -> Cursor:
@@ -289,10 +343,7 @@ class Cursor:
 
         if not self._converter:
             if isinstance(data, list):
-                out = []
-                for itr in data:
-                    out.append(self._decrypt_data(itr))
-                return out
+                return await self._decrypt_many(data)
 
             return self._decrypt_data(data)
 
@@ -300,61 +351,49 @@ class Cursor:
             return self._converter(**self._decrypt_data(data))
 
         new_data = []
-        for d in data:
-            new_data.append(self._converter(**self._decrypt_data(d)))
+        for d in await self._decrypt_many(data):
+            new_data.append(self._converter(**d))
 
         return new_data
 
+    async def _decrypt_many(self, data: List[Dict]) -> List[Dict]:
+        if (
+            self._executor is None
+            or not (
+                self._encrypted_fields.fields
+                or self._deterministic_encrypted_fields.fields
+            )
+            or len(data) < self._parallel_threshold
+        ):
+            return [self._decrypt_data(d) for d in data]
+
+        return await _map_in_executor(
+            self._executor, self, self._CRYPTO_ATTRIBUTES, "_decrypt_data", data
+        )
+
     # Copied from EncryptedDocument
     def _decrypt_data(self, data: Dict) -> Dict:
         decrypted_fields = {}
         for ktr in [f"{k}_hashed" for k in self._automatic_hashed_fields]:
             data.pop(ktr, None)
 
+        for ktr in [f"{k}_prefixes" for k in self._prefix_indexed_fields]:
+            data.pop(ktr, None)
+
         for k, v in data.items():
-            if k in self._encrypted_fields:
+            if k in self._encrypted_fields or k in self._deterministic_encrypted_fields:
                 try:
-                    v = self._aes_decrypt_field(bytes.fromhex(v))
+                    if isinstance(v, bytes) and v[0] == SIV_VERSION:
+                        v = siv_decrypt(
+                            v, k, self._encryption_key, self._previous_encryption_keys
+                        )
+                    else:
+                        v = aes_decrypt(
+                            v, self._encryption_key, self._previous_encryption_keys
+                        )
                 except ValueError:
                     raise ValueError("Invalid encryption_key in use for this data.")
 
             decrypted_fields[k] = v
 
         return decrypted_fields
-
-    def _aes_decrypt_field(self, value: bytes):
-        def extract_list(data) -> List:
-            import orjson
-
-            inner = orjson.loads(bytes.fromhex(data))
-            return inner["list"]
-
-        def extract_dict(data):
-            import orjson
-
-            return orjson.loads(bytes.fromhex(data))
-
-        def extract_bool(data):
-            return True if data == "1" else False
-
-        # Whitelist types
-        mappings = {
-            "str": str,
-            "int": int,
-            "float": float,
-            "bool": extract_bool,
-            "dict": extract_dict,
-            "list": extract_list,
-            "datetime": datetime.datetime.fromisoformat,
-        }
-        nonce = value[:16]
-        tag = value[16:32]
-        ciphertext = value[32:]
-        from Crypto.Cipher import AES
-
-        cipher = AES.new(self._encryption_key, AES.MODE_GCM, nonce)
-        text = cipher.decrypt_and_verify(ciphertext, tag)
-        text = text.decode("utf-8")
-        _type = text[:9].split("|")[0].strip()
-        content = text[9:]
-        return mappings[_type](content)
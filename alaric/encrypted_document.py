@@ -1,32 +1,96 @@
-import datetime
+import asyncio
+import copy
+import functools
 import logging
 import secrets
-from typing import List, Dict, Optional, Union, Any, Type, TYPE_CHECKING
+from concurrent.futures import Executor, ProcessPoolExecutor
+from collections import OrderedDict
+from typing import (
+    List,
+    Dict,
+    Optional,
+    Union,
+    Any,
+    Type,
+    FrozenSet,
+    Tuple,
+)
 
 import bson
-import orjson
 from Crypto.Cipher import AES
 from bson import ObjectId
+from pymongo import ReplaceOne
 from pymongo.results import DeleteResult
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from alaric import Document, util
-from alaric.abc import Buildable, Filterable, Saveable
+from alaric import Document
+from alaric.advanced_query import AQ
+from alaric.abc import Buildable, Filterable, Hasher, Saveable
+from alaric.comparison import EQ, IN, Exists
 from alaric.encryption import (
+    DeterministicEncryptedFields,
     EncryptedFields,
     HashedFields,
     IgnoreFields,
     AutomaticHashedFields,
+    EncryptedPrefix,
+    HashedQueryField,
+    LazyDecryptedDocument,
+    PrefixIndexedFields,
 )
+from alaric.encryption.blind_index import normalise, prefix_token, prefix_tokens
+from alaric.encryption.ciphertext import aes_decrypt, siv_decrypt
+from alaric.encryption.encoding import encode_plaintext
+from alaric.encryption.executor import _initialise_worker, _map_in_executor
+from alaric.encryption.keys import key_id
+from alaric.encryption.siv import derive_siv_key
+from alaric.encryption.versions import GCM_VERSION, SIV_VERSION
+from alaric.hashers import SHA512Hasher
+from alaric.logical import AND, NOT, OR
+from alaric.meta import Negate
 from alaric.projections import Projection, Show
 from alaric.document import T
 
 log = logging.getLogger(__name__)
 
+# Actions within a field plan
+_PASS = 0
+_ENCRYPT = 1
+_DECRYPT = 2
+_HASH = 3
+_NESTED = 4
+_DROP = 5
+_ENCRYPT_DETERMINISTIC = 6
+# The action alongside the hashed and prefix columns to create, if any
+_PlanEntry = Tuple[int, Optional[str], Optional[str]]
+
+_LOGICAL_OPERATORS = {AND: "$and", OR: "$or", NOT: "$not"}
+
 
 # noinspection DuplicatedCode
 class EncryptedDocument(Document):
     _version = 1
+    # The attributes required to encrypt and decrypt
+    # data when running within an executor
+    _CRYPTO_ATTRIBUTES = (
+        "_encryption_key",
+        "_previous_encryption_keys",
+        "_hasher",
+        "_hashed_fields",
+        "_automatic_hashed_fields",
+        "_prefix_indexed_fields",
+        "_encrypted_fields",
+        "_deterministic_encrypted_fields",
+        "_encrypt_all_fields",
+        "_lazy_decryption",
+        "_plan_cache_size",
+    )
+    # Where rotate_key stores its progress
+    _KEY_ROTATION_COLLECTION = "alaric_key_rotations"
+    # How many times rotate_key attempts documents which change while rotating
+    _KEY_ROTATION_ATTEMPTS = 3
+    # The user defined BSON binary subtype ciphertext is stored as
+    _CIPHERTEXT_SUBTYPE = 0x80
 
     def __init__(
         self,
@@ -39,6 +103,14 @@ class EncryptedDocument(Document):
         encrypted_fields: Optional[EncryptedFields] = None,
         converter: Optional[Type[T]] = None,
         encrypt_all_fields: bool = False,
+        executor: Optional[Executor] = None,
+        parallel_threshold: int = 1000,
+        lazy_decryption: bool = False,
+        plan_cache_size: int = 128,
+        hasher: Optional[Hasher] = None,
+        deterministic_encrypted_fields: Optional[DeterministicEncryptedFields] = None,
+        previous_encryption_keys: Optional[List[bytes]] = None,
+        prefix_indexed_fields: Optional[PrefixIndexedFields] = None,
     ):
         """
         Parameters
@@ -50,7 +122,7 @@ class EncryptedDocument(Document):
         encryption_key: bytes
             The key to use for AES encryption
         hashed_fields: Optional[HashedFields]
-            A list of fields to SHA512 hash when encountered
+            A list of fields to hash when encountered
         automatic_hashed_fields: Optional[AutomaticHashedFields]
             A list of fields to create an additional column in
             the db for with a hashed variant without exposing
@@ -66,7 +138,45 @@ class EncryptedDocument(Document):
             `hashed_fields` and `encrypted_fields` options.
 
             This option respects ignored fields.
-
+        executor: Optional[concurrent.futures.Executor]
+            Encrypt and decrypt large batches of documents
+            within this executor rather than blocking the event loop.
+
+            Process pools must be created using
+            :py:meth:`create_process_pool`.
+        parallel_threshold: int
+            Batches smaller than this many documents are
+            encrypted and decrypted inline as the overhead
+            of using ``executor`` outweighs the benefit.
+        lazy_decryption: bool
+            Return documents as a :py:class:`~alaric.encryption.LazyDecryptedDocument`
+            which only decrypts fields when they are accessed.
+
+            Useful for wide documents where only some fields are read.
+            Converters are passed every field so gain nothing from this.
+        plan_cache_size: int
+            How many document shapes to remember which fields
+            need hashing, encrypting or decrypting for.
+        hasher: Optional[:py:class:`~alaric.abc.Hasher`]
+            How to hash ``hashed_fields`` and ``automatic_hashed_fields``,
+            defaults to :py:class:`~alaric.hashers.SHA512Hasher`.
+
+            Queries using :py:class:`~alaric.encryption.HQF` must use the same hasher.
+        deterministic_encrypted_fields: Optional[DeterministicEncryptedFields]
+            A list of fields to encrypt using AES-SIV when encountered.
+
+            Equal values share a ciphertext so these fields can be
+            indexed and queried using ``EQ`` and ``IN`` directly.
+        previous_encryption_keys: Optional[List[bytes]]
+            Keys which were previously used as the ``encryption_key``.
+
+            Data encrypted with these keys can still be decrypted,
+            I.e. while :py:meth:`rotate_key` is running elsewhere.
+            New data is always encrypted with ``encryption_key``.
+        prefix_indexed_fields: Optional[PrefixIndexedFields]
+            A list of string fields which can be queried using
+            :py:class:`~alaric.encryption.EncryptedPrefix`
+            without revealing their value.
 
         .. code-block:: python
             :linenos:
@@ -79,6 +189,10 @@ class EncryptedDocument(Document):
         """
         super().__init__(database, document_name, converter=converter)
         self._encryption_key = encryption_key
+        self._previous_encryption_keys: Dict[bytes, bytes] = {
+            key_id(key): key for key in previous_encryption_keys or []
+        }
+        self._hasher: Hasher = hasher if hasher is not None else SHA512Hasher()
         self._hashed_fields: HashedFields = (
             hashed_fields if hashed_fields is not None else HashedFields()
         )
@@ -87,10 +201,25 @@ class EncryptedDocument(Document):
             if automatic_hashed_fields is not None
             else AutomaticHashedFields()
         )
+        self._prefix_indexed_fields: PrefixIndexedFields = (
+            prefix_indexed_fields
+            if prefix_indexed_fields is not None
+            else PrefixIndexedFields()
+        )
         self._encrypted_fields: EncryptedFields = (
             encrypted_fields if encrypted_fields is not None else EncryptedFields()
         )
+        self._deterministic_encrypted_fields: DeterministicEncryptedFields = (
+            deterministic_encrypted_fields
+            if deterministic_encrypted_fields is not None
+            else DeterministicEncryptedFields()
+        )
         self._encrypt_all_fields: bool = encrypt_all_fields
+        self._executor: Optional[Executor] = executor
+        self._parallel_threshold: int = parallel_threshold
+        self._lazy_decryption: bool = lazy_decryption
+        self._plan_cache_size: int = plan_cache_size
+        self._plans: OrderedDict[Tuple, Dict[str, _PlanEntry]] = OrderedDict()
 
     def __repr__(self):
         return f"<Document(document_name={self._document_name})>"
@@ -114,120 +243,347 @@ class EncryptedDocument(Document):
         # 256 bit
         return secrets.token_bytes(32)
 
-    def _encrypt_data(self, data: Dict, *, ignore_fields: IgnoreFields) -> Dict:
-        encrypted_fields = {}
-        for k, v in data.items():
-            if k in ignore_fields:
-                encrypted_fields[k] = v
+    @classmethod
+    def create_process_pool(
+        cls,
+        encryption_key: bytes,
+        max_workers: Optional[int] = None,
+        *,
+        previous_encryption_keys: Optional[List[bytes]] = None,
+    ) -> ProcessPoolExecutor:
+        """Create a process pool for usage as an ``executor``.
+
+        The keys are given to each process once when it starts
+        rather than being sent alongside every batch of work.
+
+        Parameters
+        ----------
+        encryption_key: bytes
+            The key used by the documents sharing this pool
+        max_workers: Optional[int]
+            How many processes to use, defaults to the CPU count.
+        previous_encryption_keys: Optional[List[bytes]]
+            The ``previous_encryption_keys`` used by
+            the documents sharing this pool, in the same order.
+
+        Returns
+        -------
+        ProcessPoolExecutor
+            The pool, which should be shut down when no longer required.
+
+
+        .. code-block:: python
+            :linenos:
+
+            pool = EncryptedDocument.create_process_pool(key)
+            document = EncryptedDocument(
+                database,
+                "users",
+                encryption_key=key,
+                encrypt_all_fields=True,
+                executor=pool,
+            )
+        """
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_initialise_worker,
+            initargs=(encryption_key, previous_encryption_keys or []),
+        )
+
+    def _should_parallelise(self, data: List[Dict]) -> bool:
+        return (
+            self._executor is not None
+            and not self._lazy_decryption
+            and len(data) >= self._parallel_threshold
+        )
+
+    async def _encrypt_many(
+        self, data: List[Dict], *, ignore_fields: IgnoreFields
+    ) -> List[Dict]:
+        if not self._should_parallelise(data):
+            return self._encrypt_batch(data, ignore_fields=ignore_fields)
+
+        return await _map_in_executor(
+            self._executor,
+            self,
+            self._CRYPTO_ATTRIBUTES,
+            "_encrypt_batch",
+            data,
+            batched=True,
+            ignore_fields=ignore_fields,
+        )
+
+    def _encrypt_batch(
+        self, data: List[Dict], *, ignore_fields: IgnoreFields
+    ) -> List[Dict]:
+        """Encrypt every entry, hashing each top level
+        hashed column across the batch at once"""
+        fields = frozenset(ignore_fields.fields)
+        columns: Dict[str, Tuple[List[int], List[Any]]] = {}
+        for index, d in enumerate(data):
+            plan = self._get_plan(_ENCRYPT, d, "", fields)
+            for k, (action, hashed_key, _) in plan.items():
+                for column in (hashed_key, k if action == _HASH else None):
+                    if column is not None:
+                        indexes, values = columns.setdefault(column, ([], []))
+                        indexes.append(index)
+                        values.append(d[k])
+
+        hashes: List[Dict[str, Any]] = [{} for _ in data]
+        for column, (indexes, values) in columns.items():
+            for index, digest in zip(indexes, self._hasher.hash_many(column, values)):
+                hashes[index][column] = digest
+
+        return [
+            self._encrypt_data(d, ignore_fields=ignore_fields, hashes=h)
+            for d, h in zip(data, hashes)
+        ]
+
+    async def _decrypt_many(self, data: List[Dict]) -> List[Dict]:
+        if not self._should_parallelise(data):
+            return [self._decrypt_data(d) for d in data]
+
+        return await _map_in_executor(
+            self._executor, self, self._CRYPTO_ATTRIBUTES, "_decrypt_data", data
+        )
+
+    def _get_plan(
+        self, kind: int, data: Dict, prefix: str, ignore_fields: FrozenSet[str]
+    ) -> Dict[str, _PlanEntry]:
+        """Returns the action to take for each key within data"""
+        # The field options are part of the key as
+        # they may be replaced after initialisation
+        cache_key = (
+            kind,
+            prefix,
+            tuple(data),
+            ignore_fields,
+            self._hashed_fields,
+            self._automatic_hashed_fields,
+            self._prefix_indexed_fields,
+            self._encrypted_fields,
+            self._deterministic_encrypted_fields,
+            self._encrypt_all_fields,
+        )
+        plan = self._plans.get(cache_key)
+        if plan is not None:
+            self._plans.move_to_end(cache_key)
+            return plan
+
+        if kind == _ENCRYPT:
+            plan = self._build_encryption_plan(data, prefix, ignore_fields)
+        else:
+            plan = self._build_decryption_plan(data, prefix)
+
+        self._plans[cache_key] = plan
+        if len(self._plans) > self._plan_cache_size:
+            self._plans.popitem(last=False)
+
+        return plan
+
+    def _has_nested_fields(self, path: str) -> bool:
+        path = f"{path}."
+        return any(
+            field.startswith(path)
+            for fields in (
+                self._encrypted_fields,
+                self._deterministic_encrypted_fields,
+                self._hashed_fields,
+                self._automatic_hashed_fields,
+                self._prefix_indexed_fields,
+            )
+            for field in fields
+        )
+
+    def _build_encryption_plan(
+        self, data: Dict, prefix: str, ignore_fields: FrozenSet[str]
+    ) -> Dict[str, _PlanEntry]:
+        plan = {}
+        for k in data:
+            path = f"{prefix}{k}"
+            if path in ignore_fields:
+                plan[k] = _PASS, None, None
                 continue
 
-            if k in self._automatic_hashed_fields:
-                new_key = f"{k}_hashed"
-                if new_key in encrypted_fields or new_key in data:
+            hashed_key = None
+            if path in self._automatic_hashed_fields:
+                hashed_key = f"{k}_hashed"
+                if hashed_key in data:
                     raise ValueError(
-                        f"Cannot automatically hash {k} as the column {new_key} already exists in the dataset."
+                        f"Cannot automatically hash {k} as the column {hashed_key} already exists in the dataset."
                     )
 
-                encrypted_fields[new_key] = util.hash_field(new_key, v)
+            prefixes_key = None
+            if path in self._prefix_indexed_fields:
+                prefixes_key = f"{k}_prefixes"
+                if prefixes_key in data:
+                    raise ValueError(
+                        f"Cannot prefix index {k} as the column {prefixes_key} already exists in the dataset."
+                    )
 
-            if self._encrypt_all_fields:
-                v = self._aes_encrypt_field(v)
+            if path in self._deterministic_encrypted_fields:
+                plan[k] = _ENCRYPT_DETERMINISTIC, hashed_key, prefixes_key
+            elif (
+                self._encrypt_all_fields and not prefix
+            ) or path in self._encrypted_fields:
+                plan[k] = _ENCRYPT, hashed_key, prefixes_key
+            elif path in self._hashed_fields:
+                plan[k] = _HASH, hashed_key, prefixes_key
+            elif self._has_nested_fields(path):
+                plan[k] = _NESTED, hashed_key, prefixes_key
+            else:
+                plan[k] = _PASS, hashed_key, prefixes_key
+
+        return plan
+
+    def _build_decryption_plan(self, data: Dict, prefix: str) -> Dict[str, _PlanEntry]:
+        plan = {}
+        for k in data:
+            path = f"{prefix}{k}"
+            if (
+                path.endswith("_hashed") and path[:-7] in self._automatic_hashed_fields
+            ) or (
+                path.endswith("_prefixes") and path[:-9] in self._prefix_indexed_fields
+            ):
+                plan[k] = _DROP, None, None
+            elif (
+                (self._encrypt_all_fields and not prefix)
+                or path in self._encrypted_fields
+                or path in self._deterministic_encrypted_fields
+            ):
+                plan[k] = _DECRYPT, None, None
+            elif self._has_nested_fields(path):
+                plan[k] = _NESTED, None, None
+            else:
+                plan[k] = _PASS, None, None
+
+        return plan
+
+    def _encrypt_data(
+        self,
+        data: Dict,
+        *,
+        ignore_fields: IgnoreFields,
+        prefix: str = "",
+        hashes: Optional[Dict[str, Any]] = None,
+    ) -> Dict:
+        # hashes holds digests already computed for top level columns
+        hashes = hashes or {}
+        plan = self._get_plan(_ENCRYPT, data, prefix, frozenset(ignore_fields.fields))
+        encrypted_fields = {}
+        for k, v in data.items():
+            action, hashed_key, prefixes_key = plan[k]
+            if hashed_key in hashes:
+                encrypted_fields[hashed_key] = hashes[hashed_key]
+            elif hashed_key is not None:
+                encrypted_fields[hashed_key] = self._hasher.hash(hashed_key, v)
 
-            elif k in self._encrypted_fields:
+            if prefixes_key is not None:
+                encrypted_fields[prefixes_key] = self._prefix_tokens(f"{prefix}{k}", v)
+
+            if action == _ENCRYPT:
                 v = self._aes_encrypt_field(v)
 
-            elif k in self._hashed_fields:
-                v = util.hash_field(k, v)
+            elif action == _ENCRYPT_DETERMINISTIC:
+                v = self._siv_encrypt_field(v, f"{prefix}{k}")
+
+            elif action == _HASH:
+                v = hashes[k] if k in hashes else self._hasher.hash(k, v)
+
+            elif action == _NESTED and isinstance(v, dict):
+                v = self._encrypt_data(
+                    v, ignore_fields=ignore_fields, prefix=f"{prefix}{k}."
+                )
 
             encrypted_fields[k] = v
         return encrypted_fields
 
-    def _decrypt_data(self, data: Dict) -> Dict:
+    def _decrypt_data(self, data: Dict, *, prefix: str = "") -> Dict:
         # Keep the cursor mirror up to date
-        decrypted_fields = {}
-        # preprocess out automatic hashed fields
-        for ktr in [f"{k}_hashed" for k in self._automatic_hashed_fields]:
-            data.pop(ktr, None)
+        plan = self._get_plan(_DECRYPT, data, prefix, frozenset())
+        if self._lazy_decryption and not prefix:
+            return LazyDecryptedDocument(
+                {k: v for k, v in data.items() if plan[k][0] != _DROP},
+                {k for k in data if plan[k][0] in (_DECRYPT, _NESTED)},
+                lambda k, v: self._decrypt_field(plan[k][0], prefix, k, v),
+            )
 
+        decrypted_fields = {}
         for k, v in data.items():
-            if k in self._encrypted_fields or self._encrypt_all_fields:
-                try:
-                    if not isinstance(v, bson.ObjectId):
-                        v = self._aes_decrypt_field(bytes.fromhex(v))
-                except ValueError:
-                    raise ValueError("Invalid encryption_key in use for this data.")
+            action = plan[k][0]
+            if action == _DROP:
+                continue
 
-            decrypted_fields[k] = v
+            decrypted_fields[k] = self._decrypt_field(action, prefix, k, v)
 
         return decrypted_fields
 
-    def _aes_encrypt_field(self, value) -> Union[str, ObjectId]:
-        # Data is stored in the format b'nonce(16 bytes)tag(16 bytes)ciphertext(remaining)'
+    def _decrypt_field(self, action: int, prefix: str, k: str, v: Any) -> Any:
+        if action == _DECRYPT:
+            return self._decrypt_value(v, f"{prefix}{k}")
+
+        if action == _NESTED and isinstance(v, dict):
+            return self._decrypt_data(v, prefix=f"{prefix}{k}.")
+
+        return v
+
+    def _decrypt_value(self, value: Any, path: str) -> Any:
+        if isinstance(value, bson.ObjectId):
+            return value
+
+        try:
+            if isinstance(value, bytes) and value[0] == SIV_VERSION:
+                return self._siv_decrypt_field(value, path)
+
+            return self._aes_decrypt_field(value)
+        except ValueError:
+            raise ValueError("Invalid encryption_key in use for this data.")
+
+    def _aes_encrypt_field(self, value) -> Union[bson.Binary, ObjectId]:
+        # Data is stored as BSON binary in the format
+        # b'version(1 byte)key id(4 bytes)nonce(16 bytes)tag(16 bytes)ciphertext(remaining)'
+        if isinstance(value, ObjectId):
+            log.debug("You asked me to encrypt an ObjectId instance, I can't do that.")
+            return value
+
         cipher = AES.new(self._encryption_key, AES.MODE_GCM)
-        if isinstance(value, str):
-            value = f"str     |{value}"
-        elif isinstance(value, bool):
-            value = f"bool    |{1 if value else 0}"
-        elif isinstance(value, int):
-            value = f"int     |{value}"
-        elif isinstance(value, float):
-            value = f"float   |{value}"
-        elif isinstance(value, datetime.datetime):
-            value = f"datetime|{value.isoformat()}"
-        elif isinstance(value, list):
-            pre = {"list": value}
-            value = f"list    |{orjson.dumps(pre).hex()}"
-        elif isinstance(value, dict):
-            value = f"dict    |{orjson.dumps(value).hex()}"
-        elif isinstance(value, ObjectId):
+        ciphertext, tag = cipher.encrypt_and_digest(encode_plaintext(value))
+        return bson.Binary(
+            bytes([GCM_VERSION])
+            + key_id(self._encryption_key)
+            + cipher.nonce
+            + tag
+            + ciphertext,
+            self._CIPHERTEXT_SUBTYPE,
+        )
+
+    def _siv_encrypt_field(
+        self, value, path: str, *, key: Optional[bytes] = None
+    ) -> Union[bson.Binary, ObjectId]:
+        # Data is stored as BSON binary in the format
+        # b'version(1 byte)key id(4 bytes)tag(16 bytes)ciphertext(remaining)'
+        # The field path is authenticated so equal values
+        # within different fields do not share a ciphertext
+        if isinstance(value, ObjectId):
             log.debug("You asked me to encrypt an ObjectId instance, I can't do that.")
             return value
-        else:
-            raise ValueError(
-                f"{value.__class__.__name__} is not yet supported for encryption"
-            )
 
-        if not isinstance(value, bytes):
-            value = bytes(value, "utf-8")
+        key = key or self._encryption_key
+        cipher = AES.new(derive_siv_key(key), AES.MODE_SIV)
+        cipher.update(path.encode("utf-8"))
+        ciphertext, tag = cipher.encrypt_and_digest(encode_plaintext(value))
+        return bson.Binary(
+            bytes([SIV_VERSION]) + key_id(key) + tag + ciphertext,
+            self._CIPHERTEXT_SUBTYPE,
+        )
 
-        ciphertext, tag = cipher.encrypt_and_digest(value)
-        ba = bytearray(cipher.nonce)
-        ba.extend(tag)
-        ba.extend(ciphertext)
-        return ba.hex()
+    def _siv_decrypt_field(self, value: bytes, path: str):
+        return siv_decrypt(
+            value, path, self._encryption_key, self._previous_encryption_keys
+        )
 
-    def _aes_decrypt_field(self, value: bytes):
-        # Keep the cursor mirror up to date
-        # We assume by here it's an AES field
-        def extract_list(data) -> List:
-            inner = orjson.loads(bytes.fromhex(data))
-            return inner["list"]
-
-        def extract_dict(data):
-            return orjson.loads(bytes.fromhex(data))
-
-        def extract_bool(data):
-            return True if data == "1" else False
-
-        # Whitelist types
-        mappings = {
-            "str": str,
-            "int": int,
-            "float": float,
-            "bool": extract_bool,
-            "dict": extract_dict,
-            "list": extract_list,
-            "datetime": datetime.datetime.fromisoformat,
-        }
-        nonce = value[:16]
-        tag = value[16:32]
-        ciphertext = value[32:]
-        cipher = AES.new(self._encryption_key, AES.MODE_GCM, nonce)
-        text = cipher.decrypt_and_verify(ciphertext, tag)
-        text = text.decode("utf-8")
-        _type = text[:9].split("|")[0].strip()
-        content = text[9:]
-        return mappings[_type](content)
+    def _aes_decrypt_field(self, value: Union[bytes, str]):
+        return aes_decrypt(value, self._encryption_key, self._previous_encryption_keys)
 
     @staticmethod
     def __ensure_ignore_fields(ignore_fields: Optional[IgnoreFields]):
@@ -247,6 +603,172 @@ class EncryptedDocument(Document):
 
         return self._encrypt_data(data, ignore_fields=ignore_fields)
 
+    def _build_filter(self, item: Union[Dict, Buildable, Filterable]) -> Dict:
+        """Build a filter, comparing hashed fields against their hashes.
+
+        Dictionaries, :py:class:`~alaric.abc.Filterable` objects and
+        :py:class:`~alaric.encryption.HQF` are used as is
+        as they may already contain hashed values.
+
+        Raises
+        ------
+        ValueError
+            A dictionary filters on an encrypted field, which
+            can never match the stored ciphertext.
+        """
+        if isinstance(item, dict):
+            self._ensure_dict_queryable(item)
+            return item
+
+        if isinstance(item, AQ):
+            return self._build_filter(item._item)
+
+        if isinstance(item, (AND, OR, NOT)):
+            return {
+                _LOGICAL_OPERATORS[type(item)]: [
+                    self._build_filter(c) for c in item.comparisons
+                ]
+            }
+
+        if isinstance(item, Negate):
+            if isinstance(item.comparison, (EQ, IN)):
+                return self._build_comparison(item.comparison, negated=True)
+
+            self._ensure_queryable(item.comparison)
+            return item.build()
+
+        if isinstance(item, (EQ, IN)):
+            return self._build_comparison(item, negated=False)
+
+        if isinstance(item, EncryptedPrefix):
+            return self._build_prefix_comparison(item)
+
+        if not isinstance(item, (dict, HashedQueryField)) and hasattr(item, "field"):
+            # I.e. GT, LT or Regex
+            self._ensure_queryable(item)
+
+        return self._ensure_built(item)
+
+    def _build_comparison(self, comparison: Union[EQ, IN], *, negated: bool) -> Dict:
+        field = comparison.field
+        if field in self._automatic_hashed_fields:
+            column = f"{field}_hashed"
+            encode_many = functools.partial(self._hasher.hash_many, column)
+        elif field in self._hashed_fields:
+            column = field
+            encode_many = functools.partial(self._hasher.hash_many, column)
+        elif field in self._deterministic_encrypted_fields:
+            column = field
+
+            def encode_many(values: List[Any]) -> List[bson.Binary]:
+                # Documents not yet rotated still use a previous key
+                return [
+                    self._siv_encrypt_field(value, field, key=key)
+                    for key in self._get_query_keys()
+                    for value in values
+                ]
+
+        else:
+            self._ensure_queryable(comparison)
+            return Negate(comparison).build() if negated else comparison.build()
+
+        if isinstance(comparison, IN):
+            values = encode_many(list(comparison.value))
+        else:
+            values = encode_many([comparison.value])
+
+        if isinstance(comparison, IN) or len(values) > 1:
+            return {column: {"$nin" if negated else "$in": values}}
+
+        return {column: {"$ne" if negated else "$eq": values[0]}}
+
+    def _build_prefix_comparison(self, comparison: EncryptedPrefix) -> Dict:
+        field = comparison.field
+        if field not in self._prefix_indexed_fields:
+            raise ValueError(
+                f"Cannot query the field '{field}' with EncryptedPrefix "
+                "as it is not within PrefixIndexedFields."
+            )
+
+        prefix = normalise(comparison.prefix)
+        if len(prefix) < self._prefix_indexed_fields.min_length:
+            raise ValueError(
+                f"EncryptedPrefix requires at least "
+                f"{self._prefix_indexed_fields.min_length} characters for '{field}'."
+            )
+
+        if len(prefix) > self._prefix_indexed_fields.max_length:
+            # Comparing a truncated prefix would match more than requested
+            raise ValueError(
+                f"EncryptedPrefix allows at most "
+                f"{self._prefix_indexed_fields.max_length} characters for '{field}'."
+            )
+
+        tokens = [prefix_token(key, field, prefix) for key in self._get_query_keys()]
+        if len(tokens) > 1:
+            return {f"{field}_prefixes": {"$in": tokens}}
+
+        return {f"{field}_prefixes": tokens[0]}
+
+    def _get_query_keys(self) -> List[bytes]:
+        """Returns every key whose ciphertext or prefix tokens a query
+        must match, as documents may not have been rotated yet."""
+        return [self._encryption_key, *self._previous_encryption_keys.values()]
+
+    def _prefix_tokens(self, path: str, value: Any) -> List[bytes]:
+        if not isinstance(value, str):
+            raise ValueError(
+                f"Cannot prefix index field '{path}' as it is an "
+                f"unsupported type {value.__class__.__name__}"
+            )
+
+        return prefix_tokens(
+            self._encryption_key,
+            path,
+            value,
+            self._prefix_indexed_fields.min_length,
+            self._prefix_indexed_fields.max_length,
+        )
+
+    def _ensure_queryable(self, comparison: Any) -> None:
+        if isinstance(comparison, Exists):
+            # Encryption and hashing keep the field present
+            return
+
+        field = comparison.field
+        if (
+            field in self._encrypted_fields
+            or field in self._deterministic_encrypted_fields
+            or field in self._hashed_fields
+        ):
+            raise ValueError(
+                f"Cannot query the field '{field}' with "
+                f"{comparison.__class__.__name__} as it is encrypted or hashed. "
+                "Only EQ and IN can be used, on fields within HashedFields, "
+                "AutomaticHashedFields or DeterministicEncryptedFields."
+            )
+
+    def _ensure_dict_queryable(self, filter_dict: Dict[str, Any]) -> None:
+        for field, value in filter_dict.items():
+            if field in ("$and", "$or", "$nor"):
+                for nested in value:
+                    self._ensure_dict_queryable(nested)
+
+                continue
+
+            if isinstance(value, dict) and value.keys() == {"$exists"}:
+                continue
+
+            if (
+                field in self._encrypted_fields
+                or field in self._deterministic_encrypted_fields
+            ):
+                raise ValueError(
+                    f"Cannot filter on the encrypted field '{field}' with a "
+                    "dictionary as it is compared against the ciphertext. "
+                    "Use EQ or IN on fields within DeterministicEncryptedFields."
+                )
+
     async def _attempt_convert(
         self, data: Union[Dict, List[Dict]]
     ) -> Union[List[Union[Dict[str, Any], Type[T]]], Union[Dict[str, Any], Type[T]]]:
@@ -255,10 +777,7 @@ class EncryptedDocument(Document):
 
         if not self.converter:
             if isinstance(data, list):
-                out = []
-                for itr in data:
-                    out.append(self._decrypt_data(itr))
-                return out
+                return await self._decrypt_many(data)
 
             return self._decrypt_data(data)
 
@@ -266,8 +785,8 @@ class EncryptedDocument(Document):
             return self.converter(**self._decrypt_data(data))
 
         new_data = []
-        for d in data:
-            new_data.append(self.converter(**self._decrypt_data(d)))
+        for d in await self._decrypt_many(data):
+            new_data.append(self.converter(**d))
 
         return new_data
 
@@ -311,6 +830,8 @@ class EncryptedDocument(Document):
     ) -> None:
         """Performs an UPDATE operation.
 
+        Hashed fields are queried as per :py:meth:`find`.
+
         Parameters
         ----------
         filter_dict: Union[Dict[str, Any], Buildable, Filterable]
@@ -338,7 +859,9 @@ class EncryptedDocument(Document):
         """
         ignore_fields = self.__ensure_ignore_fields(ignore_fields=ignore_fields)
         update_data = self.__preprocess_fields(update_data, ignore_fields=ignore_fields)
-        await super().update(filter_dict, update_data)
+        await super().update(
+            self._build_filter(filter_dict), update_data, option, *args, **kwargs
+        )
 
     async def upsert(
         self,
@@ -351,6 +874,8 @@ class EncryptedDocument(Document):
     ) -> None:
         """Performs an UPSERT operation.
 
+        Hashed fields are queried as per :py:meth:`find`.
+
         Parameters
         ----------
         filter_dict: Union[Dict[str, Any], Buildable, Filterable]
@@ -380,7 +905,15 @@ class EncryptedDocument(Document):
         """
         ignore_fields = self.__ensure_ignore_fields(ignore_fields=ignore_fields)
         update_data = self.__preprocess_fields(update_data, ignore_fields=ignore_fields)
-        await super().upsert(filter_dict, update_data)
+        # Document.upsert would dispatch to our update and encrypt twice
+        await super().update(
+            self._build_filter(filter_dict),
+            update_data,
+            option,
+            upsert=True,
+            *args,
+            **kwargs,
+        )
 
     async def increment(
         self,
@@ -390,6 +923,8 @@ class EncryptedDocument(Document):
     ) -> None:
         """Increment the provided field.
 
+        Hashed fields are queried as per :py:meth:`find`.
+
         Parameters
         ----------
         filter_dict: Union[Dict[str, Any], Buildable, Filterable]
@@ -425,7 +960,11 @@ class EncryptedDocument(Document):
         You can also use negative numbers to
         decrease the count of a field.
         """
-        if field not in self._encrypted_fields:
+        filter_dict = self._build_filter(filter_dict)
+        if (
+            field not in self._encrypted_fields
+            and field not in self._deterministic_encrypted_fields
+        ):
             return await super().increment(filter_dict, field, amount)
 
         if "." in field:
@@ -433,14 +972,16 @@ class EncryptedDocument(Document):
                 "Nested field updates on encrypted fields is not supported."
             )
 
-        data: Dict = await self.find(  # noqa
-            filter_dict, projections=Projection(Show(field)), try_convert=False
+        # filter_dict is already built, so skip our own filter checks
+        data: Dict = await super().find(  # noqa
+            filter_dict, projections=Projection(Show("_id", field)), try_convert=False
         )
         if not data:
             raise ValueError("Item to increment didn't exist with this filter.")
 
-        data[field] += amount
-        await self.update(filter_dict, data)
+        _id = data.pop("_id")
+        data[field] = self._decrypt_value(data[field], field) + amount
+        await self.update({"_id": _id}, data)
 
     async def change_field_to(
         self,
@@ -450,6 +991,8 @@ class EncryptedDocument(Document):
     ) -> None:
         """Modify a single field and change the value.
 
+        Hashed fields are queried as per :py:meth:`find`.
+
         Parameters
         ----------
         filter_dict: Union[Dict[Any, Any], Buildable, Filterable]
@@ -471,10 +1014,13 @@ class EncryptedDocument(Document):
             # This will now look like
             # {"_id": 1, "prefix": "?"}
         """
-        if field in self._encrypted_fields:
+        if field in self._deterministic_encrypted_fields:
+            new_value = self._siv_encrypt_field(new_value, field)
+
+        elif field in self._encrypted_fields:
             new_value = self._aes_encrypt_field(new_value)
 
-        await super().change_field_to(filter_dict, field, new_value)
+        await super().change_field_to(self._build_filter(filter_dict), field, new_value)
 
     async def bulk_insert(
         self,
@@ -511,50 +1057,369 @@ class EncryptedDocument(Document):
         """
         ignore_fields = self.__ensure_ignore_fields(ignore_fields=ignore_fields)
         self._ensure_list_of_dicts(data)
-        encrypted_data = []
-        for d in data:
-            encrypted_data.append(self._encrypt_data(d, ignore_fields=ignore_fields))
-
+        encrypted_data = await self._encrypt_many(data, ignore_fields=ignore_fields)
         await self._document.insert_many(encrypted_data)
 
-    if TYPE_CHECKING:
-        # I don't like this but Pycharm doesn't
-        # properly support methods from parents
-        async def find(
-            self,
-            filter_dict: Union[Dict[str, Any], Buildable, Filterable],
-            projections: Optional[Union[Dict[str, Any], Projection]] = None,
-            *,
-            try_convert: bool = True,
-        ) -> Optional[Union[Dict[str, Any], Type[T]]]:
-            ...
-
-        async def find_many(
-            self,
-            filter_dict: Union[Dict[str, Any], Buildable, Filterable],
-            projections: Optional[Union[Dict[str, Any], Projection]] = None,
-            *,
-            try_convert: bool = True,
-        ) -> List[Union[Dict[str, Any], Type[T]]]:
-            ...
-
-        async def delete(
-            self,
-            filter_dict: Union[Dict, Buildable, Filterable],
-        ) -> Optional[DeleteResult]:
-            ...
+    async def rotate_key(
+        self,
+        new_key: bytes,
+        batch_size: int = 500,
+        concurrency: int = 4,
+        *,
+        ignore_fields: Optional[IgnoreFields] = None,
+    ) -> int:
+        """Re-encrypt every document in this collection using ``new_key``.
 
-        async def get_all(
-            self,
-            filter_dict: Optional[Union[Dict[str, Any], Buildable, Filterable]] = None,
-            projections: Optional[Union[Dict[str, Any], Projection]] = None,
-            *args: Any,
-            try_convert: bool = True,
-            **kwargs: Any,
-        ) -> List[Optional[Union[Dict[str, Any], Type[T]]]]:
-            ...
-
-        async def count(
-            self, filter_dict: Union[Dict[Any, Any], Buildable, Filterable]
-        ) -> int:
-            ...
+        Documents are read in batches ordered by ``_id``,
+        decrypted with whichever key encrypted them and
+        written back encrypted with ``new_key``. Once complete,
+        this document uses ``new_key`` with the old key kept
+        within ``previous_encryption_keys``.
+
+        Progress is saved after every ``concurrency`` batches, calling
+        this again with the same ``new_key`` after a crash resumes
+        from the last saved batch.
+
+        Parameters
+        ----------
+        new_key: bytes
+            The key to encrypt everything with,
+            see :py:meth:`generate_aes_key`
+        batch_size: int
+            How many documents to read and write at a time.
+        concurrency: int
+            How many batches to re-encrypt and write at once.
+        ignore_fields: Optional[IgnoreFields]
+            Any fields to ignore during the hashing / encryption step.
+
+            ``_id`` and ``hashed_fields`` are always left as is.
+
+        Returns
+        -------
+        int
+            How many documents were re-encrypted.
+
+        Raises
+        ------
+        ValueError
+            Documents kept changing while being re-encrypted, so
+            still use the old key. This document keeps using the
+            old key and calling this again rotates everything.
+
+        Notes
+        -----
+        Other processes should be given the old key within
+        ``previous_encryption_keys`` and the new key as
+        the ``encryption_key`` before this is called.
+
+        Documents modified while their batch is being re-encrypted
+        are read again and retried.
+
+        ``_id`` must be of a single type, I.e. all ObjectId's.
+
+
+        .. code-block:: python
+            :linenos:
+
+            new_key = EncryptedDocument.generate_aes_key()
+            await document.rotate_key(new_key)
+        """
+        ignore_fields = IgnoreFields(
+            "_id",
+            *self._hashed_fields,
+            *self.__ensure_ignore_fields(ignore_fields=ignore_fields),
+        )
+
+        # Decrypts using any known key and encrypts using the new key
+        rotator = copy.copy(self)
+        rotator._encryption_key = new_key
+        # The old key is tried first for ciphertext without a key identifier
+        rotator._previous_encryption_keys = {
+            key_id(self._encryption_key): self._encryption_key,
+            **self._previous_encryption_keys,
+        }
+        rotator._lazy_decryption = False
+        if isinstance(self._executor, ProcessPoolExecutor):
+            # The processes do not know the new key
+            rotator._executor = None
+
+        checkpoints = self._database[self._KEY_ROTATION_COLLECTION]
+        checkpoint_id = f"{self.collection_name}:{key_id(new_key).hex()}"
+        checkpoint = await checkpoints.find_one({"_id": checkpoint_id})
+        last_id = checkpoint["last_id"] if checkpoint is not None else None
+        if last_id is not None:
+            log.info("Resuming key rotation after _id %s", last_id)
+
+        rotated = skipped = 0
+        while True:
+            batches = []
+            for _ in range(concurrency):
+                query = {} if last_id is None else {"_id": {"$gt": last_id}}
+                batch = (
+                    await self._document.find(query)
+                    .sort("_id", 1)
+                    .limit(batch_size)
+                    .to_list(None)
+                )
+                if not batch:
+                    break
+
+                batches.append(batch)
+                last_id = batch[-1]["_id"]
+
+            if not batches:
+                break
+
+            results = await asyncio.gather(
+                *(
+                    rotator._rotate_batch(batch, ignore_fields=ignore_fields)
+                    for batch in batches
+                )
+            )
+            rotated += sum(result[0] for result in results)
+            skipped += sum(result[1] for result in results)
+            await checkpoints.update_one(
+                {"_id": checkpoint_id}, {"$set": {"last_id": last_id}}, upsert=True
+            )
+
+        await checkpoints.delete_one({"_id": checkpoint_id})
+        if skipped:
+            raise ValueError(
+                f"{skipped} documents changed during every attempt to re-encrypt "
+                "them and still use the old key, call rotate_key again."
+            )
+
+        self._previous_encryption_keys = rotator._previous_encryption_keys
+        self._encryption_key = new_key
+        return rotated
+
+    async def _rotate_batch(
+        self, batch: List[Dict], *, ignore_fields: IgnoreFields
+    ) -> Tuple[int, int]:
+        """Returns how many documents were re-encrypted and
+        how many were skipped as they kept changing."""
+        rotated = 0
+        for _ in range(self._KEY_ROTATION_ATTEMPTS):
+            encrypted = await self._encrypt_many(
+                await self._decrypt_many(batch), ignore_fields=ignore_fields
+            )
+            requests = []
+            for raw, entry in zip(batch, encrypted):
+                # _id may be encrypted under the old key
+                entry["_id"] = raw["_id"]
+                # Only replaces documents which are unchanged since being read
+                requests.append(ReplaceOne(raw, entry))
+
+            result = await self._document.bulk_write(requests, ordered=False)
+            rotated += result.modified_count
+            if result.matched_count == len(requests):
+                return rotated, 0
+
+            # Read whatever changed again, deleted documents are dropped
+            written = {entry["_id"]: entry for entry in encrypted}
+            current = await self._document.find(
+                {"_id": {"$in": list(written)}}
+            ).to_list(None)
+            batch = [raw for raw in current if raw != written[raw["_id"]]]
+            if not batch:
+                return rotated, 0
+
+        return rotated, len(batch)
+
+    async def find(
+        self,
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable],
+        projections: Optional[Union[Dict[str, Any], Projection]] = None,
+        *,
+        try_convert: bool = True,
+    ) -> Optional[Union[Dict[str, Any], Type[T]]]:
+        """Find and return one item.
+
+        ``EQ`` and ``IN`` comparisons against fields within
+        ``hashed_fields`` or ``automatic_hashed_fields`` are
+        compared against the stored hashes for you.
+
+        Parameters
+        ----------
+        filter_dict: Union[Dict, Buildable, Filterable]
+            A dictionary to use as a filter or
+            :py:class:`AQ` object.
+
+            Dictionaries are used as is.
+        projections: Optional[Union[Dict[str, Any], Projection]]
+            Specify the data you want
+            returned from matching queries.
+        try_convert: bool
+            Whether to attempt to
+            run convertors on returned data.
+
+            Defaults to True
+
+        Returns
+        -------
+        Optional[Union[Dict[str, Any], Type[:py:class:`~alaric.document.T`]]]
+            The result of the query
+
+        Raises
+        ------
+        ValueError
+            The filter compares an encrypted field in a way
+            which cannot be answered using its hash.
+
+
+        .. code-block:: python
+            :linenos:
+
+            # With AutomaticHashedFields("email"), this
+            # queries the email_hashed field instead
+            data: dict = await EncryptedDocument.find(AQ(EQ("email", "a@b.c")))
+        """
+        return await super().find(
+            self._build_filter(filter_dict), projections, try_convert=try_convert
+        )
+
+    async def find_many(
+        self,
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable],
+        projections: Optional[Union[Dict[str, Any], Projection]] = None,
+        *,
+        try_convert: bool = True,
+    ) -> List[Union[Dict[str, Any], Type[T]]]:
+        """Find and return all items matching the given filter.
+
+        Hashed fields are queried as per :py:meth:`find`.
+
+        Parameters
+        ----------
+        filter_dict: Union[Dict[str, Any], Buildable, Filterable]
+            A dictionary to use as a filter or
+            :py:class:`AQ` object.
+
+            Dictionaries are used as is.
+        projections: Optional[Union[Dict[str, Any], Projection]]
+            Specify the data you want
+            returned from matching queries.
+        try_convert: bool
+            Whether to attempt to
+            run convertors on returned data.
+
+            Defaults to True
+
+        Returns
+        -------
+        List[Union[Dict[str, Any], Type[:py:class:`~alaric.document.T`]]]
+            The result of the query
+
+        Raises
+        ------
+        ValueError
+            The filter compares an encrypted field in a way
+            which cannot be answered using its hash.
+        """
+        return await super().find_many(
+            self._build_filter(filter_dict), projections, try_convert=try_convert
+        )
+
+    async def delete(
+        self,
+        filter_dict: Union[Dict, Buildable, Filterable],
+    ) -> Optional[DeleteResult]:
+        """Delete all items matching the given filter.
+
+        Hashed fields are queried as per :py:meth:`find`.
+
+        Parameters
+        ----------
+        filter_dict: Union[Dict, Buildable, Filterable]
+            A dictionary to use as a filter or
+            :py:class:`AQ` object.
+
+            Dictionaries are used as is.
+
+        Returns
+        -------
+        Optional[DeleteResult]
+            The result of deletion if it occurred.
+
+        Raises
+        ------
+        ValueError
+            The filter compares an encrypted field in a way
+            which cannot be answered using its hash.
+        """
+        return await super().delete(self._build_filter(filter_dict))
+
+    async def count(
+        self, filter_dict: Union[Dict[Any, Any], Buildable, Filterable]
+    ) -> int:
+        """Return a count of how many items match the filter.
+
+        Hashed fields are queried as per :py:meth:`find`.
+
+        Parameters
+        ----------
+        filter_dict:  Union[Dict[Any, Any], Buildable, Filterable]
+            The count filer.
+
+            Dictionaries are used as is.
+
+        Returns
+        -------
+        int
+            How many items matched the filter.
+
+        Raises
+        ------
+        ValueError
+            The filter compares an encrypted field in a way
+            which cannot be answered using its hash.
+        """
+        return await super().count(self._build_filter(filter_dict))
+
+    async def get_all(
+        self,
+        filter_dict: Optional[Union[Dict[str, Any], Buildable, Filterable]] = None,
+        projections: Optional[Union[Dict[str, Any], Projection]] = None,
+        *args: Any,
+        try_convert: bool = True,
+        **kwargs: Any,
+    ) -> List[Optional[Union[Dict[str, Any], Type[T]]]]:
+        """Fetches and returns all items
+        which match the given filter.
+
+        Hashed fields are queried as per :py:meth:`find`.
+
+        Parameters
+        ----------
+        filter_dict: Optional[Union[Dict[str, Any], Buildable, Filterable]]
+            A dictionary to use as a filter or
+            :py:class:`AQ` object.
+
+            Dictionaries are used as is.
+        projections: Optional[Union[Dict[str, Any], Projection]]
+            Specify the data you want
+            returned from matching queries.
+        try_convert: bool
+            Whether to attempt to
+            run convertors on returned data.
+
+            Defaults to True
+
+        Returns
+        -------
+        List[Optional[Union[Dict[str, Any], Type[:py:class:`~alaric.document.T`]]]]
+            The items matching the filter
+
+        Raises
+        ------
+        ValueError
+            The filter compares an encrypted field in a way
+            which cannot be answered using its hash.
+        """
+        return await super().get_all(
+            self._build_filter(filter_dict or {}),
+            projections,
+            *args,
+            try_convert=try_convert,
+            **kwargs,
+        )
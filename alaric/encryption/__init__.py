@@ -1,8 +1,12 @@
 from .base import Base
 from .hashed_fields import HashedFields
 from .encrypted_fields import EncryptedFields
+from .deterministic_encrypted_fields import DeterministicEncryptedFields
 from .ignore_fields import IgnoreFields
 from .hashed_query_field import HashedQueryField
 from .automatic_hashed_fields import AutomaticHashedFields
+from .prefix_indexed_fields import PrefixIndexedFields
+from .encrypted_prefix import EncryptedPrefix
+from .lazy_decrypted_document import LazyDecryptedDocument
 
 HQF = HashedQueryField
@@ -0,0 +1,45 @@
+"""Keyed hashes of normalised prefixes used by PrefixIndexedFields."""
+
+import functools
+import hashlib
+import unicodedata
+from typing import List
+
+from Crypto.Hash import SHA512
+from Crypto.Protocol.KDF import HKDF
+
+_BLIND_INDEX_CONTEXT = b"alaric blind index"
+
+
+@functools.lru_cache(maxsize=8)
+def derive_blind_index_key(encryption_key: bytes) -> bytes:
+    """Derive a separate key for blind indexes from the encryption key."""
+    return HKDF(encryption_key, 64, b"", SHA512, context=_BLIND_INDEX_CONTEXT)
+
+
+def normalise(value: str) -> str:
+    return unicodedata.normalize("NFKC", value).casefold().strip()
+
+
+def prefix_token(encryption_key: bytes, path: str, prefix: str) -> bytes:
+    """Return the token stored for an already normalised prefix.
+
+    The field path is included so equal prefixes within
+    different fields do not share a token.
+    """
+    return hashlib.blake2b(
+        f"{path}\x00{prefix}".encode("utf-8"),
+        key=derive_blind_index_key(encryption_key),
+        digest_size=16,
+    ).digest()
+
+
+def prefix_tokens(
+    encryption_key: bytes, path: str, value: str, min_length: int, max_length: int
+) -> List[bytes]:
+    """Return the tokens for every prefix of value to store."""
+    value = normalise(value)
+    return [
+        prefix_token(encryption_key, path, value[:length])
+        for length in range(min_length, min(len(value), max_length) + 1)
+    ]
@@ -0,0 +1,88 @@
+"""Decrypts the ciphertext stored within encrypted fields.
+
+Shared by :py:class:`alaric.EncryptedDocument` and
+:py:class:`alaric.Cursor` so both read every format alike.
+"""
+
+from typing import Any, Dict, Tuple, Union
+
+from Crypto.Cipher import AES
+
+from alaric.encryption.encoding import decode_legacy_plaintext, decode_plaintext
+from alaric.encryption.keys import KEY_ID_SIZE, decrypt_with_any, key_id
+from alaric.encryption.siv import derive_siv_key
+from alaric.encryption.versions import GCM_VERSION, SIV_VERSION
+
+
+def get_decryption_key(
+    value: bytes, encryption_key: bytes, previous_keys: Dict[bytes, bytes]
+) -> Tuple[bytes, bytes]:
+    """Returns the key for this ciphertext alongside the
+    ciphertext without its version and key identifier.
+
+    Raises
+    ------
+    ValueError
+        The ciphertext format is unsupported or
+        no key matches its key identifier.
+    """
+    if value[0] not in (GCM_VERSION, SIV_VERSION):
+        raise ValueError("Unsupported ciphertext format.")
+
+    identifier = value[1 : 1 + KEY_ID_SIZE]
+    value = value[1 + KEY_ID_SIZE :]
+    if identifier == key_id(encryption_key):
+        return encryption_key, value
+
+    try:
+        return previous_keys[identifier], value
+    except KeyError:
+        raise ValueError("No key available for this ciphertext.") from None
+
+
+def aes_decrypt(
+    value: Union[bytes, str],
+    encryption_key: bytes,
+    previous_keys: Dict[bytes, bytes],
+) -> Any:
+    """Decrypt AES-GCM ciphertext, including legacy hex strings.
+
+    Raises
+    ------
+    ValueError
+        No available key can decrypt this ciphertext.
+    """
+    if isinstance(value, str):
+        # Written before ciphertext was stored as binary
+        # or contained a key identifier, so try every key
+        value = bytes.fromhex(value)
+
+        def decrypt(key: bytes) -> bytes:
+            cipher = AES.new(key, AES.MODE_GCM, value[:16])
+            return cipher.decrypt_and_verify(value[32:], value[16:32])
+
+        keys = [*previous_keys.values(), encryption_key]
+        return decode_legacy_plaintext(decrypt_with_any(keys, decrypt))
+
+    key, value = get_decryption_key(value, encryption_key, previous_keys)
+    cipher = AES.new(key, AES.MODE_GCM, value[:16])
+    return decode_plaintext(cipher.decrypt_and_verify(value[32:], value[16:32]))
+
+
+def siv_decrypt(
+    value: bytes,
+    path: str,
+    encryption_key: bytes,
+    previous_keys: Dict[bytes, bytes],
+) -> Any:
+    """Decrypt AES-SIV ciphertext written for the field at ``path``.
+
+    Raises
+    ------
+    ValueError
+        No available key can decrypt this ciphertext.
+    """
+    key, value = get_decryption_key(value, encryption_key, previous_keys)
+    cipher = AES.new(derive_siv_key(key), AES.MODE_SIV)
+    cipher.update(path.encode("utf-8"))
+    return decode_plaintext(cipher.decrypt_and_verify(value[16:], value[:16]))
@@ -0,0 +1,23 @@
+from alaric.encryption import Base
+
+
+class DeterministicEncryptedFields(Base):
+    """A list of fields which should be encrypted such that
+    equal values always produce the same ciphertext.
+
+    These fields can be indexed and queried using
+    :py:class:`~alaric.comparison.EQ` and :py:class:`~alaric.comparison.IN`
+    without requiring an :py:class:`~alaric.encryption.AutomaticHashedFields`
+    entry, at the cost of revealing which documents share a value.
+
+    .. code-block:: python
+        :linenos:
+
+        from alaric.encryption import DeterministicEncryptedFields
+
+        DeterministicEncryptedFields("email", "test")
+
+    .. note::
+        Values are compared by type as well as value, I.e.
+        querying for ``1`` will not match a stored ``1.0``
+    """
@@ -0,0 +1,135 @@
+"""Converts values to and from the plaintext which gets encrypted.
+
+Every plaintext starts with a single tag byte describing
+how the remaining bytes should be decoded.
+"""
+
+import datetime
+import struct
+from typing import Any, Callable, Dict
+
+import bson
+import orjson
+from bson.errors import InvalidDocument
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_DOUBLE = struct.Struct(">d")
+_NAIVE_DATETIME = struct.Struct(">q")
+# Microseconds since the epoch followed by the UTC offset in seconds
+_AWARE_DATETIME = struct.Struct(">qi")
+
+_STR = 0x01
+_BOOL = 0x02
+_INT = 0x03
+_FLOAT = 0x04
+_NAIVE_DATETIME_TAG = 0x05
+_AWARE_DATETIME_TAG = 0x06
+_LIST = 0x07
+_DICT = 0x08
+# Anything else BSON supports, I.e. bytes or Decimal128
+_BSON = 0x09
+
+
+def _encode_int(value: int) -> bytes:
+    return value.to_bytes(value.bit_length() // 8 + 1, "big", signed=True)
+
+
+def _encode_datetime(value: datetime.datetime) -> bytes:
+    offset = value.utcoffset()
+    if offset is None:
+        return bytes([_NAIVE_DATETIME_TAG]) + _NAIVE_DATETIME.pack(
+            (value - _EPOCH) // datetime.timedelta(microseconds=1)
+        )
+
+    utc = value.replace(tzinfo=None) - offset
+    return bytes([_AWARE_DATETIME_TAG]) + _AWARE_DATETIME.pack(
+        (utc - _EPOCH) // datetime.timedelta(microseconds=1),
+        int(offset.total_seconds()),
+    )
+
+
+def _decode_naive_datetime(data: bytes) -> datetime.datetime:
+    (micros,) = _NAIVE_DATETIME.unpack(data)
+    return _EPOCH + datetime.timedelta(microseconds=micros)
+
+
+def _decode_aware_datetime(data: bytes) -> datetime.datetime:
+    micros, offset = _AWARE_DATETIME.unpack(data)
+    timezone = datetime.timezone(datetime.timedelta(seconds=offset))
+    utc = _EPOCH + datetime.timedelta(microseconds=micros)
+    return (utc + timezone.utcoffset(None)).replace(tzinfo=timezone)
+
+
+def _encode_bson(tag: int, value: Any) -> bytes:
+    try:
+        return bytes([tag]) + bson.encode({"v": value})
+    except (InvalidDocument, TypeError, OverflowError) as e:
+        raise ValueError(
+            f"{value.__class__.__name__} is not yet supported for encryption"
+        ) from e
+
+
+# Ordered, as bool is a subclass of int
+_ENCODERS: Dict[type, Callable[[Any], bytes]] = {
+    str: lambda value: bytes([_STR]) + value.encode("utf-8"),
+    bool: lambda value: bytes([_BOOL, value]),
+    int: lambda value: bytes([_INT]) + _encode_int(value),
+    float: lambda value: bytes([_FLOAT]) + _DOUBLE.pack(value),
+    datetime.datetime: _encode_datetime,
+    list: lambda value: _encode_bson(_LIST, value),
+    dict: lambda value: _encode_bson(_DICT, value),
+}
+
+_DECODERS: Dict[int, Callable[[bytes], Any]] = {
+    _STR: lambda data: data.decode("utf-8"),
+    _BOOL: lambda data: data == b"\x01",
+    _INT: lambda data: int.from_bytes(data, "big", signed=True),
+    _FLOAT: lambda data: _DOUBLE.unpack(data)[0],
+    _NAIVE_DATETIME_TAG: _decode_naive_datetime,
+    _AWARE_DATETIME_TAG: _decode_aware_datetime,
+    _LIST: lambda data: bson.decode(data)["v"],
+    _DICT: lambda data: bson.decode(data)["v"],
+    _BSON: lambda data: bson.decode(data)["v"],
+}
+
+# Plaintext written before ciphertext was versioned
+_LEGACY_DECODERS: Dict[str, Callable[[str], Any]] = {
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": lambda data: data == "1",
+    "dict": lambda data: orjson.loads(bytes.fromhex(data)),
+    "list": lambda data: orjson.loads(bytes.fromhex(data))["list"],
+    "datetime": datetime.datetime.fromisoformat,
+}
+
+
+def encode_plaintext(value: Any) -> bytes:
+    """Encode a value as a tag byte followed by its typed encoding.
+
+    Raises
+    ------
+    ValueError
+        The value cannot be encoded.
+    """
+    encoder = _ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+
+    for _type, encoder in _ENCODERS.items():
+        # Subclasses, I.e. IntEnum or OrderedDict
+        if isinstance(value, _type):
+            return encoder(value)
+
+    return _encode_bson(_BSON, value)
+
+
+def decode_plaintext(plaintext: bytes) -> Any:
+    """Decode a plaintext created by :py:func:`encode_plaintext`"""
+    return _DECODERS[plaintext[0]](plaintext[1:])
+
+
+def decode_legacy_plaintext(plaintext: bytes) -> Any:
+    """Decode a plaintext written before ciphertext was versioned"""
+    text = plaintext.decode("utf-8")
+    return _LEGACY_DECODERS[text[:9].split("|")[0].strip()](text[9:])
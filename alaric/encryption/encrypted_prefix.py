@@ -0,0 +1,40 @@
+from typing import Dict
+
+
+class EncryptedPrefix:
+    """
+    Matches documents where a field within
+    :py:class:`~alaric.encryption.PrefixIndexedFields` starts with the given value.
+
+    This can only be used with :py:class:`~alaric.EncryptedDocument`
+    as the query is built using its ``encryption_key``.
+
+    Parameters
+    ----------
+    field: str
+        The field to check in.
+    prefix: str
+        What the field should start with.
+
+
+    Lets match all documents where ``name`` starts with ``ska``
+
+    .. code-block:: python
+
+        from alaric import AQ
+        from alaric.encryption import EncryptedPrefix
+
+        query = AQ(EncryptedPrefix("name", "ska"))
+    """
+
+    def __init__(self, field: str, prefix: str):
+        self.field: str = field
+        self.prefix: str = prefix
+
+    def __repr__(self):
+        return f"EncryptedPrefix(field='{self.field}', prefix='{self.prefix}')"
+
+    def build(self) -> Dict:
+        raise ValueError(
+            "EncryptedPrefix can only be used to query an EncryptedDocument."
+        )
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import math
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from alaric.encryption.keys import key_id
+
+# Set within each process of a pool created by
+# EncryptedDocument.create_process_pool so keys
+# are never sent alongside every chunk of work
+_worker_key: Optional[bytes] = None
+_worker_previous_keys: Dict[bytes, bytes] = {}
+
+
+def _initialise_worker(
+    encryption_key: bytes, previous_encryption_keys: Iterable[bytes] = ()
+) -> None:
+    global _worker_key, _worker_previous_keys
+    _worker_key = encryption_key
+    _worker_previous_keys = {key_id(key): key for key in previous_encryption_keys}
+
+
+def _key_digest(encryption_key: bytes, previous_keys: Dict[bytes, bytes]) -> bytes:
+    return hashlib.blake2b(
+        encryption_key + b"".join(previous_keys.values()), digest_size=16
+    ).digest()
+
+
+def _run_chunk(
+    cls: Type,
+    state: Dict[str, Any],
+    method: str,
+    chunk: List[Dict],
+    kwargs: Dict[str, Any],
+    batched: bool = False,
+) -> List[Dict]:
+    state = dict(state)
+    key_digest: Optional[bytes] = state.pop("_encryption_key_digest", None)
+    if key_digest is not None:
+        if (
+            _worker_key is None
+            or _key_digest(_worker_key, _worker_previous_keys) != key_digest
+        ):
+            raise ValueError(
+                "Process pools must be created with EncryptedDocument.create_process_pool "
+                "using the same encryption_key and previous_encryption_keys."
+            )
+
+        state["_encryption_key"] = _worker_key
+        state["_previous_encryption_keys"] = _worker_previous_keys
+
+    # A bare instance carrying only the encryption configuration,
+    # as the database connection cannot leave this process
+    instance = cls.__new__(cls)
+    instance.__dict__.update(state)
+    # Chunks may run concurrently within a thread pool,
+    # so each one keeps its own plan cache
+    instance._plans = OrderedDict()
+    if batched:
+        return getattr(instance, method)(chunk, **kwargs)
+
+    return [getattr(instance, method)(entry, **kwargs) for entry in chunk]
+
+
+async def _map_in_executor(
+    executor: Executor,
+    instance: Any,
+    attributes: Tuple[str, ...],
+    method: str,
+    data: List[Dict],
+    batched: bool = False,
+    **kwargs: Any,
+) -> List[Dict]:
+    """Call ``method`` on ``instance`` for every entry in
+    ``data``, split into chunks across the executor.
+
+    When ``batched`` is set ``method`` is instead called
+    once per chunk with a list of entries."""
+    state = {attribute: getattr(instance, attribute) for attribute in attributes}
+    if isinstance(executor, ProcessPoolExecutor):
+        state["_encryption_key_digest"] = _key_digest(
+            state.pop("_encryption_key"), state.pop("_previous_encryption_keys")
+        )
+
+    chunk_size = math.ceil(len(data) / (os.cpu_count() or 1))
+    loop = asyncio.get_running_loop()
+    chunks = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                executor,
+                functools.partial(
+                    _run_chunk,
+                    type(instance),
+                    state,
+                    method,
+                    data[index : index + chunk_size],
+                    kwargs,
+                    batched,
+                ),
+            )
+            for index in range(0, len(data), chunk_size)
+        )
+    )
+    return [entry for chunk in chunks for entry in chunk]
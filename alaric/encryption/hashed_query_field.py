@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-import hashlib
-from typing import Union, Dict
+from typing import Optional, Union, Dict
 
-from alaric import util
-from alaric.abc import ComparisonT
+from alaric.abc import ComparisonT, Hasher
+from alaric.hashers import SHA512Hasher
 from alaric.types import ObjectId
 
 
@@ -20,10 +19,19 @@ class HashedQueryField:
         from alaric.encryption import HQF
 
         query = AQ(HQF(EQ("_id", 1)))
+
+    Parameters
+    ----------
+    entry: ComparisonT
+        The comparison to hash the value of.
+    hasher: Optional[:py:class:`~alaric.abc.Hasher`]
+        The hasher used by the :py:class:`~alaric.EncryptedDocument`
+        being queried, defaults to :py:class:`~alaric.hashers.SHA512Hasher`.
     """
 
-    def __init__(self, entry: ComparisonT):
+    def __init__(self, entry: ComparisonT, *, hasher: Optional[Hasher] = None):
         self._entry: ComparisonT = entry
+        self._hasher: Hasher = hasher if hasher is not None else SHA512Hasher()
 
     def build(
         self,
@@ -34,7 +42,11 @@ class HashedQueryField:
         for k, v in initial.items():
             d = {}
             for nested_k, nested_v in v.items():
-                d[nested_k] = util.hash_field(nested_k, nested_v)
+                if isinstance(nested_v, list):
+                    # I.e. $in, hashing every value in one go
+                    d[nested_k] = self._hasher.hash_many(nested_k, nested_v)
+                else:
+                    d[nested_k] = self._hasher.hash(nested_k, nested_v)
             out[k] = d
 
         return out
@@ -0,0 +1,37 @@
+"""Identifies which key encrypted a given ciphertext."""
+
+import functools
+import hashlib
+from typing import Callable, List, TypeVar
+
+T = TypeVar("T")
+
+# How many bytes of each ciphertext identify the key used
+KEY_ID_SIZE = 4
+
+
+@functools.lru_cache(maxsize=32)
+def key_id(encryption_key: bytes) -> bytes:
+    """Return a short identifier for the given key.
+
+    This is stored within ciphertext so the matching key can
+    be picked without attempting decryption with every key.
+    """
+    return hashlib.blake2b(
+        encryption_key, digest_size=KEY_ID_SIZE, person=b"alaric key id"
+    ).digest()
+
+
+def decrypt_with_any(keys: List[bytes], decrypt: Callable[[bytes], T]) -> T:
+    """Return ``decrypt`` called with the first key it succeeds with.
+
+    Used for ciphertext written before it contained a key identifier,
+    the error from the final key is raised if every key fails.
+    """
+    for key in keys[:-1]:
+        try:
+            return decrypt(key)
+        except ValueError:
+            continue
+
+    return decrypt(keys[-1])
@@ -0,0 +1,65 @@
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, Set
+
+
+class LazyDecryptedDocument(MutableMapping):
+    """A document returned by :py:class:`alaric.EncryptedDocument`
+    when ``lazy_decryption`` is enabled.
+
+    Encrypted fields are only decrypted the first
+    time they are accessed, with the result remembered.
+
+    .. code-block:: python
+        :linenos:
+
+        document = await encrypted_document.find({"_id": 1})
+        # Only the name field is decrypted
+        print(document["name"])
+
+    Notes
+    -----
+    This behaves like a ``dict``, use ``dict(document)``
+    if you require an actual ``dict``. Doing so decrypts every field.
+    """
+
+    __slots__ = ("_data", "_encrypted", "_decrypt")
+
+    def __init__(
+        self,
+        data: Dict[str, Any],
+        encrypted: Set[str],
+        decrypt: Callable[[str, Any], Any],
+    ):
+        self._data: Dict[str, Any] = data
+        self._encrypted: Set[str] = encrypted
+        self._decrypt: Callable[[str, Any], Any] = decrypt
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._data[key]
+        if key in self._encrypted:
+            value = self._decrypt(key, value)
+            self._data[key] = value
+            self._encrypted.discard(key)
+
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._data[key] = value
+        self._encrypted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        del self._data[key]
+        self._encrypted.discard(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        # Avoids decrypting the field as Mapping would
+        return key in self._data
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self)!r})"
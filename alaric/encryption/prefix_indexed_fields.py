@@ -0,0 +1,43 @@
+from alaric.encryption import Base
+
+
+class PrefixIndexedFields(Base):
+    """A list of string fields which should be searchable by prefix.
+
+    Alaric when told to prefix index the field ``name`` will
+    create an extra field called ``name_prefixes`` containing a
+    keyed hash of every prefix of the normalised value. This is
+    removed whenever you fetch data so you never see it.
+
+    Query these fields using :py:class:`~alaric.encryption.EncryptedPrefix`
+    and consider creating a Mongo index on the ``_prefixes`` field.
+
+    .. code-block:: python
+        :linenos:
+
+        from alaric.encryption import PrefixIndexedFields
+
+        PrefixIndexedFields("name", "test", max_length=8)
+
+    Parameters
+    ----------
+    min_length: int
+        The shortest prefix which can be searched for.
+    max_length: int
+        The longest prefix which can be searched for.
+
+    .. note::
+        Values are normalised by Unicode NFKC and
+        case-folding, I.e. ``Ska`` matches ``skelmis``.
+
+        The amount of prefixes reveals the length of
+        the value, up to ``max_length`` characters.
+    """
+
+    def __init__(self, *fields: str, min_length: int = 1, max_length: int = 10):
+        super().__init__(*fields)
+        if not 1 <= min_length <= max_length:
+            raise ValueError("min_length must be between 1 and max_length.")
+
+        self.min_length: int = min_length
+        self.max_length: int = max_length
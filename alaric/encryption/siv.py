@@ -0,0 +1,19 @@
+"""Key handling for deterministic encryption using AES-SIV."""
+
+import functools
+
+from Crypto.Hash import SHA512
+from Crypto.Protocol.KDF import HKDF
+
+_SIV_CONTEXT = b"alaric deterministic encryption"
+
+
+@functools.lru_cache(maxsize=8)
+def derive_siv_key(encryption_key: bytes) -> bytes:
+    """Derive a 512 bit AES-SIV key from the given encryption key.
+
+    AES-SIV requires a key twice the size of the underlying
+    AES key, and using a separate key avoids sharing one
+    between both encryption modes.
+    """
+    return HKDF(encryption_key, 64, b"", SHA512, context=_SIV_CONTEXT)
@@ -0,0 +1,11 @@
+"""The version byte which prefixes every binary ciphertext.
+
+Each version describes the layout of the remaining bytes,
+so the format can change without breaking existing data.
+Ciphertext stored as a hex string predates these versions.
+"""
+
+# AES-GCM, b'version|key id|nonce|tag|ciphertext'
+GCM_VERSION = 4
+# AES-SIV from DeterministicEncryptedFields, b'version|key id|tag|ciphertext'
+SIV_VERSION = 5
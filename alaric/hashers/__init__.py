@@ -0,0 +1,6 @@
+from .memoized_hasher import MemoizedHasher
+from .sha512_hasher import SHA512Hasher
+from .blake2b_hasher import BLAKE2bHasher
+from .hmac_sha256_hasher import HMACSHA256Hasher
+
+__all__ = ("MemoizedHasher", "SHA512Hasher", "BLAKE2bHasher", "HMACSHA256Hasher")
@@ -0,0 +1,54 @@
+import hashlib
+from typing import Any, Dict
+
+from alaric.hashers.memoized_hasher import MemoizedHasher
+
+
+class BLAKE2bHasher(MemoizedHasher):
+    """Hash values using keyed BLAKE2b, returning binary digests.
+
+    The key prevents hashes being brute forced without
+    it, unlike unkeyed hashes of low entropy values.
+
+    .. code-block:: python
+        :linenos:
+
+        from alaric.hashers import BLAKE2bHasher
+
+        hasher = BLAKE2bHasher(bytes.fromhex(os.environ["HASH_KEY"]))
+
+    Parameters
+    ----------
+    key: bytes
+        Up to 64 bytes used to key the hash.
+
+        This must stay the same for existing hashes to match.
+    digest_size: int
+        How many bytes each digest should be, up to 64.
+    memo_size: int
+        How many recently hashed values to remember.
+
+    Raises
+    ------
+    ValueError
+        The key or digest_size is too large.
+    """
+
+    def __init__(self, key: bytes, *, digest_size: int = 32, memo_size: int = 4096):
+        if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+            raise ValueError("BLAKE2b keys cannot be longer than 64 bytes.")
+
+        if not 1 <= digest_size <= hashlib.blake2b.MAX_DIGEST_SIZE:
+            raise ValueError("digest_size must be between 1 and 64.")
+
+        self._key: bytes = key
+        self._digest_size: int = digest_size
+        super().__init__(memo_size=memo_size)
+
+    def _state(self) -> Dict[str, Any]:
+        return {"key": self._key, "digest_size": self._digest_size}
+
+    def _compute(self, data: bytes) -> bytes:
+        return hashlib.blake2b(
+            data, key=self._key, digest_size=self._digest_size
+        ).digest()
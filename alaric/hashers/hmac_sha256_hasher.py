@@ -0,0 +1,32 @@
+import hashlib
+import hmac
+from typing import Any, Dict
+
+from alaric.hashers.memoized_hasher import MemoizedHasher
+
+
+class HMACSHA256Hasher(MemoizedHasher):
+    """Hash values using HMAC-SHA256, returning binary digests.
+
+    Prefer :py:class:`~alaric.hashers.BLAKE2bHasher` unless
+    HMAC-SHA256 is required, I.e. for compliance reasons.
+
+    Parameters
+    ----------
+    key: bytes
+        The key used for the HMAC.
+
+        This must stay the same for existing hashes to match.
+    memo_size: int
+        How many recently hashed values to remember.
+    """
+
+    def __init__(self, key: bytes, *, memo_size: int = 4096):
+        self._key: bytes = key
+        super().__init__(memo_size=memo_size)
+
+    def _state(self) -> Dict[str, Any]:
+        return {"key": self._key}
+
+    def _compute(self, data: bytes) -> bytes:
+        return hmac.digest(self._key, data, hashlib.sha256)
@@ -0,0 +1,51 @@
+import functools
+from typing import Any, Dict, List, Union
+
+from alaric.util import _encode_hash_value
+
+
+class MemoizedHasher:
+    """Base for hashers which remember recently hashed values.
+
+    Subclasses implement ``_compute`` and return any key
+    state from ``_state``, which is used for pickling.
+
+    Parameters
+    ----------
+    memo_size: int
+        How many recently hashed values to remember.
+    """
+
+    def __init__(self, *, memo_size: int = 4096):
+        self._memo_size: int = memo_size
+        self._digest = functools.lru_cache(maxsize=memo_size)(self._compute)
+
+    def __repr__(self):
+        # Keys are left out so they don't end up in logs
+        fields = ", ".join(
+            f"{name}={value}"
+            for name, value in self.__getstate__().items()
+            if name != "key"
+        )
+        return f"{self.__class__.__name__}({fields})"
+
+    def __getstate__(self):
+        return {**self._state(), "memo_size": self._memo_size}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _state(self) -> Dict[str, Any]:
+        return {}
+
+    def _compute(self, data: bytes) -> Union[str, bytes]:
+        raise NotImplementedError
+
+    def hash(self, field: str, value: Any) -> Union[str, bytes]:
+        return self._digest(_encode_hash_value(field, value))
+
+    def hash_many(self, field: str, values: List[Any]) -> List[Union[str, bytes]]:
+        encoded = [_encode_hash_value(field, value) for value in values]
+        # Repeated values are only hashed once
+        digests = {data: self._digest(data) for data in set(encoded)}
+        return [digests[data] for data in encoded]
@@ -0,0 +1,22 @@
+import hashlib
+
+from alaric.hashers.memoized_hasher import MemoizedHasher
+
+
+class SHA512Hasher(MemoizedHasher):
+    """Hash values as hex encoded SHA512, matching :py:func:`alaric.util.hash_field`.
+
+    This is the default hasher for :py:class:`alaric.EncryptedDocument`
+    and is kept for existing data. New collections should prefer
+    :py:class:`~alaric.hashers.BLAKE2bHasher` as its keyed binary
+    digests are a quarter of the size within documents and indexes.
+
+    Parameters
+    ----------
+    memo_size: int
+        How many recently hashed values to remember.
+    """
+
+    @staticmethod
+    def _compute(data: bytes) -> str:
+        return hashlib.sha512(data).hexdigest()
@@ -0,0 +1,5 @@
+from .orjson_serializer import OrjsonSerializer
+from .bson_serializer import BSONSerializer
+from .zlib_serializer import ZlibSerializer
+
+__all__ = ("OrjsonSerializer", "BSONSerializer", "ZlibSerializer")
@@ -0,0 +1,48 @@
+from typing import Dict, Optional
+
+import bson
+from bson.codec_options import CodecOptions
+
+
+class BSONSerializer:
+    """Serialize documents as raw BSON.
+
+    This stores documents in the same format Mongo returns them in,
+    meaning types such as ``ObjectId``, ``Decimal128``, ``bytes``
+    and ``datetime`` survive a round trip through the cache.
+
+    Parameters
+    ----------
+    codec_options: Optional[CodecOptions]
+        The codec options to use when encoding and decoding.
+
+        Defaults to the options used by Motor so cached
+        documents match those returned from the database.
+
+
+    .. code-block:: python
+        :linenos:
+
+        from alaric import CachedDocument
+        from alaric.serializers import BSONSerializer
+
+        cached_document = CachedDocument(
+            document=document,
+            redis_client=redis_client,
+            serializer=BSONSerializer(),
+        )
+    """
+
+    def __init__(self, codec_options: Optional[CodecOptions] = None):
+        self.codec_options: CodecOptions = (
+            codec_options if codec_options is not None else CodecOptions()
+        )
+
+    def __repr__(self):
+        return f"BSONSerializer(codec_options={self.codec_options})"
+
+    def dumps(self, data: Dict) -> bytes:
+        return bson.encode(data, codec_options=self.codec_options)
+
+    def loads(self, data: bytes) -> Dict:
+        return bson.decode(data, codec_options=self.codec_options)
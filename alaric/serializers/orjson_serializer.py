@@ -0,0 +1,27 @@
+from typing import Dict
+
+import orjson
+
+
+class OrjsonSerializer:
+    """Serialize documents as JSON using orjson.
+
+    This is the default serializer for :py:class:`alaric.CachedDocument`.
+
+    .. note::
+
+        JSON cannot represent every type Mongo can store.
+        Values such as ``ObjectId``, ``Decimal128`` and ``bytes``
+        will fail to serialize and ``datetime`` values will be
+        returned as strings. Use :py:class:`~alaric.serializers.BSONSerializer`
+        if your documents contain these types.
+    """
+
+    def __repr__(self):
+        return "OrjsonSerializer()"
+
+    def dumps(self, data: Dict) -> bytes:
+        return orjson.dumps(data)
+
+    def loads(self, data: bytes) -> Dict:
+        return orjson.loads(data)
@@ -0,0 +1,86 @@
+import zlib
+from typing import Dict, Optional
+
+from alaric.abc import Serializer
+from alaric.serializers.orjson_serializer import OrjsonSerializer
+
+# The first byte of every value denotes
+# whether the remaining bytes are compressed
+_RAW = b"\x00"
+_COMPRESSED = b"\x01"
+
+
+class ZlibSerializer:
+    """Compress the output of another serializer with zlib.
+
+    Only values larger than ``threshold`` bytes are compressed
+    as small values rarely shrink enough to justify the CPU cost.
+
+    Parameters
+    ----------
+    serializer: Optional[Serializer]
+        The serializer to compress the output of.
+
+        Defaults to :py:class:`~alaric.serializers.OrjsonSerializer`
+    threshold: int
+        The minimum size in bytes a serialized
+        value must be before it is compressed.
+
+        Defaults to 1024
+    level: int
+        The zlib compression level, from 0 to 9.
+
+        Defaults to 6
+
+
+    .. code-block:: python
+        :linenos:
+
+        from alaric import CachedDocument
+        from alaric.serializers import BSONSerializer, ZlibSerializer
+
+        cached_document = CachedDocument(
+            document=document,
+            redis_client=redis_client,
+            serializer=ZlibSerializer(BSONSerializer(), threshold=512),
+        )
+    """
+
+    def __init__(
+        self,
+        serializer: Optional[Serializer] = None,
+        *,
+        threshold: int = 1024,
+        level: int = 6,
+    ):
+        if threshold < 0:
+            raise ValueError("threshold must be a positive number")
+
+        self.serializer: Serializer = (
+            serializer if serializer is not None else OrjsonSerializer()
+        )
+        self.threshold: int = threshold
+        self.level: int = level
+
+    def __repr__(self):
+        return (
+            f"ZlibSerializer(serializer={self.serializer}, "
+            f"threshold={self.threshold}, level={self.level})"
+        )
+
+    def dumps(self, data: Dict) -> bytes:
+        value = self.serializer.dumps(data)
+        if len(value) < self.threshold:
+            return _RAW + value
+
+        return _COMPRESSED + zlib.compress(value, self.level)
+
+    def loads(self, data: bytes) -> Dict:
+        flag, value = data[:1], data[1:]
+        if flag == _COMPRESSED:
+            value = zlib.decompress(value)
+
+        elif flag != _RAW:
+            raise ValueError("Value was not created by ZlibSerializer")
+
+        return self.serializer.loads(value)
@@ -16,14 +16,18 @@ def hash_field(field, value):
     ValueError
         Unsupported type to hash
     """
+    return hashlib.sha512(_encode_hash_value(field, value)).hexdigest()
+
+
+def _encode_hash_value(field, value) -> bytes:
     if isinstance(value, (int, float, bool)):
         # Support hashing ints, floats and bools
         # for search filters
         value = str(value)
 
     try:
-        return hashlib.sha512(value.encode("utf-8")).hexdigest()
-    except TypeError:
+        return value.encode("utf-8")
+    except (TypeError, AttributeError):
         raise ValueError(
             f"Cannot hash field '{field}' as it is an "
             f"unsupported type {value.__class__.__name__}"
@@ -3,6 +3,7 @@ import pytest
 from mongomock_motor import AsyncMongoMockClient
 
 from alaric import Document, Cursor, EncryptedDocument
+from alaric.backends import MemoryBackend
 from alaric.cached_document import CachedDocument
 from tests.converter import Converter
 
@@ -53,6 +54,15 @@ async def cached_document(document, mocked_redis):
     )
 
 
+@pytest.fixture
+async def memory_cached_document(document):
+    return CachedDocument(
+        document=document,
+        backend=MemoryBackend(),
+        extra_lookups=[["value"]],
+    )
+
+
 @pytest.fixture
 async def cursor(document) -> Cursor:
     return Cursor.from_document(document)
@@ -1,17 +1,41 @@
+import asyncio
+import datetime
+
+import orjson
+import pytest
+from bson import ObjectId
+
+import alaric
+from alaric import AQ
 from alaric.cached_document import CachedDocument
+from alaric.comparison import EQ, IN
+from alaric.encryption import EncryptedFields
+from alaric.logical import AND, OR
+from alaric.projections import Projection, Show, Hide
+from alaric.backends import MemoryBackend
+from alaric.serializers import BSONSerializer, ZlibSerializer
+from tests.converter import Converter
+
+
+async def key(cached_document: CachedDocument, suffix: str) -> str:
+    return await cached_document._get_key_prefix() + suffix
 
 
 async def test_get_miss_filling(cached_document: CachedDocument):
     data = {"_id": 1, "value": "value"}
     await cached_document.document.insert(data)
 
-    r_1 = await cached_document._redis_client.get("_id:1|")
+    r_1 = await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:1|")
+    )
     assert r_1 is None
 
     r_2 = await cached_document.get({"_id": 1})
     assert r_2 == data
 
-    r_3 = await cached_document._redis_client.get("_id:1|")
+    r_3 = await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:1|")
+    )
     assert r_3 is not None
 
 
@@ -19,48 +43,908 @@ async def test_extra_lookups(cached_document: CachedDocument):
     data = {"_id": 1, "value": "value"}
     await cached_document.document.insert(data)
 
-    r_1 = await cached_document._redis_client.get("value:value|")
+    r_1 = await cached_document._redis_client.get(
+        await key(cached_document, "value:s:value|")
+    )
     assert r_1 is None
 
     r_2 = await cached_document.get({"value": "value"})
     assert r_2 == data
 
-    r_3 = await cached_document._redis_client.get("value:value|")
+    r_3 = await cached_document._redis_client.get(
+        await key(cached_document, "value:s:value|")
+    )
     assert r_3 is not None
 
 
 async def test_set(cached_document: CachedDocument):
-    r_1 = await cached_document._redis_client.get("_id:1|")
+    r_1 = await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:1|")
+    )
     assert r_1 is None
 
     data = {"_id": 1, "value": "value"}
     await cached_document.set({"_id": 1}, data)
 
-    r_2 = await cached_document._redis_client.get("_id:1|")
+    r_2 = await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:1|")
+    )
     assert r_2 is not None
 
-    r_3 = await cached_document._redis_client.get("value:value|")
+    r_3 = await cached_document._redis_client.get(
+        await key(cached_document, "value:s:value|")
+    )
     assert r_3 is not None
 
 
 async def test_duplicate_set(cached_document: CachedDocument):
-    r_1 = await cached_document._redis_client.get("_id:1|")
+    r_1 = await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:1|")
+    )
     assert r_1 is None
 
     data = {"_id": 1, "value": "value"}
     await cached_document.set({"_id": 1}, data)
 
-    r_2 = await cached_document._redis_client.get("_id:1|")
+    r_2 = await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:1|")
+    )
     assert r_2 is not None
 
-    r_3 = await cached_document._redis_client.get("value:value|")
+    r_3 = await cached_document._redis_client.get(
+        await key(cached_document, "value:s:value|")
+    )
     assert r_3 is not None
 
     data["value"] = "alaric"
     await cached_document.set({"_id": 1}, data)
 
-    r_2 = await cached_document._redis_client.get("_id:1|")
+    r_2 = await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:1|")
+    )
     assert r_2 is not None
 
-    r_3 = await cached_document._redis_client.get("value:alaric|")
+    r_3 = await cached_document._redis_client.get(
+        await key(cached_document, "value:s:alaric|")
+    )
     assert r_3 is not None
+
+
+async def test_bson_serializer(document, mocked_redis):
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        serializer=BSONSerializer(),
+    )
+    data = {"_id": ObjectId(), "created_at": datetime.datetime(2022, 1, 1)}
+    await cached_document.set({"_id": data["_id"]}, data)
+
+    r_1 = await cached_document.get({"_id": data["_id"]})
+    assert r_1 == data
+
+
+async def test_zlib_serializer():
+    serializer = ZlibSerializer(threshold=64)
+
+    small = {"_id": 1}
+    r_1 = serializer.dumps(small)
+    assert r_1 == b"\x00" + orjson.dumps(small)
+    assert serializer.loads(r_1) == small
+
+    large = {"_id": 1, "value": "a" * 1024}
+    r_2 = serializer.dumps(large)
+    assert len(r_2) < len(orjson.dumps(large))
+    assert serializer.loads(r_2) == large
+
+    with pytest.raises(ValueError):
+        serializer.loads(b"\x02")
+
+
+async def test_set_removes_stale_lookups(cached_document: CachedDocument):
+    data = {"_id": 1, "value": "value"}
+    await cached_document.set({"_id": 1}, data)
+
+    data["value"] = "alaric"
+    await cached_document.set({"_id": 1}, data)
+
+    r_1 = await cached_document._redis_client.get(
+        await key(cached_document, "value:s:value|")
+    )
+    assert r_1 is None
+
+    r_2 = await cached_document._redis_client.smembers(
+        await key(cached_document, "$lookups:_id:n:1|")
+    )
+    assert r_2 == {(await key(cached_document, "value:s:alaric|")).encode()}
+
+
+async def test_invalidate(cached_document: CachedDocument):
+    data = {"_id": 1, "value": "value"}
+    await cached_document.set({"_id": 1}, data)
+
+    await cached_document.invalidate(1)
+    assert (
+        await cached_document._redis_client.get(await key(cached_document, "_id:n:1|"))
+        is None
+    )
+    assert (
+        await cached_document._redis_client.get(
+            await key(cached_document, "value:s:value|")
+        )
+        is None
+    )
+    assert (
+        await cached_document._redis_client.exists(
+            await key(cached_document, "$lookups:_id:n:1|")
+        )
+        == 0
+    )
+
+    r_1 = await cached_document.get({"_id": 1})
+    assert r_1 == data
+
+
+async def test_delete(cached_document: CachedDocument):
+    data = {"_id": 1, "value": "value"}
+    await cached_document.set({"_id": 1}, data)
+
+    r_1 = await cached_document.delete({"value": "value"})
+    assert r_1 is not None
+    assert r_1.deleted_count == 1
+
+    assert (
+        await cached_document._redis_client.get(await key(cached_document, "_id:n:1|"))
+        is None
+    )
+    assert (
+        await cached_document._redis_client.get(
+            await key(cached_document, "value:s:value|")
+        )
+        is None
+    )
+    assert await cached_document.get({"_id": 1}) is None
+    assert await cached_document.delete({"_id": 1}) is None
+
+
+async def test_namespaces(document, mocked_redis):
+    c_1: CachedDocument = CachedDocument(document=document, redis_client=mocked_redis)
+    c_2: CachedDocument = CachedDocument(
+        document=document, redis_client=mocked_redis, namespace="other"
+    )
+    await c_1.set({"_id": 1}, {"_id": 1, "value": "value"})
+
+    assert await mocked_redis.get(await key(c_1, "_id:n:1|")) is not None
+    assert await mocked_redis.get(await key(c_2, "_id:n:1|")) is None
+    assert (await key(c_1, "")).startswith("test:")
+    assert (await key(c_2, "")).startswith("other:")
+
+
+async def test_invalidate_all(cached_document: CachedDocument):
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "value"})
+    r_1 = await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:1|")
+    )
+    assert r_1 is not None
+
+    await cached_document.invalidate_all()
+    r_2 = await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:1|")
+    )
+    assert r_2 is None
+
+    # Other instances pick up the new generation
+    other: CachedDocument = CachedDocument(
+        document=cached_document.document,
+        redis_client=cached_document._redis_client,
+    )
+    assert await key(other, "") == await key(cached_document, "")
+
+
+async def test_warm(cached_document: CachedDocument):
+    await cached_document.document.bulk_insert(
+        [{"_id": i, "value": f"value_{i}"} for i in range(25)]
+    )
+
+    progress = []
+    r_1 = await cached_document.warm(
+        batch_size=10, concurrency=2, on_progress=progress.append
+    )
+    assert r_1 == 25
+    assert sorted(progress) == progress
+    assert progress[-1] == 25
+
+    for i in range(25):
+        assert await cached_document._redis_client.get(
+            await key(cached_document, f"_id:n:{i}|")
+        )
+        assert await cached_document._redis_client.get(
+            await key(cached_document, f"value:s:value_{i}|")
+        )
+
+
+async def test_warm_filter(cached_document: CachedDocument):
+    await cached_document.document.bulk_insert(
+        [{"_id": i, "value": f"value_{i}"} for i in range(10)]
+    )
+
+    r_1 = await cached_document.warm({"_id": {"$lt": 5}}, rate_limit=1_000)
+    assert r_1 == 5
+    assert not await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:7|")
+    )
+
+
+async def test_find_many(cached_document: CachedDocument):
+    await cached_document.document.bulk_insert(
+        [{"_id": i, "value": i % 2} for i in range(10)]
+    )
+
+    r_1 = await cached_document.find_many(
+        {"value": 1}, sort=("_id", alaric.Descending), limit=3
+    )
+    assert r_1 == [
+        {"_id": 9, "value": 1},
+        {"_id": 7, "value": 1},
+        {"_id": 5, "value": 1},
+    ]
+
+    # Changes outside the cached document are not seen
+    await cached_document.document.delete({"_id": 9})
+    r_2 = await cached_document.find_many(
+        {"value": 1}, sort=("_id", alaric.Descending), limit=3
+    )
+    assert r_2 == r_1
+
+    # Projections are part of the cache key
+    r_3 = await cached_document.find_many(
+        {"value": 1}, Projection(Show("_id")), sort=("_id", alaric.Descending), limit=3
+    )
+    assert r_3 == [{"_id": 7}, {"_id": 5}, {"_id": 3}]
+
+
+async def test_find_many_invalidation(cached_document: CachedDocument):
+    await cached_document.document.bulk_insert(
+        [{"_id": i, "value": 1} for i in range(3)]
+    )
+
+    r_1 = await cached_document.find_many({"value": 1})
+    assert len(r_1) == 3
+
+    await cached_document.set({"_id": 3}, {"_id": 3, "value": 1})
+    r_2 = await cached_document.find_many({"value": 1})
+    assert len(r_2) == 4
+
+    await cached_document.delete({"_id": 0})
+    r_3 = await cached_document.find_many({"value": 1})
+    assert len(r_3) == 3
+
+
+async def test_filter_normalisation(cached_document: CachedDocument):
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "value"})
+
+    prefix = await key(cached_document, "")
+    await cached_document.document.delete({"_id": 1})
+    # Served from Redis as the DB no longer has the document
+    assert await cached_document.get(AQ(EQ("_id", 1))) is not None
+    assert await cached_document.get({"_id": 1.0}) is not None
+    assert await cached_document.get(AQ(AND(EQ("value", "value")))) is not None
+    assert await cached_document.get(Converter(1)) is not None
+
+    # Different types never share keys
+    assert await cached_document.get({"_id": "1"}) is None
+    assert await cached_document.get({"_id": True}) is None
+
+    # Anything else goes to the DB and doesn't touch Redis
+    keys = await cached_document._redis_client.keys(f"{prefix}*")
+    assert await cached_document.get(AQ(IN("_id", [1]))) is None
+    assert await cached_document.get({"_id": 1, "other": 1}) is None
+    assert await cached_document._redis_client.keys(f"{prefix}*") == keys
+
+
+async def test_normalise_filter():
+    normalise = CachedDocument._normalise_filter
+    assert normalise({"_id": 5}) == {"_id": 5}
+    assert normalise(AQ(EQ("_id", 5)).build()) == {"_id": 5}
+    assert normalise(AQ(AND(EQ("a", 1), EQ("b", "2"))).build()) == {"a": 1, "b": "2"}
+    assert normalise(AQ(AND(EQ("a", 1), EQ("a", 2))).build()) is None
+    assert normalise(AQ(OR(EQ("a", 1))).build()) is None
+    assert normalise({"a": {"$eq": 1, "$ne": 2}}) is None
+
+    build = CachedDocument._build_redis_lookup_key
+    assert build({"a": "1|b:s:2", "b": "3"}) != build({"a": "1", "b": "2|b:s:3"})
+    assert build({"a": [1]}) is None
+
+
+async def test_get_projections(cached_document: CachedDocument):
+    data = {"_id": 1, "value": "value", "nested": {"a": 1, "b": 2}}
+    await cached_document.document.insert(data)
+
+    r_1 = await cached_document.get({"_id": 1}, Projection(Show("value")))
+    assert r_1 == {"value": "value"}
+
+    # The full document was cached
+    r_2 = await cached_document.get({"_id": 1})
+    assert r_2 == data
+
+    r_3 = await cached_document.get({"value": "value"}, {"nested.a": 1})
+    assert r_3 == {"_id": 1, "nested": {"a": 1}}
+
+    r_4 = await cached_document.get({"_id": 1}, Projection(Hide("nested")))
+    assert r_4 == {"value": "value"}
+
+    r_5 = await cached_document.get({"_id": 1}, {"nested.b": 0})
+    assert r_5 == {"_id": 1, "value": "value", "nested": {"a": 1}}
+    assert data["nested"] == {"a": 1, "b": 2}
+
+
+async def test_get_many(cached_document: CachedDocument):
+    await cached_document.document.bulk_insert(
+        [{"_id": i, "value": f"value_{i}"} for i in range(5)]
+    )
+    await cached_document.get({"_id": 0})
+
+    r_1 = await cached_document.get_many(
+        [{"_id": 0}, {"value": "value_1"}, AQ(IN("_id", [2])), {"_id": 10}],
+        Projection(Show("value")),
+    )
+    assert r_1 == [
+        {"value": "value_0"},
+        {"value": "value_1"},
+        {"value": "value_2"},
+        None,
+    ]
+
+    # Only cacheable filters populate Redis
+    assert await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:1|")
+    )
+    assert not await cached_document._redis_client.get(
+        await key(cached_document, "_id:n:2|")
+    )
+
+
+async def test_backend_required(document, mocked_redis):
+    with pytest.raises(ValueError):
+        CachedDocument(document=document)
+
+    with pytest.raises(ValueError):
+        CachedDocument(
+            document=document, redis_client=mocked_redis, backend=MemoryBackend()
+        )
+
+
+async def test_memory_backend(memory_cached_document: CachedDocument):
+    data = {"_id": 1, "value": "value"}
+    await memory_cached_document.set({"_id": 1}, data)
+    await memory_cached_document.document.delete({"_id": 1})
+
+    assert await memory_cached_document.get({"_id": 1}) == data
+    assert await memory_cached_document.get({"value": "value"}) == data
+
+    data["value"] = "alaric"
+    await memory_cached_document.set({"_id": 1}, data)
+    assert await memory_cached_document.get({"value": "value"}) is None
+    assert await memory_cached_document.get({"value": "alaric"}) == data
+
+    await memory_cached_document.invalidate(1)
+    assert (
+        await memory_cached_document._backend.get(
+            await key(memory_cached_document, "_id:n:1|")
+        )
+        is None
+    )
+
+
+async def test_stale_lookups_are_ignored(memory_cached_document: CachedDocument):
+    data = {"_id": 1, "value": "value"}
+    await memory_cached_document.set({"_id": 1}, data)
+
+    # Simulate the set of lookups being evicted before an update
+    prefix = await key(memory_cached_document, "")
+    await memory_cached_document._backend.delete(f"{prefix}$lookups:_id:n:1|")
+    await memory_cached_document.set({"_id": 1}, {"_id": 1, "value": "alaric"})
+    assert await memory_cached_document._backend.get(f"{prefix}value:s:value|")
+
+    assert await memory_cached_document.get({"value": "value"}) is None
+
+
+async def test_local_cache(document, mocked_redis):
+    cached_document: CachedDocument = CachedDocument(
+        document=document, redis_client=mocked_redis, local_cache=MemoryBackend()
+    )
+    data = {"_id": 1, "value": "value"}
+    await cached_document.set({"_id": 1}, data)
+    assert await cached_document.get({"_id": 1}) == data
+
+    # Served locally once Redis has been read
+    await mocked_redis.flushdb()
+    assert await cached_document.get({"_id": 1}) == data
+
+    await cached_document.invalidate(1)
+    assert (
+        await cached_document._local_cache.get(await key(cached_document, "_id:n:1|"))
+        is None
+    )
+
+
+async def test_invalidation_bus(document, mocked_redis):
+    with pytest.raises(ValueError):
+        CachedDocument(
+            document=document, redis_client=mocked_redis, invalidation_bus=True
+        )
+
+    c_1: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        local_cache=MemoryBackend(),
+        invalidation_bus=True,
+    )
+    c_2: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        local_cache=MemoryBackend(),
+        invalidation_bus=True,
+    )
+    try:
+        await c_1.set({"_id": 1}, {"_id": 1, "value": "value"})
+        assert (await c_2.get({"_id": 1}))["value"] == "value"
+
+        await c_1.set({"_id": 1}, {"_id": 1, "value": "alaric"})
+        for _ in range(50):
+            r_1 = await c_2.get({"_id": 1})
+            if r_1["value"] == "alaric":
+                break
+
+            await asyncio.sleep(0.02)
+
+        assert r_1["value"] == "alaric"
+    finally:
+        await c_1.close()
+        await c_2.close()
+
+
+async def test_invalidation_bus_unavailable(document, mocked_redis):
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        local_cache=MemoryBackend(),
+        invalidation_bus=True,
+        circuit_breaker_threshold=1,
+        circuit_breaker_cooldown=datetime.timedelta(milliseconds=20),
+    )
+    await document.insert({"_id": 1, "value": "a"})
+    pubsub = mocked_redis.pubsub
+
+    def failing(*args, **kwargs):
+        redis_pubsub = pubsub(*args, **kwargs)
+
+        async def subscribe(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+        redis_pubsub.subscribe = subscribe
+        return redis_pubsub
+
+    mocked_redis.pubsub = failing
+    try:
+        assert await cached_document.get({"_id": 1}) == {"_id": 1, "value": "a"}
+        assert cached_document.degraded
+        assert cached_document._pubsub is None
+        assert (
+            await cached_document._local_cache.get(
+                await key(cached_document, "_id:n:1|")
+            )
+            is None
+        )
+
+        del mocked_redis.pubsub
+        for _ in range(50):
+            if cached_document._pubsub is not None:
+                break
+
+            await asyncio.sleep(0.02)
+
+        assert cached_document._pubsub is not None
+        for _ in range(2):
+            assert await cached_document.get({"_id": 1}) == {"_id": 1, "value": "a"}
+
+        assert (
+            await cached_document._local_cache.get(
+                await key(cached_document, "_id:n:1|")
+            )
+            is not None
+        )
+    finally:
+        await cached_document.close()
+
+
+async def test_ttl_policy(document, mocked_redis):
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        extra_lookups=[["value"]],
+        ttl_policy=lambda d: (
+            datetime.timedelta(days=1) if d.get("archived") else None
+        ),
+    )
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "a", "archived": True})
+    await cached_document.set({"_id": 2}, {"_id": 2, "value": "b"})
+    await cached_document.set(
+        {"_id": 3}, {"_id": 3, "value": "c"}, ttl=datetime.timedelta(seconds=30)
+    )
+
+    for suffix, expected in (
+        ("_id:n:1|", 86400),
+        ("value:s:a|", 86400),
+        ("$lookups:_id:n:1|", 86400),
+        ("_id:n:2|", 3600),
+        ("value:s:b|", 3600),
+        ("_id:n:3|", 30),
+        ("value:s:c|", 30),
+    ):
+        assert await mocked_redis.ttl(await key(cached_document, suffix)) == expected
+
+
+async def test_ttl_jitter(document, mocked_redis):
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        extra_lookups=[["value"]],
+        cache_ttl=datetime.timedelta(seconds=100),
+        ttl_jitter=datetime.timedelta(seconds=100),
+    )
+    ttls = set()
+    for i in range(10):
+        await cached_document.set({"_id": i}, {"_id": i, "value": str(i)})
+        ttl = await mocked_redis.pttl(await key(cached_document, f"_id:n:{i}|"))
+        assert 100_000 - 1_000 <= ttl <= 200_000
+        lookup_ttl = await mocked_redis.pttl(
+            await key(cached_document, f"value:s:{i}|")
+        )
+        assert abs(ttl - lookup_ttl) < 100
+        ttls.add(ttl // 1000)
+
+    assert len(ttls) > 1
+
+
+async def test_write_behind(document, mocked_redis):
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        write_behind=True,
+        write_behind_interval=datetime.timedelta(hours=1),
+    )
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "a"})
+    await cached_document.set({"_id": 1}, {"_id": 1, "last_seen": 2})
+    await cached_document.set({"_id": 2}, {"_id": 2, "value": "b"})
+    assert await document.count({}) == 0
+    assert await cached_document.get({"_id": 2}) == {"_id": 2, "value": "b"}
+
+    assert await cached_document.flush() == 2
+    assert await cached_document.flush() == 0
+    assert await document.find({"_id": 1}) == {"_id": 1, "value": "a", "last_seen": 2}
+    assert await document.find({"_id": 2}) == {"_id": 2, "value": "b"}
+
+    await cached_document.set({"_id": 3}, {"_id": 3})
+    await cached_document.close()
+    assert await document.count({}) == 3
+
+
+async def test_write_behind_thresholds(document, mocked_redis):
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        write_behind=True,
+        write_behind_interval=datetime.timedelta(milliseconds=10),
+        write_behind_max_pending=2,
+    )
+    await cached_document.set({"_id": 1}, {"_id": 1})
+    await cached_document.set({"_id": 2}, {"_id": 2})
+    assert await document.count({}) == 2
+
+    await cached_document.set({"_id": 3}, {"_id": 3})
+    assert await document.count({}) == 2
+    await asyncio.sleep(0.05)
+    assert await document.count({}) == 3
+    await cached_document.close()
+
+
+async def test_write_behind_error(document, mocked_redis):
+    errors = []
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        write_behind=True,
+        on_write_behind_error=lambda e, entries: errors.append((e, entries)),
+    )
+
+    async def bulk_write(*args, **kwargs):
+        raise RuntimeError("Mongo is down")
+
+    document._document.bulk_write = bulk_write
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "a"})
+    assert await cached_document.flush() == 0
+    assert len(errors) == 1
+    assert isinstance(errors[0][0], RuntimeError)
+    assert errors[0][1] == [{"_id": 1, "value": "a"}]
+    # The unsaved value is no longer served from the cache
+    assert (
+        await cached_document._backend.get(await key(cached_document, "_id:n:1|"))
+        is None
+    )
+    await cached_document.close()
+
+
+async def test_write_behind_encrypted_document(mocked_database, mocked_redis):
+    document = alaric.EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=alaric.EncryptedDocument.generate_aes_key(),
+        encrypted_fields=EncryptedFields("ssn"),
+    )
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        write_behind=True,
+        write_behind_interval=datetime.timedelta(hours=1),
+    )
+    await cached_document.set({"_id": 1}, {"_id": 1, "ssn": "123-45-6789"})
+    assert await cached_document.flush() == 1
+
+    raw = await document.raw_collection.find_one({"_id": 1})
+    assert raw["ssn"] != "123-45-6789"
+    assert await document.find({"_id": 1}) == {"_id": 1, "ssn": "123-45-6789"}
+    await cached_document.close()
+
+
+async def test_write_behind_replays_generation_bump(document):
+    backend = MemoryBackend()
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        backend=backend,
+        write_behind=True,
+        write_behind_interval=datetime.timedelta(milliseconds=30),
+        circuit_breaker_threshold=1,
+        circuit_breaker_cooldown=datetime.timedelta(milliseconds=20),
+    )
+
+    async def failing(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    backend.incr = failing
+    await cached_document.invalidate_all()
+    assert cached_document.degraded
+    del backend.incr
+
+    # The periodic flush is the first call after the cool-down
+    # and replays the bump while holding the flush lock
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "a"})
+    await asyncio.sleep(0.06)
+    assert await document.find({"_id": 1}) == {"_id": 1, "value": "a"}
+    assert cached_document._generation == 1
+    await asyncio.wait_for(cached_document.close(), 1)
+
+
+async def test_increment(cached_document: CachedDocument):
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "a", "count": 1})
+    results = await asyncio.gather(
+        *[cached_document.increment({"value": "a"}, "count", 2) for _ in range(5)]
+    )
+    assert sorted(results) == [3, 5, 7, 9, 11]
+    assert cached_document._serializer.loads(
+        await cached_document._backend.get(await key(cached_document, "_id:n:1|"))
+    ) == {"_id": 1, "value": "a", "count": 11}
+    assert await cached_document.get({"_id": 1}) == {
+        "_id": 1,
+        "value": "a",
+        "count": 11,
+    }
+    assert await cached_document.document.find({"_id": 1}) == {
+        "_id": 1,
+        "value": "a",
+        "count": 11,
+    }
+
+    # The cached copy no longer matches the document
+    # this increment applied to, so it must not be rewritten
+    await cached_document.document.raw_collection.update_one(
+        {"_id": 1}, {"$inc": {"count": 5}}
+    )
+    assert await cached_document.increment({"_id": 1}, "count", 1) == 17
+    assert (
+        await cached_document._backend.get(await key(cached_document, "_id:n:1|"))
+        is None
+    )
+    assert (await cached_document.get({"_id": 1}))["count"] == 17
+
+    assert await cached_document.increment({"_id": 1}, "nested.count", -1) == -1
+
+    await cached_document.set({"_id": 3}, {"_id": 3, "items": [{"n": 1}]})
+    assert await cached_document.increment({"_id": 3}, "items.0.n", 1) == 2
+    assert await cached_document.get({"_id": 3}) == {"_id": 3, "items": [{"n": 2}]}
+    # Can't be rebuilt, so the cached copy is invalidated instead
+    assert await cached_document.increment({"items.n": 2}, "items.$.n", 1) is None
+    assert await cached_document.get({"_id": 3}) == {"_id": 3, "items": [{"n": 3}]}
+    assert (await cached_document.get({"value": "a"}))["nested"] == {"count": -1}
+    assert await cached_document.increment({"_id": 2}, "count", 1) is None
+
+
+async def test_stats(document, mocked_redis):
+    metrics = []
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        redis_client=mocked_redis,
+        extra_lookups=[["value"]],
+        on_metric=lambda name, value: metrics.append(name),
+    )
+    await document.insert({"_id": 1, "value": "a"})
+    assert await cached_document.get({"_id": 1}) == {"_id": 1, "value": "a"}
+    assert await cached_document.get({"value": "a"}) == {"_id": 1, "value": "a"}
+    assert await cached_document.get({"_id": 2}) is None
+    assert await cached_document.get({"value": {"$ne": "b"}}) is not None
+    await cached_document.find_many({})
+    await cached_document.find_many({})
+
+    stats = cached_document.stats(reset=True)
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["not_found"] == 1
+    assert stats["uncacheable"] == 1
+    assert stats["lookup_dereferences"] == 1
+    assert stats["query_hits"] == 1
+    assert stats["query_misses"] == 1
+    assert stats["db_fallbacks"] == 4
+    assert stats["db_fallback_seconds"] > 0
+    assert stats["bytes_read"] > 0
+    assert stats["bytes_written"] > 0
+    assert stats["backend_errors"] == 0
+    assert stats["hit_ratio"] == 1 / 3
+    assert "hits" in metrics and "db_fallback_seconds" in metrics
+    assert cached_document.stats()["hits"] == 0
+
+
+async def test_stats_backend_errors(cached_document: CachedDocument):
+    async def mget(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    cached_document._backend.mget = mget
+    with pytest.raises(ConnectionError):
+        await cached_document.get({"_id": 1})
+
+    assert cached_document.stats()["backend_errors"] == 1
+
+
+async def test_circuit_breaker(document):
+    backend = MemoryBackend()
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        backend=backend,
+        extra_lookups=[["value"]],
+        circuit_breaker_threshold=2,
+        circuit_breaker_cooldown=datetime.timedelta(milliseconds=50),
+    )
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "a"})
+
+    calls = 0
+
+    async def failing(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        raise ConnectionError("Redis is down")
+
+    backend.mget = backend.script = backend.set = failing
+    assert await cached_document.get({"_id": 1}) == {"_id": 1, "value": "a"}
+    assert not cached_document.degraded
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "b"})
+    assert cached_document.degraded
+    assert calls == 3
+
+    # Skipped entirely until the cool-down ends
+    assert await cached_document.get({"_id": 1}) == {"_id": 1, "value": "b"}
+    assert await cached_document.get({"value": "b"}) == {"_id": 1, "value": "b"}
+    assert calls == 3
+    assert cached_document.stats()["circuit_opens"] == 1
+
+    del backend.mget, backend.script, backend.set
+    # Redis missed the write so still holds the old document
+    cached = await backend.get(await key(cached_document, "_id:n:1|"))
+    assert orjson.loads(cached) == {"_id": 1, "value": "a"}
+
+    await asyncio.sleep(0.06)
+    assert await cached_document.get({"_id": 1}) == {"_id": 1, "value": "b"}
+    assert not cached_document.degraded
+    assert await cached_document.get({"value": "a"}) is None
+    assert await cached_document.get({"value": "b"}) == {"_id": 1, "value": "b"}
+
+
+async def test_missed_invalidations_are_capped(document, monkeypatch):
+    monkeypatch.setattr(alaric.cached_document, "_MAX_MISSED_INVALIDATIONS", 2)
+    backend = MemoryBackend()
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        backend=backend,
+        circuit_breaker_threshold=1,
+        circuit_breaker_cooldown=datetime.timedelta(milliseconds=20),
+    )
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "a"})
+
+    async def failing(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    backend.script = failing
+    await cached_document.invalidate(1)
+    await cached_document.set({"_id": 2}, {"_id": 2})
+    assert len(cached_document._missed_invalidations) == 2
+
+    # Tracking more ids falls back to discarding the generation
+    await cached_document.set({"_id": 3}, {"_id": 3})
+    assert cached_document._missed_invalidations == {}
+    assert cached_document._missed_generation_bump
+
+    del backend.script
+    await asyncio.sleep(0.03)
+    assert await cached_document.get({"_id": 2}) == {"_id": 2}
+    assert cached_document._generation == 1
+    assert not cached_document._missed_generation_bump
+
+
+async def test_backend_timeout(document):
+    backend = MemoryBackend()
+    cached_document: CachedDocument = CachedDocument(
+        document=document,
+        backend=backend,
+        backend_timeout=datetime.timedelta(milliseconds=10),
+        circuit_breaker_threshold=5,
+    )
+    await document.insert({"_id": 1})
+
+    async def slow(*args, **kwargs):
+        await asyncio.sleep(1)
+
+    backend.mget = slow
+    assert await cached_document.get({"_id": 1}) == {"_id": 1}
+    assert cached_document.stats()["backend_errors"] == 1
+
+
+async def test_converted_cache(converter_document, mocked_redis):
+    cached_document: CachedDocument = CachedDocument(
+        document=converter_document,
+        redis_client=mocked_redis,
+        extra_lookups=[["value"]],
+        converted_cache_size=1,
+    )
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "a"})
+    first = await cached_document.get({"_id": 1})
+    assert isinstance(first, Converter)
+    assert await cached_document.get({"_id": 1}) is first
+    assert await cached_document.get({"value": "a"}) is first
+    assert await cached_document.get({"_id": 1}, try_convert=False) == {
+        "_id": 1,
+        "value": "a",
+    }
+    assert await cached_document.get({"_id": 1}, {"value": 1}) is not first
+
+    await cached_document.set({"_id": 1}, {"_id": 1, "value": "b"})
+    second = await cached_document.get({"_id": 1})
+    assert second is not first
+    assert second.value == "b"
+    assert await cached_document.get({"value": "a"}) is None
+
+    # Bounded by converted_cache_size
+    await cached_document.set({"_id": 2}, {"_id": 2, "value": "c"})
+    await cached_document.get({"_id": 2})
+    assert await cached_document.get({"_id": 1}) is not second
+
+
+async def test_datetime_lookups_are_hits(document, mocked_redis):
+    cached_document = CachedDocument(
+        document=document, redis_client=mocked_redis, extra_lookups=[["created"]]
+    )
+    created = datetime.datetime(2024, 1, 2, 3, 4, 5)
+    await cached_document.set({"_id": 1}, {"_id": 1, "created": created})
+
+    for _ in range(3):
+        assert (await cached_document.get({"created": created}))["_id"] == 1
+
+    stats = cached_document.stats()
+    assert stats["stale_lookups"] == 0
+    assert stats["hit_ratio"] == 1.0
@@ -1,10 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import datetime
+
+import orjson
 import pytest
+from bson import Binary, Decimal128, ObjectId
+from Crypto.Cipher import AES
 
-from alaric import Document, EncryptedDocument, AQ, util
-from alaric.comparison import EQ
+from alaric import Document, EncryptedDocument, AQ, Cursor, util
+from alaric.comparison import EQ, GT, IN, LT, Exists, Regex
 from alaric.projections import Projection, Show
 from tests.converter import Converter
 from alaric.encryption import *
+from alaric.logical import AND, OR
+from alaric.meta import Negate
+from alaric.hashers import BLAKE2bHasher, HMACSHA256Hasher, SHA512Hasher
+from alaric.encryption.encoding import decode_plaintext, encode_plaintext
+from alaric.encryption.keys import key_id
+from alaric.encryption.versions import GCM_VERSION
 
 
 # This test suite assumes all of the base document tests pass
@@ -20,8 +34,13 @@ async def test_basic_field_encryption(encrypted_document: EncryptedDocument):
     encrypted_document._encrypted_fields = EncryptedFields("data")
     await encrypted_document.insert({"data": 1})
 
-    r_1 = await encrypted_document.find({"data": 1})
-    assert r_1 is None, "Shouldn't be able to query encrypted fields for data correctly"
+    with pytest.raises(ValueError):
+        await encrypted_document.find({"data": 1})
+
+    with pytest.raises(ValueError):
+        await encrypted_document.count({"$or": [{"_id": 1}, {"data": 1}]})
+
+    assert await encrypted_document.count({"data": {"$exists": True}}) == 1
 
 
 async def test_basic_field_hashing(encrypted_document: EncryptedDocument):
@@ -32,7 +51,10 @@ async def test_basic_field_hashing(encrypted_document: EncryptedDocument):
     assert r_1 is not None
 
     r_2 = await encrypted_document.find(AQ(EQ("data", 1)))
-    assert r_2 is None, "Shouldn't be able to query hashed field with raw value"
+    assert r_2 is not None, "Raw values should be compared against the hash"
+
+    r_3 = await encrypted_document.find({"data": 1})
+    assert r_3 is None, "Dictionaries are used as is"
 
 
 async def test_incorrect_key(encrypted_document: EncryptedDocument):
@@ -75,7 +97,8 @@ async def test_automatic_hash_with_full_encryption(
     assert r_2 is None
 
     r_3 = await encrypted_document.find(AQ(EQ("data", 1)))
-    assert r_3 is None
+    assert r_3 is not None
+    assert r_3["data"] == 1
 
 
 async def test_automatic_hash_with_field_encryption(
@@ -95,7 +118,8 @@ async def test_automatic_hash_with_field_encryption(
     assert r_2 is None
 
     r_3 = await encrypted_document.find(AQ(EQ("data", 1)))
-    assert r_3 is None
+    assert r_3 is not None
+    assert r_3["data"] == 1
 
 
 async def test_convertors(encrypted_document: EncryptedDocument):
@@ -131,3 +155,655 @@ async def test_convertors(encrypted_document: EncryptedDocument):
     assert r_2 is not None
     assert isinstance(r_2, Test)
     assert r_2.data == "world"
+
+
+async def test_executor_threads(mocked_database, encryption_key):
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        encrypted_document = EncryptedDocument(
+            mocked_database,
+            "test",
+            encryption_key=encryption_key,
+            encrypted_fields=EncryptedFields("data"),
+            automatic_hashed_fields=AutomaticHashedFields("data"),
+            executor=pool,
+            parallel_threshold=5,
+        )
+        await encrypted_document.bulk_insert(
+            [{"_id": i, "data": f"hello {i}"} for i in range(10)]
+        )
+        raw = await encrypted_document.raw_collection.find_one({"_id": 1})
+        assert raw["data"] != "hello 1"
+        assert raw["data_hashed"] == util.hash_field("data_hashed", "hello 1")
+
+        results = await encrypted_document.find_many({})
+        assert results == [{"_id": i, "data": f"hello {i}"} for i in range(10)]
+        # Chunks build plans privately rather than sharing across threads
+        assert not encrypted_document._plans
+
+        cursor = Cursor(
+            encrypted_document.raw_collection,
+            encryption_key=encryption_key,
+            encrypted_fields=EncryptedFields("data"),
+            automatic_hashed_fields=AutomaticHashedFields("data"),
+            executor=pool,
+            parallel_threshold=5,
+        )
+        assert await cursor.execute() == results
+
+
+async def test_executor_processes(mocked_database, encryption_key):
+    pool = EncryptedDocument.create_process_pool(encryption_key, max_workers=2)
+    try:
+        encrypted_document = EncryptedDocument(
+            mocked_database,
+            "test",
+            encryption_key=encryption_key,
+            encrypt_all_fields=True,
+            executor=pool,
+            parallel_threshold=5,
+        )
+        await encrypted_document.bulk_insert(
+            [{"_id": i, "data": i, "nested": {"value": [i]}} for i in range(10)]
+        )
+        results = await encrypted_document.find_many({})
+        assert results == [
+            {"_id": i, "data": i, "nested": {"value": [i]}} for i in range(10)
+        ]
+
+        encrypted_document._encryption_key = EncryptedDocument.generate_aes_key()
+        with pytest.raises(ValueError):
+            await encrypted_document.find_many({})
+    finally:
+        pool.shutdown()
+
+
+def legacy_encrypt(key: bytes, plaintext: str) -> str:
+    cipher = AES.new(key, AES.MODE_GCM)
+    ciphertext, tag = cipher.encrypt_and_digest(plaintext.encode("utf-8"))
+    return (cipher.nonce + tag + ciphertext).hex()
+
+
+async def test_binary_ciphertext(encrypted_document: EncryptedDocument):
+    encrypted_document._encrypted_fields = EncryptedFields("data", "items")
+    await encrypted_document.insert(
+        {"_id": 1, "data": "hello", "items": [1, {"a": True}]}
+    )
+
+    raw = await encrypted_document.raw_collection.find_one({"_id": 1})
+    assert isinstance(raw["data"], bytes)
+    assert raw["data"][0] == GCM_VERSION
+    # version + key id + nonce + tag + type + 'hello'
+    assert len(raw["data"]) == 1 + 4 + 16 + 16 + 1 + 5
+    assert await encrypted_document.find({"_id": 1}) == {
+        "_id": 1,
+        "data": "hello",
+        "items": [1, {"a": True}],
+    }
+
+
+async def test_legacy_hex_ciphertext(encrypted_document: EncryptedDocument):
+    key = encrypted_document._encryption_key
+    encrypted_document._encrypted_fields = EncryptedFields("data", "items", "flag")
+    await encrypted_document.raw_collection.insert_one(
+        {
+            "_id": 1,
+            "data": legacy_encrypt(key, "str     |hello"),
+            "items": legacy_encrypt(
+                key, f"list    |{orjson.dumps({'list': [1, 2]}).hex()}"
+            ),
+            "flag": legacy_encrypt(key, "bool    |1"),
+        }
+    )
+    expected = {"_id": 1, "data": "hello", "items": [1, 2], "flag": True}
+    assert await encrypted_document.find({"_id": 1}) == expected
+
+    cursor = Cursor(
+        encrypted_document.raw_collection,
+        encryption_key=key,
+        encrypted_fields=EncryptedFields("data", "items", "flag"),
+    )
+    assert await cursor.execute() == [expected]
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "hello",
+        "",
+        True,
+        False,
+        0,
+        -1,
+        2**70,
+        1.5,
+        datetime.datetime(2024, 1, 2, 3, 4, 5, 678901),
+        datetime.datetime(
+            2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone(datetime.timedelta(hours=-5))
+        ),
+        [1, "two", [3.0]],
+        {"a": {"b": [ObjectId("65f1c9b2a1b2c3d4e5f60718")]}},
+        b"raw bytes",
+        Decimal128("1.10"),
+        None,
+    ],
+)
+def test_plaintext_encoding(value):
+    assert decode_plaintext(encode_plaintext(value)) == value
+    assert type(decode_plaintext(encode_plaintext(value))) is type(value)
+
+
+async def test_lazy_decryption(mocked_database, encryption_key):
+    encrypted_document = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=encryption_key,
+        encrypt_all_fields=True,
+        automatic_hashed_fields=AutomaticHashedFields("name"),
+        lazy_decryption=True,
+    )
+    await encrypted_document.insert({"_id": 1, "name": "Ethan", "age": 21})
+
+    calls = []
+    decrypt = encrypted_document._aes_decrypt_field
+
+    def counting_decrypt(value):
+        calls.append(value)
+        return decrypt(value)
+
+    encrypted_document._aes_decrypt_field = counting_decrypt
+    result = await encrypted_document.find(HQF(EQ("name_hashed", "Ethan")))
+    assert isinstance(result, LazyDecryptedDocument)
+    assert "name_hashed" not in result
+    assert "age" in result
+    assert not calls
+
+    assert result["name"] == "Ethan"
+    assert result["name"] == "Ethan"
+    assert len(calls) == 1
+
+    result["age"] = 22
+    assert result == {"_id": 1, "name": "Ethan", "age": 22}
+    assert len(calls) == 2
+
+    encrypted_document.converter = lambda **kwargs: kwargs
+    assert await encrypted_document.find_many({}) == [
+        {"_id": 1, "name": "Ethan", "age": 21}
+    ]
+
+    encrypted_document._encryption_key = EncryptedDocument.generate_aes_key()
+    encrypted_document.converter = None
+    (result,) = await encrypted_document.find_many({})
+    with pytest.raises(ValueError):
+        result["name"]
+
+
+async def test_nested_fields(mocked_database, encryption_key):
+    encrypted_document = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=encryption_key,
+        encrypted_fields=EncryptedFields("profile.email"),
+        hashed_fields=HashedFields("profile.meta.token"),
+        automatic_hashed_fields=AutomaticHashedFields("profile.name"),
+    )
+    data = {
+        "_id": 1,
+        "profile": {"email": "a@b.c", "name": "Ethan", "meta": {"token": "abc"}},
+    }
+    await encrypted_document.insert(data)
+
+    raw = await encrypted_document.raw_collection.find_one({"_id": 1})
+    assert isinstance(raw["profile"]["email"], bytes)
+    assert raw["profile"]["meta"]["token"] == util.hash_field("token", "abc")
+    assert raw["profile"]["name"] == "Ethan"
+    assert raw["profile"]["name_hashed"] == util.hash_field("name_hashed", "Ethan")
+
+    assert await encrypted_document.find({"_id": 1}) == {
+        "_id": 1,
+        "profile": {
+            "email": "a@b.c",
+            "name": "Ethan",
+            "meta": {"token": util.hash_field("token", "abc")},
+        },
+    }
+
+    await encrypted_document.update({"_id": 1}, {"profile.email": "d@e.f"})
+    raw = await encrypted_document.raw_collection.find_one({"_id": 1})
+    assert isinstance(raw["profile"]["email"], bytes)
+    assert (await encrypted_document.find({"_id": 1}))["profile"]["email"] == "d@e.f"
+
+
+async def test_field_plans_are_cached(mocked_database, encryption_key):
+    encrypted_document = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=encryption_key,
+        encrypted_fields=EncryptedFields("data"),
+        plan_cache_size=2,
+    )
+    await encrypted_document.insert({"_id": 1, "data": "a"})
+    await encrypted_document.insert({"_id": 2, "data": "b"})
+    assert len(encrypted_document._plans) == 1
+
+    await encrypted_document.find_many({})
+    assert len(encrypted_document._plans) == 2
+
+    await encrypted_document.insert({"_id": 3, "data": "c", "extra": 1})
+    assert len(encrypted_document._plans) == 2
+
+    # Plans must follow changes to the configured fields
+    encrypted_document._encrypted_fields = EncryptedFields()
+    await encrypted_document.insert({"_id": 4, "data": "d"})
+    raw = await encrypted_document.raw_collection.find_one({"_id": 4})
+    assert raw["data"] == "d"
+
+
+async def test_hashers():
+    assert SHA512Hasher().hash("data", 1) == util.hash_field("data", 1)
+
+    hasher = BLAKE2bHasher(b"key", digest_size=16, memo_size=8)
+    digest = hasher.hash("data", "value")
+    assert isinstance(digest, bytes) and len(digest) == 16
+    assert hasher.hash("data", "value") == digest
+    assert hasher._digest.cache_info().hits == 1
+    assert BLAKE2bHasher(b"other key", digest_size=16).hash("data", "value") != digest
+
+    assert hasher.hash_many("data", ["value", 1, "value"]) == [
+        digest,
+        hasher.hash("data", 1),
+        digest,
+    ]
+
+    assert len(HMACSHA256Hasher(b"key").hash("data", "value")) == 32
+
+    with pytest.raises(ValueError):
+        BLAKE2bHasher(b"k" * 65)
+
+    with pytest.raises(ValueError):
+        SHA512Hasher().hash("data", [1])
+
+
+async def test_keyed_hasher(mocked_database, encryption_key):
+    hasher = BLAKE2bHasher(b"key")
+    batches = []
+    hash_many = hasher.hash_many
+
+    def recording_hash_many(field, values):
+        batches.append(field)
+        return hash_many(field, values)
+
+    hasher.hash_many = recording_hash_many
+    encrypted_document = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=encryption_key,
+        hashed_fields=HashedFields("email"),
+        automatic_hashed_fields=AutomaticHashedFields("data"),
+        encrypted_fields=EncryptedFields("data"),
+        hasher=hasher,
+    )
+    await encrypted_document.bulk_insert(
+        [{"_id": i, "email": f"{i}@example.com", "data": i % 2} for i in range(4)]
+    )
+    # Each column is hashed across the whole batch at once
+    assert sorted(batches) == ["data_hashed", "email"]
+    raw = await encrypted_document.raw_collection.find_one({"_id": 1})
+    assert raw["email"] == hasher.hash("email", "1@example.com")
+
+    r_1 = await encrypted_document.find(
+        AQ(HQF(EQ("email", "1@example.com"), hasher=hasher))
+    )
+    assert r_1["_id"] == 1
+
+    r_2 = await encrypted_document.find_many(
+        AQ(HQF(EQ("data_hashed", 1), hasher=hasher))
+    )
+    assert [r["_id"] for r in r_2] == [1, 3]
+
+    r_3 = await encrypted_document.find_many(
+        AQ(HQF(IN("email", ["0@example.com", "2@example.com"]), hasher=hasher))
+    )
+    assert [r["_id"] for r in r_3] == [0, 2]
+
+    assert await encrypted_document.find(AQ(HQF(EQ("email", "1@example.com")))) is None
+
+
+async def test_hashed_query_rewriting(mocked_database, encryption_key):
+    encrypted_document = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=encryption_key,
+        hashed_fields=HashedFields("email"),
+        automatic_hashed_fields=AutomaticHashedFields("name", "profile.city"),
+        encrypted_fields=EncryptedFields("name", "secret"),
+    )
+    await encrypted_document.bulk_insert(
+        [
+            {
+                "_id": i,
+                "email": f"{i}@example.com",
+                "name": f"name {i}",
+                "secret": i,
+                "profile": {"city": f"city {i % 2}"},
+            }
+            for i in range(4)
+        ]
+    )
+
+    assert encrypted_document._build_filter(AQ(EQ("name", "name 1"))) == {
+        "name_hashed": {"$eq": util.hash_field("name_hashed", "name 1")}
+    }
+
+    r_1 = await encrypted_document.find(AQ(EQ("email", "1@example.com")))
+    assert r_1["_id"] == 1
+
+    r_2 = await encrypted_document.find_many(
+        AQ(AND(IN("name", ["name 0", "name 2", "name 3"]), LT("_id", 3)))
+    )
+    assert [r["_id"] for r in r_2] == [0, 2]
+
+    assert await encrypted_document.count(AQ(EQ("profile.city", "city 1"))) == 2
+    assert await encrypted_document.count(AQ(Negate(EQ("name", "name 0")))) == 3
+    assert (
+        await encrypted_document.count(
+            AQ(Negate(IN("email", ["0@example.com", "1@example.com"])))
+        )
+        == 2
+    )
+    assert await encrypted_document.count(AQ(Exists("secret"))) == 4
+
+    for query in (EQ("secret", 1), GT("name", "a"), Regex("email", "example")):
+        with pytest.raises(ValueError):
+            await encrypted_document.find_many(AQ(query))
+
+    r_3 = await encrypted_document.get_all(AQ(EQ("profile.city", "city 0")))
+    assert [r["_id"] for r in r_3] == [0, 2]
+
+    await encrypted_document.update(AQ(EQ("email", "2@example.com")), {"secret": 5})
+    await encrypted_document.increment(AQ(EQ("name", "name 2")), "secret", 1)
+    await encrypted_document.increment(AQ(EQ("name", "name 2")), "visits", 1)
+    await encrypted_document.change_field_to(
+        AQ(EQ("email", "2@example.com")), "status", "active"
+    )
+    await encrypted_document.upsert(AQ(EQ("name", "name 2")), {"other": True})
+    assert await encrypted_document.find({"_id": 2}) == {
+        "_id": 2,
+        "email": util.hash_field("email", "2@example.com"),
+        "name": "name 2",
+        "secret": 6,
+        "profile": {"city": "city 0"},
+        "visits": 1,
+        "status": "active",
+        "other": True,
+    }
+
+    await encrypted_document.delete(AQ(OR(EQ("name", "name 0"), EQ("_id", 1))))
+    assert await encrypted_document.count({}) == 2
+
+
+async def test_deterministic_encryption(mocked_database, encryption_key):
+    encrypted_document = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=encryption_key,
+        deterministic_encrypted_fields=DeterministicEncryptedFields(
+            "email", "alias", "profile.city"
+        ),
+    )
+    await encrypted_document.bulk_insert(
+        [
+            {
+                "_id": i,
+                "email": f"{i % 2}@example.com",
+                "alias": f"{i % 2}@example.com",
+                "profile": {"city": f"city {i}"},
+            }
+            for i in range(4)
+        ]
+    )
+
+    raw = await encrypted_document.raw_collection.find({}).to_list(None)
+    assert isinstance(raw[0]["email"], Binary)
+    assert raw[0]["email"] == raw[2]["email"]
+    assert raw[0]["email"] != raw[1]["email"]
+    assert raw[0]["email"] != raw[0]["alias"], "Fields shouldn't share ciphertext"
+    assert "email_hashed" not in raw[0]
+
+    r_1 = await encrypted_document.find_many(AQ(EQ("email", "1@example.com")))
+    assert r_1 == [
+        {
+            "_id": i,
+            "email": "1@example.com",
+            "alias": "1@example.com",
+            "profile": {"city": f"city {i}"},
+        }
+        for i in (1, 3)
+    ]
+
+    assert await encrypted_document.count(AQ(IN("profile.city", ["city 0"]))) == 1
+    assert await encrypted_document.count(AQ(Negate(EQ("alias", "0@example.com")))) == 2
+
+    with pytest.raises(ValueError):
+        await encrypted_document.find(AQ(Regex("email", "example")))
+
+    await encrypted_document.change_field_to(AQ(EQ("_id", 0)), "email", "2@example.com")
+    assert (await encrypted_document.find(AQ(EQ("email", "2@example.com"))))["_id"] == 0
+
+    await encrypted_document.change_field_to({"_id": 0}, "alias", 1)
+    await encrypted_document.increment(AQ(EQ("alias", 1)), "alias", 2)
+    assert (await encrypted_document.find(AQ(EQ("alias", 3))))["_id"] == 0
+
+    cursor = Cursor(
+        encrypted_document.raw_collection,
+        encryption_key=encryption_key,
+        deterministic_encrypted_fields=DeterministicEncryptedFields("email", "alias"),
+    ).set_filter({"_id": 1})
+    assert (await cursor.execute())[0]["email"] == "1@example.com"
+
+    encrypted_document._encryption_key = EncryptedDocument.generate_aes_key()
+    with pytest.raises(ValueError):
+        await encrypted_document.find({"_id": 1})
+
+
+async def test_rotate_key(mocked_database, encryption_key):
+    options = dict(
+        encrypted_fields=EncryptedFields("data"),
+        automatic_hashed_fields=AutomaticHashedFields("data"),
+        deterministic_encrypted_fields=DeterministicEncryptedFields("email"),
+        hashed_fields=HashedFields("token"),
+    )
+    encrypted_document = EncryptedDocument(
+        mocked_database, "test", encryption_key=encryption_key, **options
+    )
+    await encrypted_document.bulk_insert(
+        [
+            {"_id": i, "data": f"data {i}", "email": f"{i}@e.f", "token": f"t{i}"}
+            for i in range(10)
+        ]
+    )
+
+    new_key = EncryptedDocument.generate_aes_key()
+    assert await encrypted_document.rotate_key(new_key, batch_size=3) == 10
+    assert encrypted_document._encryption_key == new_key
+    raw = await encrypted_document.raw_collection.find_one({"_id": 1})
+    assert raw["data"][1:5] == key_id(new_key)
+    assert raw["email"][1:5] == key_id(new_key)
+    assert raw["token"] == util.hash_field("token", "t1")
+    assert (await encrypted_document.find(AQ(EQ("email", "1@e.f"))))["_id"] == 1
+    assert (await encrypted_document.find(AQ(EQ("data", "data 1"))))["_id"] == 1
+    checkpoints = mocked_database[EncryptedDocument._KEY_ROTATION_COLLECTION]
+    assert await checkpoints.count_documents({}) == 0
+
+    # Resumes after the checkpoint, leaving earlier documents on the old key
+    newer_key = EncryptedDocument.generate_aes_key()
+    await checkpoints.insert_one(
+        {"_id": f"test:{key_id(newer_key).hex()}", "last_id": 6}
+    )
+    assert await encrypted_document.rotate_key(newer_key) == 3
+    raw = await encrypted_document.raw_collection.find({}).to_list(None)
+    rotated = [r["_id"] for r in raw if r["data"][1:5] == key_id(newer_key)]
+    assert rotated == [7, 8, 9]
+
+    reader = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=newer_key,
+        previous_encryption_keys=[new_key],
+        **options,
+    )
+    for document in (encrypted_document, reader):
+        results = await document.find_many({})
+        assert [r["data"] for r in results] == [f"data {i}" for i in range(10)]
+
+        # Deterministic ciphertext differs per key
+        r_1 = await document.find_many(AQ(IN("email", ["1@e.f", "8@e.f"])))
+        assert [r["_id"] for r in r_1] == [1, 8]
+        assert (await document.find(AQ(EQ("email", "1@e.f"))))["_id"] == 1
+        assert await document.count(AQ(Negate(EQ("email", "1@e.f")))) == 9
+
+    reader._previous_encryption_keys = {}
+    with pytest.raises(ValueError):
+        await reader.find_many({})
+
+
+async def test_rotate_key_changed_documents(mocked_database, encryption_key):
+    encrypted_document = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=encryption_key,
+        encrypted_fields=EncryptedFields("data"),
+    )
+    await encrypted_document.bulk_insert(
+        [{"_id": i, "data": f"data {i}"} for i in range(3)]
+    )
+    bulk_write = encrypted_document._document.bulk_write
+    changes = 1
+
+    async def concurrent_write(*args, **kwargs):
+        nonlocal changes
+        if changes:
+            changes -= 1
+            await encrypted_document.update({"_id": 1}, {"data": "changed"})
+
+        return await bulk_write(*args, **kwargs)
+
+    # Changed documents are read again and retried
+    encrypted_document._document.bulk_write = concurrent_write
+    new_key = EncryptedDocument.generate_aes_key()
+    assert await encrypted_document.rotate_key(new_key) == 3
+    raw = await encrypted_document.raw_collection.find({}).to_list(None)
+    assert all(r["data"][1:5] == key_id(new_key) for r in raw)
+    assert (await encrypted_document.find({"_id": 1}))["data"] == "changed"
+
+    # Documents which never stop changing are reported
+    changes = EncryptedDocument._KEY_ROTATION_ATTEMPTS
+    with pytest.raises(ValueError):
+        await encrypted_document.rotate_key(EncryptedDocument.generate_aes_key())
+
+    assert encrypted_document._encryption_key == new_key
+
+
+async def test_rotate_legacy_hex_ciphertext(mocked_database, encryption_key):
+    options = dict(encrypted_fields=EncryptedFields("data", "flag"))
+    await mocked_database["test"].insert_one(
+        {
+            "_id": 1,
+            "data": legacy_encrypt(encryption_key, "str     |hello"),
+            "flag": legacy_encrypt(encryption_key, "bool    |1"),
+        }
+    )
+    expected = [{"_id": 1, "data": "hello", "flag": True}]
+
+    # Readers switched to the new key before rotating
+    new_key = EncryptedDocument.generate_aes_key()
+    reader = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=new_key,
+        previous_encryption_keys=[encryption_key],
+        **options,
+    )
+    assert await reader.find_many({}) == expected
+    cursor = Cursor(
+        reader.raw_collection,
+        encryption_key=new_key,
+        previous_encryption_keys=[encryption_key],
+        **options,
+    )
+    assert await cursor.execute() == expected
+
+    encrypted_document = EncryptedDocument(
+        mocked_database, "test", encryption_key=encryption_key, **options
+    )
+    assert await encrypted_document.rotate_key(new_key) == 1
+    raw = await encrypted_document.raw_collection.find_one({"_id": 1})
+    for field in ("data", "flag"):
+        assert raw[field][1:5] == key_id(new_key)
+
+    reader._previous_encryption_keys = {}
+    assert await reader.find_many({}) == expected
+
+
+async def test_prefix_search(mocked_database, encryption_key):
+    encrypted_document = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=encryption_key,
+        encrypted_fields=EncryptedFields("name", "nickname"),
+        prefix_indexed_fields=PrefixIndexedFields(
+            "name", "nickname", min_length=2, max_length=4
+        ),
+    )
+    await encrypted_document.bulk_insert(
+        [
+            {"_id": 1, "name": "Skelmis", "nickname": "Ska"},
+            {"_id": 2, "name": "Skadi", "nickname": "Sk"},
+            {"_id": 3, "name": "Ethan", "nickname": "Skelmis"},
+        ]
+    )
+
+    raw = await encrypted_document.raw_collection.find_one({"_id": 1})
+    # sk, ske, skel
+    assert len(raw["name_prefixes"]) == 3
+    assert raw["name_prefixes"][0] != raw["nickname_prefixes"][0]
+    assert await encrypted_document.find({"_id": 1}) == {
+        "_id": 1,
+        "name": "Skelmis",
+        "nickname": "Ska",
+    }
+
+    async def search(query) -> List[int]:
+        return [r["_id"] for r in await encrypted_document.find_many(AQ(query))]
+
+    assert await search(EncryptedPrefix("name", "SK")) == [1, 2]
+    assert await search(EncryptedPrefix("name", "skel")) == [1]
+    assert await search(EncryptedPrefix("nickname", "ske")) == [3]
+    assert await search(
+        AND(EncryptedPrefix("name", "sk"), EncryptedPrefix("nickname", "ska"))
+    ) == [1]
+
+    # Prefix tokens differ per key
+    reader = EncryptedDocument(
+        mocked_database,
+        "test",
+        encryption_key=EncryptedDocument.generate_aes_key(),
+        previous_encryption_keys=[encryption_key],
+        encrypted_fields=EncryptedFields("name", "nickname"),
+        prefix_indexed_fields=PrefixIndexedFields(
+            "name", "nickname", min_length=2, max_length=4
+        ),
+    )
+    r_1 = await reader.find_many(AQ(EncryptedPrefix("name", "ska")))
+    assert [r["_id"] for r in r_1] == [2]
+
+    with pytest.raises(ValueError):
+        await search(EncryptedPrefix("name", "s"))
+
+    with pytest.raises(ValueError):
+        await search(EncryptedPrefix("name", "skelly"))
+
+    with pytest.raises(ValueError):
+        await search(EncryptedPrefix("_id", "sk"))
+
+    with pytest.raises(ValueError):
+        await encrypted_document.insert({"name": 1})
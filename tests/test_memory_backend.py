@@ -0,0 +1,76 @@
+import asyncio
+import datetime
+
+import pytest
+
+from alaric.backends import MemoryBackend, CacheScript
+
+
+async def test_get_set():
+    backend = MemoryBackend()
+    assert await backend.get("key") is None
+
+    await backend.set("key", "value")
+    assert await backend.get("key") == b"value"
+    assert await backend.mget(["key", "missing"]) == [b"value", None]
+
+    assert await backend.delete("key", "missing") == 1
+    assert await backend.get("key") is None
+
+
+async def test_ttl():
+    backend = MemoryBackend()
+    await backend.set("key", b"value", datetime.timedelta(milliseconds=10))
+    assert await backend.get("key") == b"value"
+
+    await asyncio.sleep(0.02)
+    assert await backend.get("key") is None
+    assert len(backend) == 0
+
+
+async def test_max_size():
+    backend = MemoryBackend(max_size=1024)
+    for i in range(10):
+        await backend.set(f"key_{i}", b"a" * 200)
+
+    assert backend.size <= 1024
+    assert await backend.get("key_0") is None
+    assert await backend.get("key_9") is not None
+
+
+async def test_max_size_prefers_expired():
+    backend = MemoryBackend(max_size=1024)
+    await backend.set("live", b"a" * 200)
+    await backend.set("expiring", b"a" * 200, datetime.timedelta(milliseconds=1))
+    await asyncio.sleep(0.01)
+    for i in range(2):
+        await backend.set(f"key_{i}", b"a" * 200)
+
+    assert await backend.get("live") is not None
+    assert "expiring" not in backend._data
+
+
+async def test_incr():
+    backend = MemoryBackend()
+    assert await backend.incr("counter") == 1
+    assert await backend.incr("counter") == 2
+    assert await backend.get("counter") == b"2"
+
+
+async def test_script_and_pipeline():
+    backend = MemoryBackend()
+    script = CacheScript(
+        lua="",
+        python=lambda redis, keys, args: redis.call("SADD", keys[0], *args),
+    )
+    assert await backend.script(script, ["set"], ["a", "b"]) == 2
+
+    pipe = backend.pipeline()
+    pipe.set("key", "value")
+    pipe.script(script, ["set"], ["b", "c"])
+    pipe.delete("key")
+    assert await pipe.execute() == [True, 1, 1]
+    assert sorted(backend.call("SMEMBERS", "set")) == [b"a", b"b", b"c"]
+
+    with pytest.raises(ValueError):
+        backend.call("HGET", "key")